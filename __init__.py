@@ -1,6 +1,8 @@
 # Currently installed metaClass definitions, redefined on imports
 import logging
 import mCore
+import mBackend
+import mCodec
 from metaData import *
 import mAsset
 import mExportTag
@@ -8,19 +10,17 @@ import mExportTag
 _logger = logging.getLogger(__name__)
 _logger.setLevel(logging.INFO)
 
-global RIGISTERED_METACLASS
-metaData.registerMClassInheritanceMapping()
-
 def _Reload():
     """
     Reloads the modules defined by this init and any other imported modules
     from used by them
     """
 
+    reload(mBackend)
+    reload(mCodec)
     reload(metaData)
     reload(mAsset)
     reload(mExportTag)
-    metaData.registerMClassInheritanceMapping()
 
 
 
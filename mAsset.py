@@ -1,11 +1,11 @@
 import uuid
-import json
 import logging
 import datetime
 from pprint import pformat
 import pymel.core as pCore
 import maya.OpenMaya as om
 import metaData
+import mCodec
 import __main__
 
 _logger = logging.getLogger(__name__)
@@ -252,7 +252,7 @@ class AssetCallbacks(object):
                 componentTransform = None
                 attr = "%s.%s" % (node, "MAsset_Part")
                 if pCore.cmds.objExists(attr):
-                    partData = json.loads(pCore.cmds.getAttr(attr))
+                    partData = mCodec.DecodeCached(pCore.cmds.getAttr(attr))
                     if not partData["Root"]:
                         if componentTransform:
                             asset = MAsset_GetMAssetFrom(componentTransform)
@@ -309,7 +309,7 @@ class AssetCallbacks(object):
                 path = nodePath.fullPathName()
                 attr = "%s.%s" % (path, "MAsset_Part")
                 if pCore.cmds.objExists(attr):
-                    partData = json.loads(pCore.cmds.getAttr(attr))
+                    partData = mCodec.DecodeCached(pCore.cmds.getAttr(attr))
                     if partData.has_key("UUID"):
                         UUID = partData["UUID"]
                         UUIDMAssetDict.setdefault(UUID, [])
@@ -616,13 +616,10 @@ def MAsset_OptimiseUnused():
     Members.  This will delete these from the scene
     '''
     opt = 0
-    for i, n in enumerate(pCore.cmds.ls(type="network")):
-        if pCore.cmds.objExists("%s.metaClass" % n):
-            klassName = pCore.cmds.getAttr("%s.metaClass" % n)
-            if klassName == "MAsset":
-                if not metaData.IsValidMetaNode(n):
-                    pCore.delete(n)
-                    opt += 1
+    for n in metaData.IterMetaNodesForClass("MAsset", asMetaData=False):
+        if not metaData.IsValidMetaNode(n):
+            pCore.delete(n)
+            opt += 1
     _logger.info("Optimised %s MAsset Node" % opt)
 
 
@@ -634,13 +631,10 @@ def MAsset_GetMAssetFrom(Node):
     '''
     if isinstance(Node, pCore.PyNode):
         Node = Node.longName()
-    metaNodes = [n for n in pCore.cmds.listConnections(Node, s=1, d=0, type="network") if
-                 pCore.cmds.objExists("%s.metaClass" % n)]
-    if metaNodes:
-        nodes = [n for n in metaNodes if pCore.cmds.getAttr("%s.metaClass" % n) == "MAsset"]
-        if nodes:
-            return nodes[0]
-        return ""
+    metaNodes = pCore.cmds.listConnections(Node, s=1, d=0, type="network") or []
+    nodes = [n for n, metaClass in zip(metaNodes, metaData.BulkGetMetaClass(metaNodes)) if metaClass == "MAsset"]
+    if nodes:
+        return nodes[0]
     return ""
 
 
@@ -696,7 +690,7 @@ def MAsset_IsRootTransform(name):
 
     attr = MAsset_GetMAssetPartAttr(name)
     if attr:
-        partData = json.loads(pCore.cmds.getAttr(attr))
+        partData = mCodec.DecodeCached(pCore.cmds.getAttr(attr))
         if partData.has_key("Root"):
             if partData["Root"]:
                 return True
@@ -1915,6 +1909,10 @@ class MAsset(metaData.MetaData):
     def _SetInitialProperties(self):
         self.m_SetInitialProperty("UUID", str(uuid.uuid4()), "LOCKED")
 
+    def _InitInstanceState(self):
+        # MAssets made by m_CreateMany would all get the prototype's UUID
+        self.UUID = str(uuid.uuid4())
+
     def EnsureUniqueShortNames(self, members=[], testForUnique=False):
         _logger.debug("EnsureUniqueShortNames")
         if not members:
@@ -2236,10 +2234,9 @@ class MAsset(metaData.MetaData):
         return False
 
     def GetRootTransform(self):
-        for n, d in self.m_GetParts():
-            if d.has_key("Root"):
-                if d["Root"]:
-                    return n
+        roots = self.m_GetPartTable().Where(Root=True)
+        if roots:
+            return pCore.PyNode(roots[0])
 
     def SetRootTransformPivot(self, pivot, **kwargs):
         root = self.GetRootTransform()
@@ -2463,7 +2460,7 @@ class MAsset(metaData.MetaData):
         '''
         filterAttrs = ["nodeState", "metaClass", "metaVersion", "UUID", "rmbCommand", "selectCommand",
                        "BlackBox", "metaNetwork", "metaTagged"]
-        copyAttrs = [a.longName() for a in self.m_GetMetaNodeAttributes() if a.longName() not in filterAttrs]
+        copyAttrs = [a for a in self.m_GetMetaNodeAttributeNames() if a not in filterAttrs]
         for attr in copyAttrs:
             setattr(NewAsset, attr, getattr(self, attr, ""))
             pnAttr = getattr(NewAsset.MetaNode, attr, None)
@@ -0,0 +1,367 @@
+'''
+Backends for the low level DG work done by MetaData.  Every backend implements the same small
+set of calls, attribute reads and writes, message connections and listConnections style queries,
+so the MetaData api doesn't change whichever backend is used.
+
+* **om2** does the work on `maya.api.OpenMaya` MPlugs and MFnDependencyNodes.  This avoids
+  building PyMEL objects which is the main cost in the core paths.
+* **pymel** is the original PyMEL/cmds path and is kept as the fallback.
+
+The backend is chosen at import from the MAYA_METADATA_BACKEND environment variable (default
+"om2") and can be swapped at runtime with `SetBackend`.
+
+.. note::
+
+    API edits made from script aren't put on the undo queue.  So by default the om2 backend
+    only uses the API for reads and queries and makes its writes and connections through cmds.
+    Set `OpenMaya2Backend.Undoable` to False in build or batch processes to make the writes
+    on the API as well.
+'''
+
+import os
+import logging
+
+import maya.cmds as cmds
+
+try:
+    import maya.api.OpenMaya as om2
+except ImportError:
+    om2 = None
+
+_logger = logging.getLogger(__name__)
+_logger.setLevel(logging.INFO)
+
+
+class PyMelBackend(object):
+    '''
+    The original cmds/PyMEL path
+    '''
+
+    Name = "pymel"
+
+    def __repr__(self):
+        return "%s()" % self.__class__.__name__
+
+    def ListConnections(self, plugName, source=True, destination=True, nodeTypes=None):
+        '''
+        :param plugName: `str` node.attribute, array attributes include the connections on all the elements
+        :param nodeTypes: [str,] only return nodes of these types
+        :return: [str,] connected node names, shapes are not converted to their transforms
+        '''
+        res = cmds.listConnections(plugName, s=source, d=destination, sh=True) or []
+        if nodeTypes:
+            res = [n for n in res if cmds.objectType(n) in nodeTypes]
+        return res
+
+    def ListConnectionPairs(self, plugNames, source=True, destination=True, nodeTypes=None):
+        '''
+        Connections of many plugs in one listConnections call, along with the local plug each
+        connection is made on, IE the element plug of an array.  The plugNames must be on
+        different nodes.
+
+        :return: [[(localPlug, connectedNode),],] for each of the plugNames
+        '''
+        indices = dict((plugName.split(".", 1)[0], i) for i, plugName in enumerate(plugNames))
+        res = [[] for p in plugNames]
+        pairs = cmds.listConnections(plugNames, s=source, d=destination, c=True, sh=True) or []
+        if nodeTypes and pairs:
+            keep = set(cmds.ls(pairs[1::2], type=nodeTypes))
+        for plug, node in zip(pairs[0::2], pairs[1::2]):
+            if nodeTypes and node not in keep:
+                continue
+            res[indices[plug.split(".", 1)[0]]].append((plug, node))
+        return res
+
+    def ListConnectionsBulk(self, plugNames, source=True, destination=True, nodeTypes=None):
+        '''
+        Same as `ListConnections` for many plugs in one listConnections call.  The plugNames
+        must be on different nodes.
+
+        :return: [[str,],] connected node names for each of the plugNames
+        '''
+        return [[node for _, node in pairs]
+                for pairs in self.ListConnectionPairs(plugNames, source, destination, nodeTypes)]
+
+    def HasConnections(self, plugName):
+        '''
+        :return: `bool` False if the plug doesn't exist
+        '''
+        if not cmds.objExists(plugName):
+            return False
+        return bool(cmds.listConnections(plugName))
+
+    def GetAttr(self, plugName, pyType):
+        '''
+        :param pyType: `str`, `int`, `float` or `bool`.  Enums are returned as their index
+        '''
+        data = cmds.getAttr(plugName)
+        if pyType == str and data is None:
+            return u""
+        return data
+
+    def GetEnumString(self, plugName):
+        return cmds.getAttr(plugName, asString=True)
+
+    def GetStringAttrs(self, nodes, attr):
+        '''
+        :return: [str,] the attr value of each node, None where the node doesn't have the attr
+        '''
+        res = []
+        for n in nodes:
+            plugName = "%s.%s" % (n, attr)
+            if cmds.objExists(plugName):
+                res.append(cmds.getAttr(plugName) or u"")
+            else:
+                res.append(None)
+        return res
+
+    def SetAttr(self, plugName, value, pyType):
+        '''
+        :param pyType: `str`, `int`, `float` or `bool`.  Enums are set by their index.  The plug
+            must be unlocked
+        '''
+        if pyType == str:
+            cmds.setAttr(plugName, value, type="string")
+        else:
+            cmds.setAttr(plugName, value)
+
+    def IsLocked(self, plugName):
+        return cmds.getAttr(plugName, lock=True)
+
+    def SetLocked(self, plugName, locked):
+        cmds.setAttr(plugName, lock=locked)
+
+    def AddAttr(self, nodeName, longName, attrType, shortName=None, hidden=False, enumNames=None):
+        '''
+        :param attrType: "string", "long", "double", "bool" or "enum"
+        :param enumNames: `str` enum fields for enum attributes, IE "A=0:B=1"
+        '''
+        kw = dict(longName=longName, hidden=hidden)
+        if shortName:
+            kw["shortName"] = shortName
+        if attrType == "string":
+            kw["dataType"] = "string"
+        else:
+            kw["attributeType"] = attrType
+        if enumNames:
+            kw["enumName"] = enumNames
+        cmds.addAttr(nodeName, **kw)
+
+    def Connect(self, source, destination, force=True, nextAvailable=False):
+        '''
+        :param nextAvailable: `bool` destination is an array, connect to it's next free element
+        '''
+        cmds.connectAttr(source, destination, f=force, na=nextAvailable)
+
+    def Disconnect(self, source, destination):
+        cmds.disconnectAttr(source, destination)
+
+
+class OpenMaya2Backend(PyMelBackend):
+    '''
+    `maya.api.OpenMaya` backend.  Reads and queries are done on MPlugs.  Writes and connections
+    are done on the API when `Undoable` is False, otherwise they fall back to cmds so they are
+    undoable
+    '''
+
+    Name = "om2"
+
+    def __init__(self, Undoable=True):
+        if om2 is None:
+            raise ImportError("maya.api.OpenMaya is not available")
+        self.Undoable = Undoable
+
+    def __repr__(self):
+        return "%s(Undoable=%s)" % (self.__class__.__name__, self.Undoable)
+
+    @staticmethod
+    def _GetPlug(plugName):
+        selection = om2.MSelectionList()
+        selection.add(plugName)
+        return selection.getPlug(0)
+
+    @staticmethod
+    def _GetNode(nodeName):
+        selection = om2.MSelectionList()
+        try:
+            selection.add(str(nodeName))
+        except RuntimeError:
+            return None
+        return selection.getDependNode(0)
+
+    @staticmethod
+    def _NodeName(node):
+        if node.hasFn(om2.MFn.kDagNode):
+            return om2.MFnDagNode(node).partialPathName()
+        return om2.MFnDependencyNode(node).name()
+
+    def _ConnectionPairs(self, plugName, source, destination, nodeTypes):
+        plug = self._GetPlug(plugName)
+        plugs = [plug]
+        if plug.isArray:
+            plugs += [plug.connectionByPhysicalIndex(i) for i in range(plug.numConnectedElements())]
+        res = []
+        for p in plugs:
+            for other in p.connectedTo(source, destination):
+                node = other.node()
+                if nodeTypes and om2.MFnDependencyNode(node).typeName not in nodeTypes:
+                    continue
+                res.append((p, node))
+        return res
+
+    def ListConnections(self, plugName, source=True, destination=True, nodeTypes=None):
+        return [self._NodeName(node) for _, node in self._ConnectionPairs(plugName, source, destination, nodeTypes)]
+
+    def ListConnectionPairs(self, plugNames, source=True, destination=True, nodeTypes=None):
+        return [[(p.name(), self._NodeName(node)) for p, node in self._ConnectionPairs(plugName, source, destination, nodeTypes)]
+                for plugName in plugNames]
+
+    def ListConnectionsBulk(self, plugNames, source=True, destination=True, nodeTypes=None):
+        return [self.ListConnections(p, source, destination, nodeTypes) for p in plugNames]
+
+    def HasConnections(self, plugName):
+        try:
+            plug = self._GetPlug(plugName)
+        except RuntimeError:
+            return False
+        if plug.isConnected:
+            return True
+        return plug.isArray and plug.numConnectedElements() > 0
+
+    def GetAttr(self, plugName, pyType):
+        plug = self._GetPlug(plugName)
+        if pyType == str:
+            return plug.asString()
+        elif pyType == bool:
+            return plug.asBool()
+        elif pyType == float:
+            return plug.asDouble()
+        return plug.asInt()
+
+    def GetEnumString(self, plugName):
+        plug = self._GetPlug(plugName)
+        return om2.MFnEnumAttribute(plug.attribute()).fieldName(plug.asShort())
+
+    def GetStringAttrs(self, nodes, attr):
+        res = []
+        for n in nodes:
+            node = self._GetNode(n)
+            if node is None:
+                res.append(None)
+                continue
+            fnNode = om2.MFnDependencyNode(node)
+            if fnNode.hasAttribute(attr):
+                res.append(fnNode.findPlug(attr, False).asString())
+            else:
+                res.append(None)
+        return res
+
+    def SetAttr(self, plugName, value, pyType):
+        if self.Undoable:
+            return super(OpenMaya2Backend, self).SetAttr(plugName, value, pyType)
+        plug = self._GetPlug(plugName)
+        modifier = om2.MDGModifier()
+        if pyType == str:
+            modifier.newPlugValueString(plug, value)
+        elif pyType == bool:
+            modifier.newPlugValueBool(plug, value)
+        elif pyType == float:
+            modifier.newPlugValueDouble(plug, value)
+        else:
+            modifier.newPlugValueInt(plug, value)
+        modifier.doIt()
+
+    def IsLocked(self, plugName):
+        return self._GetPlug(plugName).isLocked
+
+    def SetLocked(self, plugName, locked):
+        if self.Undoable:
+            return super(OpenMaya2Backend, self).SetLocked(plugName, locked)
+        self._GetPlug(plugName).isLocked = locked
+
+    def AddAttr(self, nodeName, longName, attrType, shortName=None, hidden=False, enumNames=None):
+        numericTypes = {"long": om2.MFnNumericData.kInt,
+                        "double": om2.MFnNumericData.kDouble,
+                        "bool": om2.MFnNumericData.kBoolean}
+        if self.Undoable or attrType not in ("string", "enum") and attrType not in numericTypes:
+            return super(OpenMaya2Backend, self).AddAttr(nodeName, longName, attrType, shortName, hidden, enumNames)
+        shortName = shortName or longName
+        if attrType == "string":
+            attr = om2.MFnTypedAttribute().create(longName, shortName, om2.MFnData.kString)
+        elif attrType == "enum":
+            fnEnum = om2.MFnEnumAttribute()
+            attr = fnEnum.create(longName, shortName)
+            index = 0
+            for field in (enumNames or "").split(":"):
+                if not field:
+                    continue
+                if "=" in field:
+                    field, index = field.rsplit("=", 1)
+                    index = int(index)
+                fnEnum.addField(field, index)
+                index += 1
+        else:
+            attr = om2.MFnNumericAttribute().create(longName, shortName, numericTypes[attrType])
+        om2.MFnAttribute(attr).hidden = hidden
+        modifier = om2.MDGModifier()
+        modifier.addAttribute(self._GetNode(nodeName), attr)
+        modifier.doIt()
+
+    @staticmethod
+    def _NextAvailableElement(arrayPlug):
+        used = set(i for i in arrayPlug.getExistingArrayAttributeIndices()
+                   if arrayPlug.elementByLogicalIndex(i).isConnected)
+        index = 0
+        while index in used:
+            index += 1
+        return arrayPlug.elementByLogicalIndex(index)
+
+    def Connect(self, source, destination, force=True, nextAvailable=False):
+        if self.Undoable:
+            return super(OpenMaya2Backend, self).Connect(source, destination, force, nextAvailable)
+        destinationPlug = self._GetPlug(destination)
+        if nextAvailable and destinationPlug.isArray:
+            destinationPlug = self._NextAvailableElement(destinationPlug)
+        modifier = om2.MDGModifier()
+        if force and destinationPlug.isDestination:
+            modifier.disconnect(destinationPlug.source(), destinationPlug)
+        modifier.connect(self._GetPlug(source), destinationPlug)
+        modifier.doIt()
+
+    def Disconnect(self, source, destination):
+        if self.Undoable:
+            return super(OpenMaya2Backend, self).Disconnect(source, destination)
+        modifier = om2.MDGModifier()
+        modifier.disconnect(self._GetPlug(source), self._GetPlug(destination))
+        modifier.doIt()
+
+
+BACKENDS = {PyMelBackend.Name: PyMelBackend,
+            OpenMaya2Backend.Name: OpenMaya2Backend}
+
+
+def SetBackend(Name, **kw):
+    '''
+    Swaps the backend used by MetaData
+
+    :param Name: "om2" or "pymel"
+    :return: the new backend
+    '''
+    global _BACKEND
+    if Name not in BACKENDS:
+        raise ValueError("Unknown MetaData backend %s, expected one of %s" % (Name, sorted(BACKENDS)))
+    _BACKEND = BACKENDS[Name](**kw)
+    _logger.debug("MetaData backend : %r" % _BACKEND)
+    return _BACKEND
+
+
+def GetBackend():
+    return _BACKEND
+
+
+_BACKEND = None
+try:
+    SetBackend(os.environ.get("MAYA_METADATA_BACKEND", OpenMaya2Backend.Name))
+except (ImportError, ValueError), Err:
+    _logger.warning("Falling back to the pymel MetaData backend : %s" % Err)
+    SetBackend(PyMelBackend.Name)
@@ -0,0 +1,248 @@
+'''
+Codecs used to serialize the data stored in string attributes, the json_ properties on
+MetaData and the part data on tagged nodes.
+
+Every stored value starts with the header of the codec that wrote it, so a scene can hold a mix
+of formats and the default codec can be changed at any time.  JSON has an empty header so data
+written before the codecs existed, and data written by other tools, still decodes.
+
+* **json** compact separators, decoded with ujson when it's installed
+* **msgpack** msgpack packed and base64 encoded, only registered when msgpack is installed
+
+Register your own with `RegisterCodec`, headers should be of the form "@xx:"
+
+`DecodeCached` keeps the most recently decoded strings in a bounded LRU cache so unchanged
+values skip the decode.  The results are shared so they are returned frozen, use `Thaw` to get
+a mutable copy.  MetaData property reads are thawed, only the part data reads return them frozen.
+'''
+
+import json
+import base64
+import logging
+from collections import OrderedDict
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+_logger = logging.getLogger(__name__)
+_logger.setLevel(logging.INFO)
+
+
+class JsonCodec(object):
+    '''
+    Standard json, the default codec.  This is also the format of all the data written before
+    the codecs were added.
+    '''
+
+    Name = "json"
+    Header = ""
+
+    def Encode(self, data):
+        return json.dumps(data, separators=(",", ":"))
+
+    def Decode(self, data):
+        if ujson is not None:
+            try:
+                return ujson.loads(data, precise_float=True)
+            except ValueError:
+                pass
+        try:
+            return json.loads(data)
+        except ValueError:
+            # legacy data stored as python reprs with unicode prefixes
+            return json.loads(data.replace("u'", "'"))
+
+
+class MsgPackCodec(object):
+    '''
+    msgpack is much faster than json for large properties, base64 encoded as Maya string
+    attributes can't hold the raw bytes
+    '''
+
+    Name = "msgpack"
+    Header = "@mp:"
+
+    def Encode(self, data):
+        return self.Header + base64.b64encode(msgpack.packb(data, use_bin_type=True))
+
+    def Decode(self, data):
+        return msgpack.unpackb(base64.b64decode(data[len(self.Header):]), raw=False)
+
+
+class FrozenDict(dict):
+    '''
+    Read only dict returned by the decode cache, `copy` returns a mutable deep copy
+    '''
+
+    def _Frozen(self, *args, **kw):
+        raise TypeError("%s is read only, use mCodec.Thaw to get a mutable copy" % self.__class__.__name__)
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _Frozen
+
+    def copy(self):
+        return Thaw(self)
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+class FrozenList(list):
+    '''
+    Read only list returned by the decode cache
+    '''
+
+    def _Frozen(self, *args, **kw):
+        raise TypeError("%s is read only, use mCodec.Thaw to get a mutable copy" % self.__class__.__name__)
+
+    __setitem__ = __delitem__ = __setslice__ = __delslice__ = __iadd__ = __imul__ = _Frozen
+    append = extend = insert = pop = remove = reverse = sort = _Frozen
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+def Freeze(data):
+    '''
+    :return: data with all its dicts and lists converted to `FrozenDict` and `FrozenList`
+    '''
+    if isinstance(data, dict):
+        return FrozenDict((k, Freeze(v)) for k, v in data.iteritems())
+    elif isinstance(data, list):
+        return FrozenList(Freeze(v) for v in data)
+    return data
+
+
+def Thaw(data):
+    '''
+    :return: a mutable deep copy of frozen data
+    '''
+    if isinstance(data, dict):
+        return dict((k, Thaw(v)) for k, v in data.iteritems())
+    elif isinstance(data, list):
+        return [Thaw(v) for v in data]
+    return data
+
+
+class DecodeCache(object):
+    '''
+    LRU cache of decoded data keyed by the raw attribute string
+    '''
+
+    def __init__(self, MaxSize=2048):
+        self.MaxSize = MaxSize
+        self.Hits = 0
+        self.Misses = 0
+        self._cache = OrderedDict()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def Decode(self, data):
+        try:
+            value = self._cache.pop(data)
+            self.Hits += 1
+        except KeyError:
+            value = Freeze(Decode(data))
+            self.Misses += 1
+            if len(self._cache) >= self.MaxSize:
+                self._cache.popitem(last=False)
+        self._cache[data] = value
+        return value
+
+    def Clear(self):
+        self._cache.clear()
+        self.Hits = 0
+        self.Misses = 0
+
+    def Stats(self):
+        return {"Hits": self.Hits, "Misses": self.Misses,
+                "Size": len(self._cache), "MaxSize": self.MaxSize}
+
+
+CODECS = OrderedDict()
+_HEADERS = {}
+_DEFAULT_CODEC = None
+
+
+def RegisterCodec(codec):
+    '''
+    :param codec: instance with Name, Header, Encode and Decode.  Tagged headers must start with
+        "@" and end with ":"
+    '''
+    if codec.Header and not (codec.Header.startswith("@") and codec.Header.endswith(":")):
+        raise ValueError("Codec header %s must be of the form '@xx:'" % codec.Header)
+    CODECS[codec.Name] = codec
+    _HEADERS[codec.Header] = codec
+
+
+def SetDefaultCodec(Name):
+    '''
+    Sets the codec used by `Encode`
+
+    :param Name: `str` registered codec name
+    '''
+    global _DEFAULT_CODEC
+    if Name not in CODECS:
+        raise ValueError("Unknown codec %s, expected one of %s" % (Name, CODECS.keys()))
+    _DEFAULT_CODEC = CODECS[Name]
+
+
+def GetDefaultCodec():
+    return _DEFAULT_CODEC
+
+
+def GetCodec(data):
+    '''
+    :param data: `str` encoded data
+    :return: the codec that wrote the data
+    '''
+    if data.startswith("@"):
+        codec = _HEADERS.get(data[:data.find(":") + 1])
+        if codec is None:
+            raise ValueError("No codec registered for %s" % data[:10])
+        return codec
+    return _HEADERS[""]
+
+
+def Encode(data, Codec=None):
+    '''
+    :param Codec: `str` codec name, defaults to the default codec
+    :return: `str` the data with the codec header
+    '''
+    if Codec:
+        return CODECS[Codec].Encode(data)
+    return _DEFAULT_CODEC.Encode(data)
+
+
+def Decode(data):
+    '''
+    :param data: `str` data written by any of the registered codecs
+    '''
+    return GetCodec(data).Decode(data)
+
+
+def DecodeCached(data):
+    '''
+    Same as `Decode` but served from the LRU decode cache.  Dicts and lists are returned frozen.
+    '''
+    return _DECODE_CACHE.Decode(data)
+
+
+def GetDecodeCache():
+    return _DECODE_CACHE
+
+
+_DECODE_CACHE = DecodeCache()
+
+
+RegisterCodec(JsonCodec())
+if msgpack is not None:
+    RegisterCodec(MsgPackCodec())
+SetDefaultCodec(JsonCodec.Name)
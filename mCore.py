@@ -1,5 +1,16 @@
 __author__ = 'dmoulder'
 
+import json
+import inspect
+import logging
+import importlib
+import functools
+from timeit import default_timer
+from collections import Counter
+
+_logger = logging.getLogger(__name__)
+_logger.setLevel(logging.INFO)
+
 
 def itersubclasses(cls, _seen=None):
     """
@@ -40,3 +51,279 @@ def itersubclasses(cls, _seen=None):
             yield sub
             for sub in itersubclasses(sub, _seen):
                 yield sub
+
+
+class MetaProfiler(object):
+    '''
+    Records the call count, cumulative time and the number of maya.cmds, pymel.core and
+    OpenMaya calls made by each of the profiled MetaData APIs.  While running the APIs and the
+    Maya modules are wrapped in place, everything is restored by `Stop`.
+
+    The OpenMaya column counts the om2 backend methods and the methods of the maya.OpenMaya
+    classes metaData uses directly, see `ApiClasses`.
+
+    Times and Maya calls are inclusive, IE an API's numbers include the APIs it calls.  Only
+    the module level pymel.core functions are counted, not PyNode methods, and a pymel call
+    also counts the cmds calls it makes.
+
+    .. example:
+
+        with mCore.MetaProfiler() as profiler:
+            mAsset.MAssetUtils.UpdateAssets(assets, assetObj)
+        print profiler.Report()
+        profiler.Save("C:/temp/UpdateAssets.json")
+
+    :param Targets: [(module, "Class.method" or "function"),] the APIs to profile, modules
+                    are relative to this package.  Defaults to `MetaProfiler.DefaultTargets`
+    :param CountMayaCalls: `bool` count the Maya calls, the wrappers add a small overhead to
+                           every cmds call
+    '''
+
+    DefaultTargets = [("metaData", "IterMetaNodesForClass"),
+                      ("metaData", "IterMetaNodesForBaseClass"),
+                      ("metaData", "IterAllMetaNodes"),
+                      ("metaData", "MetaData.__init__"),
+                      ("metaData", "MetaData.m_CreateMany"),
+                      ("metaData", "MetaData.m_GetMetaData"),
+                      ("metaData", "MetaData.m_GetParts"),
+                      ("metaData", "MetaData.m_IterParts"),
+                      ("metaData", "MetaData.m_GetPartsWithData"),
+                      ("metaData", "MetaData.m_SetAsPart"),
+                      ("metaData", "MetaData.m_GetTagged"),
+                      ("metaData", "MetaData.m_ConnectMetaDataTo"),
+                      ("metaData", "MetaData.m_ConnectMetaDataToMany"),
+                      ("metaData", "MetaData.m_SetChild"),
+                      ("metaData", "MetaData.m_SetParent"),
+                      ("metaData", "MetaData.m_SetChildren"),
+                      ("metaData", "MetaData.m_Children"),
+                      ("metaData", "MetaData.m_Parents"),
+                      ("metaData", "MetaData.m_Traverse"),
+                      ("mAsset", "MAssetUtils.UpdateAssets")]
+
+    MayaCallTypes = ("cmds", "pymel", "OpenMaya")
+
+    # maya.OpenMaya classes whose methods are counted as OpenMaya calls, the constructors too
+    ApiClasses = ("MObject", "MObjectHandle", "MSelectionList", "MPlug", "MPlugArray", "MIntArray",
+                  "MFnDependencyNode", "MFnDagNode", "MFnAttribute", "MFnMessageAttribute",
+                  "MFnTypedAttribute", "MFnEnumAttribute", "MFnNumericAttribute",
+                  "MDGModifier", "MDagModifier", "MMessage", "MNodeMessage", "MDGMessage",
+                  "MSceneMessage", "MEventMessage")
+
+    _RUNNING = None
+
+    def __init__(self, Targets=None, CountMayaCalls=True):
+        self.Targets = list(Targets or self.DefaultTargets)
+        self.CountMayaCalls = CountMayaCalls
+        self._patches = []
+        self.Reset()
+
+    def __enter__(self):
+        self.Start()
+        return self
+
+    def __exit__(self, *args):
+        self.Stop()
+
+    def Reset(self):
+        '''
+        Clears the recorded stats
+        '''
+        # {api: {"Calls": int, "Time": float, "cmds": int, "pymel": int, "OpenMaya": int}}
+        self.Stats = {}
+        self.MayaCalls = Counter()
+        self._stack = []
+        self._depth = Counter()
+
+    def IsRunning(self):
+        return bool(self._patches)
+
+    def Start(self):
+        '''
+        Wraps the targets and the Maya modules, only one profiler can run at a time
+        '''
+        if self.IsRunning():
+            return
+        if MetaProfiler._RUNNING is not None:
+            raise StandardError("MetaProfiler is already running, Stop it first")
+        MetaProfiler._RUNNING = self
+        try:
+            for module, path in self.Targets:
+                self._PatchTarget(module, path)
+            if self.CountMayaCalls:
+                self._PatchMayaCalls()
+        except:
+            self.Stop()
+            raise
+
+    def Stop(self):
+        '''
+        Restores everything wrapped by `Start`, the stats are kept
+        '''
+        for owner, name, original, hadOwn in reversed(self._patches):
+            if hadOwn:
+                setattr(owner, name, original)
+            else:
+                delattr(owner, name)
+        self._patches = []
+        if MetaProfiler._RUNNING is self:
+            MetaProfiler._RUNNING = None
+
+    @staticmethod
+    def _ImportModule(name):
+        package = __name__.rpartition(".")[0]
+        return importlib.import_module("%s.%s" % (package, name) if package else name)
+
+    def _Patch(self, owner, name, value):
+        hadOwn = name in owner.__dict__
+        self._patches.append((owner, name, getattr(owner, name) if not hadOwn else owner.__dict__[name], hadOwn))
+        setattr(owner, name, value)
+
+    def _PatchTarget(self, module, path):
+        owner = self._ImportModule(module)
+        ownerPath, _, name = path.rpartition(".")
+        for part in filter(None, ownerPath.split(".")):
+            owner = getattr(owner, part)
+        if name not in owner.__dict__:
+            _logger.warning("MetaProfiler can't find %s.%s" % (module, path))
+            return
+        raw = owner.__dict__[name]
+        if isinstance(raw, classmethod):
+            wrapped = classmethod(self._WrapApi(path, raw.__func__))
+        elif isinstance(raw, staticmethod):
+            wrapped = staticmethod(self._WrapApi(path, raw.__func__))
+        else:
+            wrapped = self._WrapApi(path, raw)
+        self._Patch(owner, name, wrapped)
+
+    def _PatchMayaCalls(self):
+        import maya.cmds as cmds
+        import pymel.core as pCore
+        for name, func in inspect.getmembers(cmds, callable):
+            if not name.startswith("_"):
+                self._Patch(cmds, name, self._WrapMayaCall("cmds", func))
+        for name, func in inspect.getmembers(pCore, inspect.isfunction):
+            if not name.startswith("_"):
+                self._Patch(pCore, name, self._WrapMayaCall("pymel", func))
+
+        backend = self._ImportModule("mBackend").GetBackend()
+        if backend.Name == "om2":
+            for name, func in inspect.getmembers(type(backend), inspect.ismethod):
+                if not name.startswith("_"):
+                    self._Patch(type(backend), name, self._WrapMayaCall("OpenMaya", func.__func__))
+        self._PatchApiClasses()
+
+    def _PatchApiClasses(self):
+        import maya.OpenMaya as om
+        for className in self.ApiClasses:
+            apiClass = getattr(om, className, None)
+            if apiClass is None:
+                continue
+            # only the class's own methods, inherited ones are wrapped on their base class
+            for name, raw in apiClass.__dict__.items():
+                if name.startswith("_") and name != "__init__":
+                    continue
+                if isinstance(raw, staticmethod):
+                    wrapped = staticmethod(self._WrapMayaCall("OpenMaya", raw.__func__))
+                elif isinstance(raw, classmethod):
+                    wrapped = classmethod(self._WrapMayaCall("OpenMaya", raw.__func__))
+                elif inspect.isfunction(raw):
+                    wrapped = self._WrapMayaCall("OpenMaya", raw)
+                else:
+                    continue
+                try:
+                    self._Patch(apiClass, name, wrapped)
+                except TypeError:
+                    # extension types can't be patched
+                    self._patches.pop()
+                    break
+
+    def _Stat(self, name):
+        stat = self.Stats.get(name)
+        if stat is None:
+            stat = self.Stats[name] = dict(Calls=0, Time=0.0, **dict.fromkeys(self.MayaCallTypes, 0))
+        return stat
+
+    def _Enter(self, name):
+        self._stack.append(name)
+        self._depth[name] += 1
+        return default_timer()
+
+    def _Exit(self, name, start):
+        end = default_timer()
+        self._stack.pop()
+        self._depth[name] -= 1
+        # recursive calls are only timed by the outer call
+        if not self._depth[name]:
+            self._Stat(name)["Time"] += end - start
+
+    def _WrapApi(self, name, func):
+        profiler = self
+
+        if inspect.isgeneratorfunction(func):
+            # time the work done in the generator, not the caller's loop body
+            @functools.wraps(func)
+            def wrap(*args, **kw):
+                profiler._Stat(name)["Calls"] += 1
+                iterator = func(*args, **kw)
+                while True:
+                    start = profiler._Enter(name)
+                    try:
+                        value = next(iterator)
+                    except StopIteration:
+                        return
+                    finally:
+                        profiler._Exit(name, start)
+                    yield value
+        else:
+            @functools.wraps(func)
+            def wrap(*args, **kw):
+                profiler._Stat(name)["Calls"] += 1
+                start = profiler._Enter(name)
+                try:
+                    return func(*args, **kw)
+                finally:
+                    profiler._Exit(name, start)
+        return wrap
+
+    def _WrapMayaCall(self, callType, func):
+        profiler = self
+
+        def wrap(*args, **kw):
+            profiler.MayaCalls[callType] += 1
+            for name in set(profiler._stack):
+                profiler._Stat(name)[callType] += 1
+            return func(*args, **kw)
+        wrap.__name__ = getattr(func, "__name__", callType)
+        wrap.__doc__ = getattr(func, "__doc__", None)
+        return wrap
+
+    def ToDict(self):
+        '''
+        :return: {"Stats": {api: {"Calls", "Time", "cmds", "pymel", "OpenMaya"}}, "MayaCalls": {callType: int}}
+        '''
+        return {"Stats": dict((k, dict(v)) for k, v in self.Stats.iteritems()),
+                "MayaCalls": dict((t, self.MayaCalls[t]) for t in self.MayaCallTypes)}
+
+    def ToJson(self):
+        return json.dumps(self.ToDict(), indent=2, sort_keys=True)
+
+    def Save(self, FilePath):
+        '''
+        Writes `ToJson` to the FilePath
+        '''
+        with open(FilePath, "w") as f:
+            f.write(self.ToJson())
+
+    def Report(self, SortBy="Time"):
+        '''
+        :param SortBy: "Time", "Calls", "cmds", "pymel" or "OpenMaya"
+        :return: `str` table of the stats, most expensive first
+        '''
+        row = "%-40s %8s %12s %8s %8s %9s"
+        lines = [row % ("API", "Calls", "Time", "cmds", "pymel", "OpenMaya")]
+        for name, stat in sorted(self.Stats.iteritems(), key=lambda item: item[1][SortBy], reverse=True):
+            lines.append(row % (name, stat["Calls"], "%.6f" % stat["Time"],
+                                stat["cmds"], stat["pymel"], stat["OpenMaya"]))
+        lines.append(row % ("Total Maya calls", "", "", self.MayaCalls["cmds"],
+                            self.MayaCalls["pymel"], self.MayaCalls["OpenMaya"]))
+        return "\n".join(lines)
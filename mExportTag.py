@@ -82,7 +82,8 @@ def FindAllMExportTags(TagType=None, MayaNodes=None, AsMetaData=True, ValidOnly=
     Run through the entire scene to get any MExport Tagged Objects
 
     :param TagType: Only return Tags of the given type - accepts Tag as str, TAG_TYPE, OR MExportClass
-    :param MayaNodes: cmds.MayaNodes to scan for Tags, cmds for speed on large datasets
+    :param MayaNodes: cmds.MayaNodes to scan for Tags, cmds for speed on large datasets.  Only the
+        tags connected to the MayaNodes are returned
     :returns: All `MExportTag` instances in the scene
     :rtype: [`MExportTags`]
     """
@@ -101,6 +102,11 @@ def FindAllMExportTags(TagType=None, MayaNodes=None, AsMetaData=True, ValidOnly=
 
     if TagType:
         iterator = (n for n in eMetaData.IterFilterMetaNodesForClass(mData, TagType, asMetaData=False))
+    elif MayaNodes:
+        # only the tags connected to the MayaNodes
+        mData = list(mData)
+        iterator = (n for n, inheritance in zip(mData, eMetaData.BulkGetMetaInheritance(mData))
+                    if inheritance and "MExportTag" in inheritance)
     else:
         iterator = (n for n in eMetaData.IterMetaNodesForBaseClass("MExportTag", asMetaData=False))
 
@@ -430,14 +436,14 @@ def CopyExportTags(Tags):
     else:
         raise StandardError('You need to have 2 tags or Tagged nodes to Copy the Data between')
 
-    attrs = [attr for attr in mTagSource.m_GetMetaNodeAttributes() if
-             not attr.longName() in mTagSource._LockedAttributes]
-    for attr in attrs:
+    attrs = [attr for attr in mTagSource.m_GetMetaNodeAttributeNames() if
+             not attr in mTagSource._LockedAttributes]
+    destAttrs = set(mTagDest.m_GetMetaNodeAttributeNames())
+    for data in attrs:
         try:
-            data = attr.longName()
-            if mTagDest.MetaNode.hasAttr(data) and not data == 'TagNote':
+            if data in destAttrs and not data == 'TagNote':
                 current = pCore.PyNode('%s.%s' % (mTagDest.MetaNode, data))
-                current.set(attr.get())
+                current.set(pCore.PyNode('%s.%s' % (mTagSource.MetaNode, data)).get())
         except:
             _logger.info('failed to set attr : %s' % data)
 
@@ -545,7 +551,7 @@ class MExportTag(eMetaData.MetaData):
 
             if not MTag:
                 try:
-                    return super(cls.__class__, cls).__new__(cls)
+                    return super(MExportTag, cls).__new__(cls)
 
                 except HasExportTagError as err:
                     _logger.warning(err)
@@ -555,7 +561,7 @@ class MExportTag(eMetaData.MetaData):
                              (Node.name(), MTag[0].__class__.__name__))
                 raise HasExportTagError(Node.name(), MTag[0].__class__.__name__)
         else:
-            return super(cls.__class__, cls).__new__(cls)
+            return super(MExportTag, cls).__new__(cls)
 
 
     def __repr__(self):
@@ -26,69 +26,1313 @@ to describe subsystems within the MetaData.
 
 
 import json
+import copy
+import array
+import heapq
 import inspect
+import itertools
 import logging
+import contextlib
+import weakref
+import __main__
+from collections import OrderedDict, Counter
 
 import pymel.core as pCore
+import pymel.internal.factories as pFactories
 import maya.cmds as cmds
+import maya.OpenMaya as om
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 import mCore
+import mBackend
+import mCodec
+
+_logger = logging.getLogger(__name__)
+_logger.setLevel(logging.INFO)
+
+
+# Registry of the MetaData classes keyed by the class name.  Filled in by `MetaDataRegistry` as
+# each subclass is defined, so `GetMetaNodeClass` is a single dict lookup
+RIGISTERED_METACLASS = {}
+
+
+def registerMClassInheritanceMapping():
+    '''
+    Re-walks all the subclasses of `MetaData` and registers them.  Classes register themselves
+    when they are defined so this should only be needed to repair the registry by hand
+    '''
+    RIGISTERED_METACLASS['MetaClass'] = MetaData
+    registerMClass(MetaData)
+    for mclass in mCore.itersubclasses(MetaData):
+        registerMClass(mclass)
+
+
+def registerMClass(mclass):
+    '''
+    Adds a MetaData class to the registry, replacing any class already registered with the same name
+    '''
+    _logger.debug('registering MetaClass : %s' % mclass)
+    RIGISTERED_METACLASS[mclass.__name__] = mclass
+
+
+class MetaProperty(object):
+    '''
+    Class level declaration of a property on a MetaData subclass, replacing the
+    m_SetInitialProperty and m_Register*Attr calls made in __init__.  The declarations are
+    compiled once per class by `MetaDataRegistry` into cls.MetaProperties and the attribute
+    sets shared by all the instances of the class.
+
+    .. example:
+
+        class MCharacter(MetaData):
+            Origin = MetaProperty("British", Locked=True)
+            PhoneNumber = MetaProperty(Type=str, Private=True)
+            Secrets = MetaProperty([], Hidden=True)
+            FOV = MetaProperty(45.0, Export="FocalDistance", Animated=True)
+
+    :param Default: value written to a MetaNode that doesn't have the property yet
+    :param Type: python type the property must be, defaults to the type of the Default
+    :param Locked: `bool` lock the attribute on the MetaNode
+    :param Private: `bool` hidden in the AE and Channel box, implies Locked
+    :param Hidden: `bool` only stored on the instance, never written to the MetaNode
+    :param Export: `str` name to serialize the property as for export, see `m_SerializePropertyForExport`
+    :param Animated: `bool` the exported property is animated
+    '''
+
+    _Counter = itertools.count()
+
+    def __init__(self, Default=None, Type=None, Locked=False, Private=False, Hidden=False,
+                 Export=None, Animated=False):
+        self.Name = None
+        self.Default = Default
+        self.Type = Type if Type is not None or Default is None else type(Default)
+        self.Locked = Locked or Private
+        self.Private = Private
+        self.Hidden = Hidden
+        self.Export = Export
+        self.Animated = Animated
+        # declaration order, class dicts aren't ordered
+        self._Order = next(self._Counter)
+
+    def __repr__(self):
+        return "MetaProperty(%r, Type=%s)" % (self.Name, getattr(self.Type, "__name__", self.Type))
+
+    def Validate(self, value):
+        '''
+        :return: value, ints are promoted for float properties.  str properties take any
+                 basestring as Maya returns unicode, it's written to the MetaNode as is
+        :raises: TypeError if the value doesn't match the declared Type
+        '''
+        if self.Type not in (str, int, float, bool, list, dict) or value is None or isinstance(value, self.Type):
+            return value
+        if self.Type == float and isinstance(value, (int, long)) and not isinstance(value, bool):
+            return float(value)
+        if self.Type == str and isinstance(value, unicode):
+            return value
+        raise TypeError("MetaProperty %s expects a %s not %r" % (self.Name, self.Type.__name__, value))
+
+
+def _CompileMetaProperties(cls, attrs):
+    '''
+    Collects the `MetaProperty` declarations of the class and it's bases into cls.MetaProperties
+    and compiles the hidden, locked, private and export attribute sets shared by the instances
+    '''
+    properties = OrderedDict()
+    for base in reversed(cls.__mro__[1:]):
+        properties.update(base.__dict__.get("MetaProperties", {}))
+    declared = sorted(((k, v) for k, v in attrs.iteritems() if isinstance(v, MetaProperty)),
+                      key=lambda item: item[1]._Order)
+    for name, prop in declared:
+        prop.Name = name
+        # the instance reads and writes go through the MetaNode, not the declaration
+        delattr(cls, name)
+        properties.pop(name, None)
+        properties[name] = prop
+    cls.MetaProperties = properties
+
+    values = properties.values()
+    cls._ClassHiddenAttributes = frozenset(getattr(cls, "_BASE_HIDDEN_ATTRIBUTES", ())) | \
+        frozenset(p.Name for p in values if p.Hidden)
+    cls._ClassLockedAttributes = frozenset(getattr(cls, "_BASE_LOCKED_ATTRIBUTES", ())) | \
+        frozenset(p.Name for p in values if p.Locked and not p.Hidden)
+    cls._ClassPrivateAttributes = frozenset(p.Name for p in values if p.Private and not p.Hidden)
+    cls._ClassExportAttributes = frozenset((p.Name, p.Export, p.Animated) for p in values
+                                           if p.Export and not p.Hidden)
+
+
+class _MetaDataType(type):
+    '''
+    Base of the `MetaDataRegistry` metaclass that keeps the `__new__` contract MetaData had
+    before it had a metaclass.  Subclasses that override __new__ with
+
+        return super(cls.__class__, cls).__new__(cls)
+
+    resolve the call here, as cls.__class__ is now the metaclass rather than type, and get a
+    new instance of cls as they did from object.__new__
+    '''
+
+    def __new__(mcs, *args, **kw):
+        if isinstance(mcs, _MetaDataType):
+            # called with a MetaData class, IE to make an instance of it
+            return object.__new__(mcs)
+        return super(_MetaDataType, mcs).__new__(mcs, *args, **kw)
+
+
+class MetaDataRegistry(_MetaDataType):
+    '''
+    Metaclass of `MetaData`.  Registers every MetaData class by name as soon as it's defined,
+    this also means a reload() of a module re-registers it's classes without walking the
+    whole subclass tree.  The `MetaProperty` declarations of the class are compiled here.
+    '''
+
+    def __init__(cls, name, bases, attrs):
+        super(MetaDataRegistry, cls).__init__(name, bases, attrs)
+        _CompileMetaProperties(cls, attrs)
+        # the metaInheritance written to the class's metaNodes
+        cls._MetaInheritance = [c.__name__ for c in reversed(cls.__mro__) if c != object]
+        registerMClass(cls)
+
+    def __call__(cls, *args, **kw):
+        '''
+        When the `MetaDataIdentityMap` is enabled MetaData(metaNode) returns the live instance
+        for that metaNode, skipping __new__ and __init__ altogether
+        '''
+        if not (_IDENTITY_MAP.Enabled and len(args) == 1 and not kw):
+            return super(MetaDataRegistry, cls).__call__(*args, **kw)
+
+        key = _IDENTITY_MAP.GetKey(args[0])
+        if key:
+            instance = _IDENTITY_MAP.Get(key)
+            if isinstance(instance, cls):
+                return instance
+
+        instance = super(MetaDataRegistry, cls).__call__(*args)
+        if key and isinstance(instance, MetaData) and instance.m_Exists():
+            _IDENTITY_MAP.Add(key, instance)
+        return instance
+
+
+ANIMATED_EXPORT_PLUGS = ["matrix", "float3", "float", "double3", "double", "long"]
+META_NODES = ['network']
+ROOT_IGNORE_PLUGS = ['caching', 'isHistoricallyInteresting', 'binMembership', 'nodeState']
+META_TRANSFORM_IGNORE_PLUGS = ['publishedNodeInfo']
+
+META_NODE_IGNORE_PLUGS = {'metaNode': ROOT_IGNORE_PLUGS,
+                          'network': ROOT_IGNORE_PLUGS,
+                          'EMetaTransform': ROOT_IGNORE_PLUGS + META_TRANSFORM_IGNORE_PLUGS}
+
+
+# Maya attribute types that map straight to a python type, see `MetaData.m_AttributeTypeToPythonType`
+MAYA_ATTR_PYTHON_TYPES = {"string": str,
+                          "enum": pCore.util.Enum,
+                          "bool": bool,
+                          "double": float,
+                          "long": int}
+
+# The Maya attribute type added for a python type, see `MetaData.__AddStandardAttr`
+PY_TYPE_MAYA_ATTRS = {str: "string",
+                      unicode: "string",
+                      bool: "bool",
+                      float: "double",
+                      int: "long",
+                      long: "long"}
+
+
+def _DecodeJsonString(data, Frozen=False):
+    '''
+    Decodes the string stored on a json_ attribute
+
+    :param data: `str` raw attribute value
+    :param Frozen: `bool` return the shared frozen value from the decode cache rather than a
+                   mutable copy, only for internal reads that don't hand the value out
+    :return: decoded data or "" if it can't be decoded
+    '''
+    try:
+        if Frozen:
+            return mCodec.DecodeCached(data)
+        return mCodec.Thaw(mCodec.DecodeCached(data))
+    except:
+        return ""
+
+
+def _GetDependNode(node):
+    '''
+    :param node: `str` or `PyNode`
+    :return: `MObject` of the node or None if it doesn't exist
+    '''
+    selection = om.MSelectionList()
+    try:
+        selection.add(str(node))
+    except RuntimeError:
+        return None
+    obj = om.MObject()
+    selection.getDependNode(0, obj)
+    return obj
+
+
+def _MetaLinkHashes(node, DownStream=True):
+    '''
+    The metaNodes linked to a metaNode, read straight off the metaLinks plug
+
+    :param node: `MObject` of the metaNode
+    :param DownStream: `bool` children if True else parents
+    :return: set of the linked metaNodes `MetaNodeIndex._HashNode`
+    '''
+    fnNode = om.MFnDependencyNode(node)
+    if not fnNode.hasAttribute("metaLinks"):
+        return set()
+    plug = fnNode.findPlug("metaLinks")
+    plugs = [plug] + [plug.connectionByPhysicalIndex(i) for i in range(plug.numConnectedElements())]
+    res = set()
+    connected = om.MPlugArray()
+    for p in plugs:
+        p.connectedTo(connected, not DownStream, DownStream)
+        for c in range(connected.length()):
+            other = connected[c].node()
+            if om.MFnDependencyNode(other).typeName() in META_NODES:
+                res.add(MetaNodeIndex._HashNode(other))
+    return res
+
+
+def _ReadMetaClassData(node):
+    '''
+    Reads the metaClass and metaInheritance of a node straight from the API
+
+    :param node: `MObject`
+    :return: (metaClass, (inheritance,)), metaClass is None if the node isn't a metaNode
+    '''
+    fnNode = om.MFnDependencyNode(node)
+    if not fnNode.hasAttribute("metaClass"):
+        return None, ()
+    metaClass = str(fnNode.findPlug("metaClass").asString())
+    if fnNode.hasAttribute("metaInheritance"):
+        try:
+            inheritance = tuple(str(i) for i in mCodec.DecodeCached(fnNode.findPlug("metaInheritance").asString()))
+        except (ValueError, TypeError):
+            inheritance = ()
+    else:
+        # This is for MetaData that doesn't have the metaInheritance attr and we split the name
+        inheritance = tuple(metaClass.split("_"))
+    return metaClass, inheritance
+
+
+def _BulkReadMetaClassData(Nodes):
+    res = []
+    for n in Nodes:
+        obj = _GetDependNode(n)
+        if obj is None:
+            res.append((None, ()))
+        else:
+            res.append(_ReadMetaClassData(obj))
+    return res
+
+
+def BulkGetMetaClass(Nodes):
+    '''
+    Reads the metaClass of all the given nodes in one pass through the API rather than
+    a getAttr round trip per node.
+
+    :param Nodes: [str,] or [PyNode,]
+    :return: [str,] in the same order as Nodes, None where the node isn't a metaNode
+    '''
+    return [metaClass for metaClass, _ in _BulkReadMetaClassData(Nodes)]
+
+
+def BulkGetMetaInheritance(Nodes):
+    '''
+    Reads the metaInheritance of all the given nodes in one pass.  MetaNodes without the
+    metaInheritance attr return the metaClass split by "_"
+
+    :param Nodes: [str,] or [PyNode,]
+    :return: [(str,),] in the same order as Nodes, None where the node isn't a metaNode
+    '''
+    return [inheritance if metaClass is not None else None
+            for metaClass, inheritance in _BulkReadMetaClassData(Nodes)]
+
+
+def _ClassNamesToFind(ClassData):
+    '''
+    :param ClassData: str, MetaData class or a list of either
+    :return: set([str,])
+    '''
+
+    def toString(node):
+        if issubclass(type(node), basestring):
+            return node
+        elif issubclass(node, MetaData):
+            return node.__name__
+
+    if getattr(ClassData, "__iter__", None):
+        toFind = set(toString(n) for n in ClassData)
+    else:
+        toFind = set([toString(ClassData)])
+    toFind.discard(None)
+    toFind.discard("")
+    return toFind
+
+
+class MetaNodeIndex(object):
+    '''
+    Scene level index of metaNodes keyed by their metaClass and metaInheritance names.
+
+    The index is built when a file is opened, a new scene is made or it's first used through
+    `GetMetaNodeIndex`, and then kept up to date by node added, node removed and attribute
+    changed callbacks, so that the metaNode iterators in this module become dictionary lookups
+    rather than a scan of every network node in the scene.
+
+    Nodes are tracked by `MObjectHandle` so renames don't invalidate the index.  Newly added
+    nodes, or nodes whose metaClass/metaInheritance attributes change, are marked as pending
+    and only read back the next time the index is queried.  This keeps the callbacks cheap
+    during file reads, where the attributes aren't set when the node is added.
+
+    The MCallbackId objects are stored as a global in the Maya __main__ python scope so that a
+    reload() of this module removes the old callbacks before registering new ones.
+    '''
+
+    WatchedAttributes = ("metaClass", "metaInheritance")
+
+    def __init__(self):
+        self._handles = {}
+        self._classes = {}
+        self._byClass = {}
+        self._byInheritance = {}
+        self._pending = set()
+        self._nodeCallbacks = {}
+        self._sceneCallbacks = []
+        self._built = False
+        self._suspended = False
+        self._listeners = []
+
+        self.__remove()
+        self.__create()
+
+    def __repr__(self):
+        return "%s(built=%s, nodes=%s)" % (self.__class__.__name__, self._built, len(self._handles))
+
+    @staticmethod
+    def _HashNode(node):
+        return om.MObjectHandle(node).hashCode()
+
+    def AddListener(self, listener):
+        '''
+        Registers a `MetaNodeIndexListener` that gets told about the node removed and attribute
+        changed events on the tracked metaNodes.  Caches keyed by metaNode use this rather than
+        registering their own callbacks on every network node
+        '''
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def RemoveListener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _Notify(self, method, *args):
+        for listener in self._listeners:
+            try:
+                getattr(listener, method)(*args)
+            except StandardError, Err:
+                _logger.exception(Err)
+
+    def IsBuilt(self):
+        '''
+        :return: `bool` True when every network node in the scene is tracked by the callbacks
+        '''
+        return self._built
+
+    def EnsureBuilt(self):
+        '''
+        Builds the index if it isn't, but not while a file is being read as the file's nodes
+        are tracked when the read finishes
+        '''
+        if not self._built and not self._suspended:
+            self.Rebuild()
+
+    def IsTracked(self, node):
+        '''
+        :param node: `MObject`
+        :return: `bool` if the callbacks are watching the node
+        '''
+        return self._built and self._HashNode(node) in self._handles
+
+    def Clear(self):
+        '''
+        Drops all the tracked nodes.  The index is rebuilt the next time it's queried
+        '''
+        self._Notify("OnClear")
+        for callbackId in self._nodeCallbacks.itervalues():
+            try:
+                om.MMessage.removeCallback(callbackId)
+            except RuntimeError:
+                pass
+        self._handles = {}
+        self._classes = {}
+        self._byClass = {}
+        self._byInheritance = {}
+        self._pending = set()
+        self._nodeCallbacks = {}
+        self._built = False
+
+    def Rebuild(self):
+        '''
+        Re-reads every network node in the scene
+        '''
+        self.Clear()
+        nodes = cmds.ls(type=META_NODES)
+        if nodes:
+            selection = om.MSelectionList()
+            for n in nodes:
+                selection.add(n)
+            for i in range(selection.length()):
+                node = om.MObject()
+                selection.getDependNode(i, node)
+                self._Track(node)
+        self._built = True
+        self._Resolve()
+
+    def _Track(self, node):
+        key = self._HashNode(node)
+        self._handles[key] = om.MObjectHandle(node)
+        self._pending.add(key)
+        if key not in self._nodeCallbacks:
+            self._nodeCallbacks[key] = om.MNodeMessage.addAttributeChangedCallback(node, self._OnAttributeChanged)
+        return key
+
+    def _Untrack(self, key):
+        self._Unclassify(key)
+        self._handles.pop(key, None)
+        self._pending.discard(key)
+        callbackId = self._nodeCallbacks.pop(key, None)
+        if callbackId is not None:
+            try:
+                om.MMessage.removeCallback(callbackId)
+            except RuntimeError:
+                pass
+
+    def _Unclassify(self, key):
+        data = self._classes.pop(key, None)
+        if data:
+            metaClass, inheritance = data
+            self._byClass.get(metaClass, set()).discard(key)
+            for name in inheritance:
+                self._byInheritance.get(name, set()).discard(key)
+
+    def _Classify(self, key, metaClass, inheritance):
+        self._Unclassify(key)
+        if metaClass is None:
+            return
+        self._classes[key] = (metaClass, inheritance)
+        self._byClass.setdefault(metaClass, set()).add(key)
+        for name in inheritance:
+            self._byInheritance.setdefault(name, set()).add(key)
+
+    def _Resolve(self):
+        '''
+        Reads the metaClass and metaInheritance of all the pending nodes
+        '''
+        if not self._pending:
+            return
+        pending = self._pending
+        self._pending = set()
+        for key in pending:
+            handle = self._handles.get(key)
+            if handle is None:
+                continue
+            if not handle.isValid():
+                self._Untrack(key)
+                continue
+            metaClass, inheritance = _ReadMetaClassData(handle.object())
+            self._Classify(key, metaClass, inheritance)
+
+    def _Names(self, keys):
+        for key in list(keys):
+            handle = self._handles.get(key)
+            if handle is None:
+                continue
+            if not handle.isValid():
+                self._Untrack(key)
+                continue
+            yield om.MFnDependencyNode(handle.object()).name()
+
+    def _EnsureBuilt(self):
+        if not self._built:
+            self.Rebuild()
+        else:
+            self._Resolve()
+
+    def GetMetaNodes(self):
+        '''
+        :return: [str,] all the network nodes in the scene that have a metaClass
+        '''
+        self._EnsureBuilt()
+        return list(self._Names(self._classes))
+
+    def GetMetaNodesForClass(self, *classNames):
+        '''
+        :param classNames: `str` metaClass names
+        :return: [str,] metaNodes whose metaClass is one of the given names
+        '''
+        self._EnsureBuilt()
+        keys = set()
+        for name in classNames:
+            keys.update(self._byClass.get(name, ()))
+        return list(self._Names(keys))
+
+    def GetMetaNodesForBaseClass(self, className):
+        '''
+        :param className: `str` metaClass name that is in the metaInheritance of the metaNodes
+        :return: [str,]
+        '''
+        self._EnsureBuilt()
+        return list(self._Names(self._byInheritance.get(className, ())))
+
+    def _OnNodeAdded(self, node, *args):
+        if self._suspended or not self._built:
+            return
+        self._Track(node)
+
+    def _OnNodeRemoved(self, node, *args):
+        if self._suspended or not self._built:
+            return
+        self._Notify("OnNodeRemoved", node)
+        self._Untrack(self._HashNode(node))
+
+    def _OnAttributeChanged(self, msg, plug, otherPlug, *args):
+        if self._suspended:
+            return
+        self._Notify("OnAttributeChanged", msg, plug, otherPlug)
+        if not msg & (om.MNodeMessage.kAttributeSet | om.MNodeMessage.kAttributeAdded |
+                      om.MNodeMessage.kAttributeRemoved | om.MNodeMessage.kAttributeRenamed):
+            return
+        if om.MFnAttribute(plug.attribute()).name() in self.WatchedAttributes:
+            key = self._HashNode(plug.node())
+            if key in self._handles:
+                self._pending.add(key)
+
+    def _OnBeforeFileRead(self, *args):
+        self._suspended = True
+        self.Clear()
+
+    def _OnAfterFileRead(self, *args):
+        self._suspended = False
+        self.Rebuild()
+
+    def _OnAfterNew(self, *args):
+        self._suspended = False
+        self.Rebuild()
+
+    def _OnUndo(self, *args):
+        self._Notify("OnUndo")
+
+    def __remove(self):
+        '''
+        Removes any callbacks registered by a previous instance, IE before a reload() of this module
+        '''
+        previous = getattr(__main__, "_MetaNodeIndex", None)
+        if previous:
+            try:
+                previous.Clear()
+                for c in previous._sceneCallbacks:
+                    om.MMessage.removeCallback(c)
+            except StandardError, Err:
+                _logger.exception(Err)
+            __main__._MetaNodeIndex = None
+
+    def __create(self):
+        self._sceneCallbacks = [
+            om.MDGMessage.addNodeAddedCallback(self._OnNodeAdded, "network"),
+            om.MDGMessage.addNodeRemovedCallback(self._OnNodeRemoved, "network"),
+            om.MSceneMessage.addCallback(om.MSceneMessage.kBeforeOpen, self._OnBeforeFileRead),
+            om.MSceneMessage.addCallback(om.MSceneMessage.kAfterOpen, self._OnAfterFileRead),
+            om.MSceneMessage.addCallback(om.MSceneMessage.kAfterNew, self._OnAfterNew),
+            om.MEventMessage.addEventCallback("Undo", self._OnUndo),
+            om.MEventMessage.addEventCallback("Redo", self._OnUndo)]
+        __main__._MetaNodeIndex = self
+
+
+class MetaNodeIndexListener(object):
+    '''
+    Base class for caches that are kept valid by the `MetaNodeIndex` callbacks.  Override the
+    events you're interested in
+    '''
+
+    def OnClear(self):
+        pass
+
+    def OnNodeRemoved(self, node):
+        '''
+        :param node: `MObject` of the metaNode being deleted
+        '''
+        pass
+
+    def OnAttributeChanged(self, msg, plug, otherPlug):
+        '''
+        Same arguments as a `MNodeMessage.addAttributeChangedCallback` callback
+        '''
+        pass
+
+    def OnUndo(self):
+        '''
+        Called after an undo or redo
+        '''
+        pass
+
+
+class MetaDataIdentityMap(MetaNodeIndexListener):
+    '''
+    Optional identity map so that `MetaData(node)` returns the same live instance for the same
+    metaNode rather than resolving the node and re-reading every attribute again.  Instances
+    are keyed by the metaNode UUID and held with weak references, so the map never keeps an
+    instance alive on it's own.
+
+    Entries are dropped when the metaNode is deleted, when attributes are added, removed or
+    renamed on it or when the metaClass changes.  Plain attribute values don't need to drop
+    the instance as property reads always go to the metaNode.
+
+    The map only holds nodes that the `MetaNodeIndex` callbacks are watching, so it's a no-op
+    if the index is disabled.
+    '''
+
+    StructuralChanges = (om.MNodeMessage.kAttributeAdded |
+                         om.MNodeMessage.kAttributeRemoved |
+                         om.MNodeMessage.kAttributeRenamed)
+
+    def __init__(self):
+        self.Enabled = False
+        self._instances = weakref.WeakValueDictionary()
+
+    def __len__(self):
+        return len(self._instances)
+
+    @staticmethod
+    def _UUID(node):
+        return om.MFnDependencyNode(node).uuid().asString()
+
+    def GetKey(self, Node):
+        '''
+        :param Node: `str`, `PyNode` or `MetaData`
+        :return: `str` UUID of the metaNode or None if the Node isn't a tracked metaNode
+        '''
+        index = GetMetaNodeIndex()
+        if not index or not index.IsBuilt():
+            return None
+        if isinstance(Node, MetaData):
+            Node = Node.__dict__.get("MetaNode")
+            if not Node:
+                return None
+        uuid = cmds.ls(str(Node), type=META_NODES, uuid=True)
+        if uuid and len(uuid) == 1:
+            return uuid[0]
+        return None
+
+    def Get(self, key):
+        return self._instances.get(key)
+
+    def Add(self, key, instance):
+        self._instances[key] = instance
+
+    def Discard(self, key):
+        self._instances.pop(key, None)
+
+    def OnClear(self):
+        self._instances = weakref.WeakValueDictionary()
+
+    def OnNodeRemoved(self, node):
+        self.Discard(self._UUID(node))
+
+    def OnAttributeChanged(self, msg, plug, otherPlug):
+        if not self._instances:
+            return
+        if msg & self.StructuralChanges or \
+                (msg & om.MNodeMessage.kAttributeSet and om.MFnAttribute(plug.attribute()).name() == "metaClass"):
+            self.Discard(self._UUID(plug.node()))
+
+
+class MetaNodeSchemaCache(MetaNodeIndexListener):
+    '''
+    Per metaNode cache of the attribute schema, IE what python type each attribute decodes to
+    and if it's stored as json.  Built once per metaNode from the API and dropped when an
+    attribute is added, removed or renamed, so reading a property is a single typed getAttr
+    rather than building a PyNode attribute and querying it's type.
+
+    Only metaNodes watched by the `MetaNodeIndex` callbacks are cached.
+    '''
+
+    StructuralChanges = (om.MNodeMessage.kAttributeAdded |
+                         om.MNodeMessage.kAttributeRemoved |
+                         om.MNodeMessage.kAttributeRenamed)
+
+    def __init__(self):
+        self._schemas = {}
+
+    @staticmethod
+    def _AttributeTypeName(attr):
+        if attr.hasFn(om.MFn.kTypedAttribute):
+            if om.MFnTypedAttribute(attr).attrType() == om.MFnData.kString:
+                return "string"
+        elif attr.hasFn(om.MFn.kEnumAttribute):
+            return "enum"
+        elif attr.hasFn(om.MFn.kNumericAttribute):
+            return {om.MFnNumericData.kBoolean: "bool",
+                    om.MFnNumericData.kDouble: "double",
+                    om.MFnNumericData.kInt: "long"}.get(om.MFnNumericAttribute(attr).unitType())
+        return None
+
+    def _Build(self, node):
+        '''
+        :return: {attributeName: (pythonType, isJson, longName) or None}.  None is stored for
+                 attributes that have to be read through the PyMEL path
+        '''
+        fnNode = om.MFnDependencyNode(node)
+        schema = {}
+        for i in range(fnNode.attributeCount()):
+            attr = fnNode.attribute(i)
+            fnAttr = om.MFnAttribute(attr)
+            entry = None
+            if fnAttr.isDynamic():
+                typeName = self._AttributeTypeName(attr)
+                if typeName:
+                    entry = (MAYA_ATTR_PYTHON_TYPES[typeName], fnAttr.shortName().startswith("json_"), fnAttr.name())
+            schema[fnAttr.name()] = entry
+            schema[fnAttr.shortName()] = entry
+        return schema
+
+    def Get(self, MetaNode):
+        '''
+        :param MetaNode: `PyNode`
+        :return: `dict` schema of the metaNode or None if the metaNode isn't cached
+        '''
+        getMObject = getattr(MetaNode, "__apimobject__", None)
+        if not getMObject:
+            return None
+        index = GetMetaNodeIndex()
+        node = getMObject()
+        if not index or not index.IsTracked(node):
+            return None
+        key = MetaNodeIndex._HashNode(node)
+        schema = self._schemas.get(key)
+        if schema is None:
+            schema = self._schemas[key] = self._Build(node)
+        return schema
+
+    def OnClear(self):
+        self._schemas = {}
+
+    def OnNodeRemoved(self, node):
+        self._schemas.pop(MetaNodeIndex._HashNode(node), None)
+
+    def OnAttributeChanged(self, msg, plug, otherPlug):
+        if msg & self.StructuralChanges:
+            self._schemas.pop(MetaNodeIndex._HashNode(plug.node()), None)
+
+
+class MetaNodeAttributeNameCache(MetaNodeIndexListener):
+    '''
+    Per metaNode list of the long names of it's user defined attributes, what listAttr(ud=True)
+    returns less the META_NODE_IGNORE_PLUGS of the node type.  Read from the API and dropped
+    when an attribute is added, removed or renamed.
+
+    Only metaNodes watched by the `MetaNodeIndex` callbacks are cached.
+    '''
+
+    StructuralChanges = MetaNodeSchemaCache.StructuralChanges
+
+    def __init__(self):
+        self._names = {}
+
+    @staticmethod
+    def _Build(node):
+        fnNode = om.MFnDependencyNode(node)
+        ignorePlugs = META_NODE_IGNORE_PLUGS.get(fnNode.typeName(), ())
+        names = []
+        for i in range(fnNode.attributeCount()):
+            fnAttr = om.MFnAttribute(fnNode.attribute(i))
+            if fnAttr.isDynamic() and fnAttr.name() not in ignorePlugs:
+                names.append(fnAttr.name())
+        return tuple(names)
+
+    def Get(self, node):
+        '''
+        :param node: `MObject`
+        :return: (str,) the attribute long names
+        '''
+        index = GetMetaNodeIndex()
+        if not index or not index.IsTracked(node):
+            return self._Build(node)
+        key = MetaNodeIndex._HashNode(node)
+        names = self._names.get(key)
+        if names is None:
+            names = self._names[key] = self._Build(node)
+        return names
+
+    def OnClear(self):
+        self._names = {}
+
+    def OnNodeRemoved(self, node):
+        self._names.pop(MetaNodeIndex._HashNode(node), None)
+
+    def OnAttributeChanged(self, msg, plug, otherPlug):
+        if self._names and msg & self.StructuralChanges:
+            self._names.pop(MetaNodeIndex._HashNode(plug.node()), None)
+
+
+class MetaNodePartIndex(MetaNodeIndexListener):
+    '''
+    Per metaNode inverted index of the part data on it's tagged nodes, (key, normalized value)
+    to the set of part nodes, see `LabelKey`.  Built from one `m_IterParts` read the first time
+    a metaNode is searched with `SearchPartDataDict` so searches become set lookups rather than
+    a scan of every part.
+
+    Dropped by `m_SetAsPart`/`m_RemovePart`, when the metaTagged connections change and on
+    undo/redo.  Part attributes edited directly with setAttr aren't seen, call `Discard` after.
+    Only metaNodes watched by the `MetaNodeIndex` callbacks are cached.
+    '''
+
+    TagChanges = om.MNodeMessage.kConnectionMade | om.MNodeMessage.kConnectionBroken
+
+    def __init__(self):
+        self._indexes = {}
+
+    @staticmethod
+    def LabelKey(Value):
+        '''
+        :return: normalized hashable version of a part data value.  Strings are unicode and upper
+                 cased so they match case insensitively, lists and dicts are json
+        '''
+        if isinstance(Value, str):
+            Value = Value.decode("utf-8", "replace")
+        if isinstance(Value, unicode):
+            return Value.upper()
+        try:
+            hash(Value)
+            return Value
+        except TypeError:
+            return json.dumps(Value, sort_keys=True)
+
+    def _Build(self, Meta):
+        parts = []
+        labels = {}
+        for node, data in Meta.m_IterParts():
+            parts.append(node)
+            if isinstance(data, dict):
+                for key, value in data.iteritems():
+                    labels.setdefault((key, self.LabelKey(value)), set()).add(node)
+        return parts, labels
+
+    def Get(self, Meta):
+        '''
+        :param Meta: `MetaData`
+        :return: ([part PyNodes,], {(key, LabelKey(value)): set(part PyNodes)})
+        '''
+        node = Meta.MetaNode.__apimobject__()
+        index = GetMetaNodeIndex()
+        if not index or not index.IsTracked(node):
+            return self._Build(Meta)
+        indexes = self._indexes.setdefault(MetaNodeIndex._HashNode(node), {})
+        entry = indexes.get(Meta.PartAttributeName)
+        if entry is None:
+            entry = indexes[Meta.PartAttributeName] = self._Build(Meta)
+        return entry
+
+    def Discard(self, MetaNode):
+        '''
+        :param MetaNode: `PyNode` or `MObject`
+        '''
+        if isinstance(MetaNode, pCore.PyNode):
+            MetaNode = MetaNode.__apimobject__()
+        self._indexes.pop(MetaNodeIndex._HashNode(MetaNode), None)
+
+    def OnClear(self):
+        self._indexes = {}
+
+    def OnUndo(self):
+        self._indexes = {}
+
+    def OnNodeRemoved(self, node):
+        self.Discard(node)
+
+    def OnAttributeChanged(self, msg, plug, otherPlug):
+        if self._indexes and msg & self.TagChanges and \
+                om.MFnAttribute(plug.attribute()).name() == "metaTagged":
+            self.Discard(plug.node())
+
+
+class MGroupMembershipCache(MetaNodeIndexListener):
+    '''
+    Flattened membership of MGroups, IE the metaNodes reached by walking through the group and
+    any nested groups, used by the group transparent (ExcludeGroups) iterators.  Downstream
+    that's the non group children, upstream the non group parents.
+
+    Each entry remembers the groups it walked through and is dropped when a metaLinks connection
+    on any of them changes, or on undo/redo.  Only groups watched by the `MetaNodeIndex`
+    callbacks are cached.
+    '''
+
+    GroupClass = "MGroup"
+    LinkChanges = om.MNodeMessage.kConnectionMade | om.MNodeMessage.kConnectionBroken
+
+    def __init__(self):
+        # {(groupHash, DownStream): ([members,], set(groupHashes walked))}
+        self._members = {}
+
+    @classmethod
+    def IsGroup(cls, inheritance):
+        return bool(inheritance) and cls.GroupClass in inheritance
+
+    def _Flatten(self, Group, DownStream):
+        backend = mBackend.GetBackend()
+        groups = [Group]
+        walked = set(groups)
+        members = []
+        found = set()
+        while groups:
+            nextGroups = []
+            neighbours = backend.ListConnectionsBulk(["%s.metaLinks" % g for g in groups],
+                                                     source=not DownStream, destination=DownStream,
+                                                     nodeTypes=META_NODES)
+            nodes = list(itertools.chain.from_iterable(neighbours))
+            for n, inheritance in itertools.izip(nodes, BulkGetMetaInheritance(nodes)):
+                if self.IsGroup(inheritance):
+                    if n not in walked:
+                        walked.add(n)
+                        nextGroups.append(n)
+                elif n not in found:
+                    found.add(n)
+                    members.append(n)
+            groups = nextGroups
+        return members, walked
+
+    def Get(self, Group, DownStream=True):
+        '''
+        :param Group: `str` MGroup metaNode
+        :return: [str,] flattened members of the group
+        '''
+        node = _GetDependNode(Group)
+        index = GetMetaNodeIndex()
+        if node is None or not index or not index.IsTracked(node):
+            return self._Flatten(str(Group), DownStream)[0]
+        key = (MetaNodeIndex._HashNode(node), DownStream)
+        entry = self._members.get(key)
+        if entry is None:
+            members, walked = self._Flatten(str(Group), DownStream)
+            hashes = set(MetaNodeIndex._HashNode(_GetDependNode(g)) for g in walked)
+            entry = self._members[key] = (members, hashes)
+        return entry[0]
+
+    def Discard(self, node):
+        '''
+        Drops every entry that walked through the node
+
+        :param node: `MObject`
+        '''
+        key = MetaNodeIndex._HashNode(node)
+        for entryKey in [k for k, entry in self._members.iteritems() if key in entry[1]]:
+            del self._members[entryKey]
+
+    def OnClear(self):
+        self._members = {}
+
+    def OnUndo(self):
+        self._members = {}
+
+    def OnNodeRemoved(self, node):
+        self.Discard(node)
+
+    def OnAttributeChanged(self, msg, plug, otherPlug):
+        if not self._members:
+            return
+        if msg & self.LinkChanges and om.MFnAttribute(plug.attribute()).name() == "metaLinks":
+            self.Discard(plug.node())
+        elif msg & om.MNodeMessage.kAttributeSet and \
+                om.MFnAttribute(plug.attribute()).name() in MetaNodeIndex.WatchedAttributes:
+            # a node becoming, or no longer being, a group changes the membership around it
+            self._members = {}
+
+
+class _FreeIndices(object):
+    '''
+    Free logical indices of one message array.  Only the used indices are stored, free ones are
+    found lazily by a cursor that walks up past the used indices, so seeding is O(used) and
+    doesn't depend on the highest index in use.  Indices released below the cursor are kept on a
+    heap so they're reused first.
+    '''
+
+    def __init__(self, used):
+        self.Used = set(used)
+        self._cursor = 0
+        self._free = []
+
+    def Allocate(self):
+        while self._free:
+            index = heapq.heappop(self._free)
+            if index not in self.Used:
+                break
+        else:
+            while self._cursor in self.Used:
+                self._cursor += 1
+            index = self._cursor
+            self._cursor += 1
+        self.Used.add(index)
+        return index
+
+    def Add(self, index):
+        self.Used.add(index)
+
+    def Release(self, index):
+        if index in self.Used:
+            self.Used.discard(index)
+            if index < self._cursor:
+                heapq.heappush(self._free, index)
+
+
+class MetaArrayIndexAllocator(MetaNodeIndexListener):
+    '''
+    Hands out the free logical indices of the metaLinks and metaTagged message arrays.  Each
+    array is seeded from one read of it's connected elements, then kept up to date by the
+    connection callbacks so disconnected elements are reused.
+
+    Only metaNodes watched by the `MetaNodeIndex` callbacks are cached, other nodes are seeded
+    on every call.
+    '''
+
+    Arrays = ("metaLinks", "metaTagged")
+    LinkChanges = om.MNodeMessage.kConnectionMade | om.MNodeMessage.kConnectionBroken
+
+    def __init__(self):
+        self._arrays = {}
+
+    @staticmethod
+    def _Seed(node, attr):
+        fnNode = om.MFnDependencyNode(node)
+        if not fnNode.hasAttribute(attr):
+            return _FreeIndices([])
+        plug = fnNode.findPlug(attr)
+        return _FreeIndices(plug.connectionByPhysicalIndex(i).logicalIndex()
+                            for i in range(plug.numConnectedElements()))
+
+    def Allocate(self, plugName, count=1):
+        '''
+        :param plugName: `str` node.metaLinks or node.metaTagged
+        :param count: `int` number of indices to allocate
+        :return: [int,] free logical indices, they're reserved until the array is next reseeded
+        '''
+        nodeName, attr = str(plugName).split(".", 1)
+        node = _GetDependNode(nodeName)
+        if node is None:
+            raise StandardError("%s doesn't exist" % nodeName)
+        index = GetMetaNodeIndex()
+        if index and index.IsTracked(node):
+            key = (MetaNodeIndex._HashNode(node), attr)
+            indices = self._arrays.get(key)
+            if indices is None:
+                indices = self._arrays[key] = self._Seed(node, attr)
+        else:
+            indices = self._Seed(node, attr)
+        return [indices.Allocate() for i in range(count)]
+
+    def Release(self, plugName, indices):
+        '''
+        Hand back indices from `Allocate` after a failed connect.  Indices that did get
+        connected, ie. by a batch that failed part way, stay reserved.
+
+        :param plugName: `str` node.metaLinks or node.metaTagged
+        :param indices: [int,] indices to free
+        '''
+        nodeName, attr = str(plugName).split(".", 1)
+        node = _GetDependNode(nodeName)
+        if node is None:
+            return
+        freeIndices = self._arrays.get((MetaNodeIndex._HashNode(node), attr))
+        if freeIndices is None:
+            return
+        connected = set(self._Seed(node, attr).Used)
+        for i in indices:
+            if i not in connected:
+                freeIndices.Release(i)
+
+    def OnClear(self):
+        self._arrays = {}
+
+    def OnUndo(self):
+        self._arrays = {}
+
+    def OnNodeRemoved(self, node):
+        key = MetaNodeIndex._HashNode(node)
+        for attr in self.Arrays:
+            self._arrays.pop((key, attr), None)
+
+    def OnAttributeChanged(self, msg, plug, otherPlug):
+        if not self._arrays or not msg & self.LinkChanges or not plug.isElement():
+            return
+        attr = om.MFnAttribute(plug.attribute()).name()
+        indices = self._arrays.get((MetaNodeIndex._HashNode(plug.node()), attr))
+        if indices is None:
+            return
+        if msg & om.MNodeMessage.kConnectionMade:
+            indices.Add(plug.logicalIndex())
+        else:
+            indices.Release(plug.logicalIndex())
 
-_logger = logging.getLogger(__name__)
-_logger.setLevel(logging.INFO)
 
+class MetaNodeTagCache(MetaNodeIndexListener):
+    '''
+    Per metaNode set of the nodes connected to it's metaTagged array, held as MObject hashes so
+    tag checks are a set lookup.  Seeded from one read of the array and then kept up to date
+    by the metaTagged connection callbacks.
 
-def registerMClassInheritanceMapping():
-    global RIGISTERED_METACLASS
-    RIGISTERED_METACLASS = {}
-    RIGISTERED_METACLASS['MetaClass'] = MetaData
-    for mclass in mCore.itersubclasses(MetaData):
-        _logger.debug('registering MetaClass : %s' % mclass)
-        RIGISTERED_METACLASS[mclass.__name__] = mclass
+    Only metaNodes watched by the `MetaNodeIndex` callbacks are cached, other metaNodes are
+    read on every call.
+    '''
 
+    TagChanges = om.MNodeMessage.kConnectionMade | om.MNodeMessage.kConnectionBroken
 
-def registerMClass(mclass):
-    global RIGISTERED_METACLASS
-    RIGISTERED_METACLASS = {}
-    RIGISTERED_METACLASS['MetaClass'] = MetaData
-    RIGISTERED_METACLASS[mclass.__name__] = mclass
+    def __init__(self):
+        # {metaNodeHash: Counter({taggedHash: connections})}
+        self._tags = {}
 
+    @staticmethod
+    def _Seed(node):
+        tags = Counter()
+        fnNode = om.MFnDependencyNode(node)
+        if not fnNode.hasAttribute("metaTagged"):
+            return tags
+        plug = fnNode.findPlug("metaTagged")
+        connected = om.MPlugArray()
+        for i in range(plug.numConnectedElements()):
+            plug.connectionByPhysicalIndex(i).connectedTo(connected, False, True)
+            for c in range(connected.length()):
+                tags[MetaNodeIndex._HashNode(connected[c].node())] += 1
+        return tags
+
+    def Get(self, MetaNode):
+        '''
+        :param MetaNode: `str` or `PyNode`
+        :return: `Counter` of the tagged node hashes
+        '''
+        node = _GetDependNode(MetaNode)
+        if node is None:
+            return Counter()
+        index = GetMetaNodeIndex()
+        if not index or not index.IsTracked(node):
+            return self._Seed(node)
+        key = MetaNodeIndex._HashNode(node)
+        tags = self._tags.get(key)
+        if tags is None:
+            tags = self._tags[key] = self._Seed(node)
+        return tags
+
+    def AreTagged(self, MetaNode, Nodes):
+        '''
+        :return: [bool,] for each of the Nodes, is it tagged by the MetaNode
+        '''
+        tags = self.Get(MetaNode)
+        res = []
+        for n in Nodes:
+            node = _GetDependNode(n)
+            res.append(node is not None and tags[MetaNodeIndex._HashNode(node)] > 0)
+        return res
 
-ANIMATED_EXPORT_PLUGS = ["matrix", "float3", "float", "double3", "double", "long"]
-META_NODES = ['network']
-ROOT_IGNORE_PLUGS = ['caching', 'isHistoricallyInteresting', 'binMembership', 'nodeState']
-META_TRANSFORM_IGNORE_PLUGS = ['publishedNodeInfo']
+    def OnClear(self):
+        self._tags = {}
 
-META_NODE_IGNORE_PLUGS = {'metaNode': ROOT_IGNORE_PLUGS,
-                          'network': ROOT_IGNORE_PLUGS,
-                          'EMetaTransform': ROOT_IGNORE_PLUGS + META_TRANSFORM_IGNORE_PLUGS}
+    def OnUndo(self):
+        self._tags = {}
 
+    def OnNodeRemoved(self, node):
+        self._tags.pop(MetaNodeIndex._HashNode(node), None)
 
-def IterFilterMetaNodesForClass(Nodes, ClassData, asMetaData=True):
-    toFind = ""
-    isList = False
+    def OnAttributeChanged(self, msg, plug, otherPlug):
+        if not self._tags or not msg & self.TagChanges:
+            return
+        if om.MFnAttribute(plug.attribute()).name() != "metaTagged":
+            return
+        tags = self._tags.get(MetaNodeIndex._HashNode(plug.node()))
+        if tags is None:
+            return
+        key = MetaNodeIndex._HashNode(otherPlug.node())
+        if msg & om.MNodeMessage.kConnectionMade:
+            tags[key] += 1
+        else:
+            tags[key] -= 1
+            if tags[key] <= 0:
+                del tags[key]
 
-    def toString(node):
-        if issubclass(type(node), basestring):
-            return node
-        elif issubclass(node, MetaData):
-            return node.__name__
 
-    def isNode(node):
-        if isList:
-            return pCore.cmds.getAttr("%s.%s" % (node, "metaClass")) in toFind
-        else:
-            return pCore.cmds.getAttr("%s.%s" % (node, "metaClass")) == toFind
+# The scene index used by the metaNode iterators below.  Set USE_META_NODE_INDEX to False
+# to fall back to scanning the scene on every call
+global _META_NODE_INDEX
+_META_NODE_INDEX = MetaNodeIndex()
+USE_META_NODE_INDEX = True
 
-    if getattr(ClassData, "__iter__", None):
-        toFind = [toString(n) for n in ClassData]
-        isList = True
-    else:
-        toFind = toString(ClassData)
+global _IDENTITY_MAP
+_IDENTITY_MAP = MetaDataIdentityMap()
+_META_NODE_INDEX.AddListener(_IDENTITY_MAP)
+
+global _SCHEMA_CACHE
+_SCHEMA_CACHE = MetaNodeSchemaCache()
+_META_NODE_INDEX.AddListener(_SCHEMA_CACHE)
+
+global _ATTRIBUTE_NAMES
+_ATTRIBUTE_NAMES = MetaNodeAttributeNameCache()
+_META_NODE_INDEX.AddListener(_ATTRIBUTE_NAMES)
+
+global _PART_INDEX
+_PART_INDEX = MetaNodePartIndex()
+_META_NODE_INDEX.AddListener(_PART_INDEX)
+
+global _GROUP_MEMBERS
+_GROUP_MEMBERS = MGroupMembershipCache()
+_META_NODE_INDEX.AddListener(_GROUP_MEMBERS)
+
+global _ARRAY_INDICES
+_ARRAY_INDICES = MetaArrayIndexAllocator()
+_META_NODE_INDEX.AddListener(_ARRAY_INDICES)
+
+global _TAG_CACHE
+_TAG_CACHE = MetaNodeTagCache()
+_META_NODE_INDEX.AddListener(_TAG_CACHE)
+
+
+def SetIdentityMapEnabled(Enabled=True):
+    '''
+    Turns on the `MetaDataIdentityMap` so that `MetaData(node)` returns the same instance for
+    the same metaNode while that instance is alive
+    '''
+    _IDENTITY_MAP.Enabled = bool(Enabled)
+    if not Enabled:
+        _IDENTITY_MAP.OnClear()
+    elif USE_META_NODE_INDEX and not _META_NODE_INDEX.IsBuilt():
+        _META_NODE_INDEX.Rebuild()
 
+
+def GetMetaNodeIndex():
+    '''
+    :return: `MetaNodeIndex` or None if the index is disabled
+    '''
+    if USE_META_NODE_INDEX:
+        _META_NODE_INDEX.EnsureBuilt()
+        return _META_NODE_INDEX
+    return None
+
+
+def IterFilterMetaNodesForClass(Nodes, ClassData, asMetaData=True):
+    """
+    Filters the given nodes for metaNodes of a particular metaClass.  The metaClass of all
+    the nodes is read in one bulk pass, see `BulkGetMetaClass`
+
+    :param Nodes: [str,] or [PyNode,]
+    :param ClassData: str or Class of type META_NODES or a list of either
+    :param asMetaData: bool
+    :return: [str,] or [MetaData,]
+    """
+    toFind = _ClassNamesToFind(ClassData)
     if toFind:
-        for m in Nodes:
-            if isNode(m):
+        Nodes = list(Nodes)
+        for m, metaClass in zip(Nodes, BulkGetMetaClass(Nodes)):
+            if metaClass in toFind:
                 if asMetaData:
                     yield MetaData(m)
                 else:
@@ -104,35 +1348,19 @@ def IterMetaNodesForClass(ClassData, asMetaData=True):
     :return: [str,] or [MetaData,]
     """
 
-    toFind = ""
-    isList = False
-
-    def toString(node):
-        if issubclass(type(node), basestring):
-            return node
-        elif issubclass(node, MetaData):
-            return node.__name__
-
-    def isNode(node):
-        if pCore.cmds.objExists("%s.%s" % (node, "metaClass")):
-            if isList:
-                return pCore.cmds.getAttr("%s.%s" % (node, "metaClass")) in toFind
-            else:
-                return pCore.cmds.getAttr("%s.%s" % (node, "metaClass")) == toFind
-
-    if getattr(ClassData, "__iter__", None):
-        toFind = [toString(n) for n in ClassData]
-        isList = True
-    else:
-        toFind = toString(ClassData)
-
+    toFind = _ClassNamesToFind(ClassData)
     if toFind:
-        for m in IterAllMetaNodes(asMetaData=False):
-            if isNode(m):
+        index = GetMetaNodeIndex()
+        if index:
+            for m in index.GetMetaNodesForClass(*toFind):
                 if asMetaData:
                     yield MetaData(m)
                 else:
                     yield m
+            return
+
+        for m in IterFilterMetaNodesForClass(pCore.cmds.ls(type=META_NODES), toFind, asMetaData=asMetaData):
+            yield m
 
 
 def IterMetaNodesForBaseClass(MetaNodeClass, asMetaData=True):
@@ -149,23 +1377,22 @@ def IterMetaNodesForBaseClass(MetaNodeClass, asMetaData=True):
     elif issubclass(MetaNodeClass, MetaData):
         toFind = MetaNodeClass.__name__
     if toFind:
-        for m in pCore.cmds.ls(type=META_NODES):
-            if pCore.objExists("%s.%s" % (m, "metaInheritance")):
-                if toFind in json.loads(pCore.cmds.getAttr("%s.%s" % (m, "metaInheritance"))):
-                    if asMetaData:
-                        yield MetaData(m)
-                    else:
-                        yield m
-            else:
-                # This is for MetaData that doesn't have the metaInheritance attr and we split the name
-                # by _ and returns [0]
-                if pCore.objExists("%s.%s" % (m, "metaClass")):
-                    klasses = pCore.cmds.getAttr("%s.%s" % (m, "metaClass")).split("_")
-                    if toFind in klasses:
-                        if asMetaData:
-                            yield MetaData(m)
-                        else:
-                            yield m
+        index = GetMetaNodeIndex()
+        if index:
+            for m in index.GetMetaNodesForBaseClass(toFind):
+                if asMetaData:
+                    yield MetaData(m)
+                else:
+                    yield m
+            return
+
+        nodes = pCore.cmds.ls(type=META_NODES)
+        for m, inheritance in zip(nodes, BulkGetMetaInheritance(nodes)):
+            if inheritance and toFind in inheritance:
+                if asMetaData:
+                    yield MetaData(m)
+                else:
+                    yield m
 
 
 def IterAllMetaNodes(asMetaData=True):
@@ -174,34 +1401,45 @@ def IterAllMetaNodes(asMetaData=True):
     :param asMetaData: bool
     :return: [str,] or [MetaData,]
     """
-    for m in pCore.cmds.ls(type="network"):
-        if pCore.cmds.objExists("%s.%s" % (m, "metaClass")):
+    index = GetMetaNodeIndex()
+    if index:
+        for m in index.GetMetaNodes():
+            if asMetaData:
+                yield MetaData(m)
+            else:
+                yield m
+        return
+
+    nodes = pCore.cmds.ls(type="network")
+    for m, metaClass in zip(nodes, BulkGetMetaClass(nodes)):
+        if metaClass is not None:
             if asMetaData:
                 yield MetaData(m)
             else:
                 yield m
 
 
+def BulkGetMetaNodeAttributeNames(Nodes):
+    '''
+    The user defined attribute names of many metaNodes in one pass, see
+    `MetaData.m_GetMetaNodeAttributeNames`
+
+    :param Nodes: [`str`, `PyNode` or `MetaData`,]
+    :return: [[str,],] for each of the Nodes, empty for nodes that don't exist
+    '''
+    res = []
+    for n in Nodes:
+        node = _GetDependNode(n.MetaNode if isinstance(n, MetaData) else n)
+        res.append(list(_ATTRIBUTE_NAMES.Get(node)) if node is not None else [])
+    return res
+
+
 def GetMetaNodeClass(MayaNode):
     '''
     :Returns: <<Class>> class MetaNode cls from the Maya MetaNode
     '''
-    global RIGISTERED_METACLASS
-    MetaNode = pCore.PyNode(MayaNode)
-    __metaKlass__ = str(MetaNode.metaClass.get())
-
-    if RIGISTERED_METACLASS:
-        _logger.debug("Using Cached mCore.itersubclasses set")
-        for s in RIGISTERED_METACLASS:
-            if RIGISTERED_METACLASS[s].__name__ == __metaKlass__:
-                _logger.debug("mCore.itersubclasses >> %s" % s)
-                return RIGISTERED_METACLASS[s]
-    else:
-        _logger.debug("Using non cached mCore.itersubclasses set")
-        for s in mCore.itersubclasses(MetaData):
-            if s.__name__ == __metaKlass__:
-                _logger.debug("mCore.itersubclasses >> %s" % s)
-                return s
+    __metaKlass__ = str(cmds.getAttr("%s.metaClass" % MayaNode))
+    return RIGISTERED_METACLASS.get(__metaKlass__)
 
 
 def IsValidMetaNode(node):
@@ -211,13 +1449,9 @@ def IsValidMetaNode(node):
     :param node: str or PyNode
     :return: bool
     '''
-    try:
-        if any([pCore.listConnections("%s.metaLinks" % node),
-                pCore.listConnections("%s.%s" % (node, "metaTagged"))]):
-            return True
-    except pCore.MayaAttributeError as e:
-        pass
-    return False
+    backend = mBackend.GetBackend()
+    return backend.HasConnections("%s.metaLinks" % node) or \
+        backend.HasConnections("%s.metaTagged" % node)
 
 
 def GetConnectedMetaNode(MayaNode):
@@ -228,38 +1462,708 @@ def GetConnectedMetaNode(MayaNode):
             return res[0]
 
 
-class MetaEnumValue(pCore.util.EnumValue):
-    '''
-    SubClass of pCore.util.EnumValue returned by Enum attributes on a MetaNode
-    Useful because it has no had coded link to the pCore.util.EnumValue as __enumtype
-    Also added a more generic __eq__ override so only key and index gets compared
-    '''
+@contextlib.contextmanager
+def _NewNodes():
+    '''
+    Collects the nodes created in the with block
+
+    :return: [MObjectHandle,]
+    '''
+    handles = []
+    callbackId = om.MDGMessage.addNodeAddedCallback(lambda node, *args: handles.append(om.MObjectHandle(node)),
+                                                    "dependNode")
+    try:
+        yield handles
+    finally:
+        om.MMessage.removeCallback(callbackId)
+
+
+def _DeleteNodes(handles):
+    '''
+    Deletes the nodes that still exist, children deleted with their parent are skipped
+
+    :param handles: [MObjectHandle,]
+    '''
+    names = []
+    for handle in handles:
+        if not handle.isValid():
+            continue
+        node = handle.object()
+        if node.hasFn(om.MFn.kDagNode):
+            names.append(om.MFnDagNode(node).fullPathName())
+        else:
+            names.append(om.MFnDependencyNode(node).name())
+    for name in names:
+        if cmds.objExists(name):
+            cmds.delete(name)
+
+
+@contextlib.contextmanager
+def _UndoChunk(ChunkName="MetaData"):
+    '''
+    Wraps the cmds run in the with block into a single undo step
+    '''
+    cmds.undoInfo(openChunk=True, chunkName=ChunkName)
+    try:
+        yield
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+
+class _DGBatch(object):
+    '''
+    Collects DG edits and commits them in one go.
+
+    Undoable batches are run with cmds and should be committed inside an `_UndoChunk` so
+    the batch is a single undo step.  Non undoable batches are pushed through a single
+    `MDGModifier`, which is faster but isn't put on the undo queue as API modifiers run from
+    script aren't registered with undo.  Use these for build and batch processes only.
+    '''
+
+    def __init__(self, Undoable=True):
+        self.Undoable = Undoable
+        self._setAttrs = []
+        self._connections = []
+
+    def __len__(self):
+        return len(self._setAttrs) + len(self._connections)
+
+    @staticmethod
+    def _GetPlug(plugName):
+        # elements that don't exist yet can't be selected so get them from the array plug
+        index = None
+        if plugName.endswith("]"):
+            plugName, index = plugName[:-1].rsplit("[", 1)
+        selection = om.MSelectionList()
+        selection.add(plugName)
+        plug = om.MPlug()
+        selection.getPlug(0, plug)
+        if index is not None:
+            return plug.elementByLogicalIndex(int(index))
+        return plug
+
+    def SetAttr(self, plugName, value, valueType, Locked=False):
+        '''
+        :param plugName: `str` node.attribute
+        :param value: value to set
+        :param valueType: `str`, `int`, `float` or `bool`
+        :param Locked: `bool` lock the attribute after setting it
+        '''
+        self._setAttrs.append((plugName, value, valueType, Locked))
+
+    def Connect(self, source, destination, nextAvailable=False):
+        '''
+        :param nextAvailable: `bool` destination is an array, connect to it's next free element
+        '''
+        self._connections.append((True, source, destination, nextAvailable))
+
+    def Disconnect(self, source, destination):
+        self._connections.append((False, source, destination, False))
+
+    @classmethod
+    def _NextAvailableElement(cls, arrayPlug, taken):
+        '''
+        :param taken: set of logical indices already used by this batch
+        '''
+        indices = om.MIntArray()
+        arrayPlug.getExistingArrayAttributeIndices(indices)
+        used = set(i for i in indices if arrayPlug.elementByLogicalIndex(i).isConnected()) | taken
+        index = 0
+        while index in used:
+            index += 1
+        taken.add(index)
+        return arrayPlug.elementByLogicalIndex(index)
+
+    def _CommitConnections(self, connections):
+        if self.Undoable:
+            for connect, source, destination, nextAvailable in connections:
+                if connect:
+                    cmds.connectAttr(source, destination, f=True, na=nextAvailable)
+                else:
+                    cmds.disconnectAttr(source, destination)
+            return
+
+        modifier = om.MDGModifier()
+        taken = {}
+        disconnected = set()
+        for connect, source, destination, nextAvailable in connections:
+            sourcePlug = self._GetPlug(source)
+            destinationPlug = self._GetPlug(destination)
+            if not connect:
+                modifier.disconnect(sourcePlug, destinationPlug)
+                disconnected.add(destination)
+                continue
+            if nextAvailable and destinationPlug.isArray():
+                destinationPlug = self._NextAvailableElement(destinationPlug,
+                                                             taken.setdefault(destination, set()))
+            elif destinationPlug.isDestination() and destination not in disconnected:
+                modifier.disconnect(destinationPlug.source(), destinationPlug)
+            modifier.connect(sourcePlug, destinationPlug)
+        modifier.doIt()
+
+    def Commit(self):
+        connections = self._connections
+        self._connections = []
+        if connections:
+            self._CommitConnections(connections)
+
+        setAttrs = self._setAttrs
+        self._setAttrs = []
+        if not setAttrs:
+            return
+
+        plugs = [self._GetPlug(plugName) for plugName, _, _, _ in setAttrs]
+        if self.Undoable:
+            for plug, (plugName, value, valueType, Locked) in zip(plugs, setAttrs):
+                if plug.isLocked():
+                    cmds.setAttr(plugName, l=False)
+                if valueType == str:
+                    cmds.setAttr(plugName, value, type="string")
+                else:
+                    cmds.setAttr(plugName, value)
+                if Locked:
+                    cmds.setAttr(plugName, l=True)
+        else:
+            modifier = om.MDGModifier()
+            for plug, (_, value, valueType, _) in zip(plugs, setAttrs):
+                plug.setLocked(False)
+                if valueType == str:
+                    modifier.newPlugValueString(plug, value)
+                elif valueType == bool:
+                    modifier.newPlugValueBool(plug, value)
+                elif valueType == int:
+                    modifier.newPlugValueInt(plug, value)
+                else:
+                    modifier.newPlugValueDouble(plug, value)
+            modifier.doIt()
+            for plug, (_, _, _, Locked) in zip(plugs, setAttrs):
+                if Locked:
+                    plug.setLocked(True)
+
+
+class _ModifierUndoItem(object):
+    '''
+    Puts a committed API modifier on Maya's undo queue through PyMEL's api undo, so the
+    modifier is undone and redone with the undo chunk it was committed in.  Plug locks aren't
+    modifier operations so they're reapplied on redo.
+    '''
+
+    def __init__(self, modifier, lockedPlugs=()):
+        self.Modifier = modifier
+        self.LockedPlugs = list(lockedPlugs)
+
+    def redoIt(self):
+        self.Modifier.doIt()
+        for plug in self.LockedPlugs:
+            plug.setLocked(True)
+
+    def undoIt(self):
+        self.Modifier.undoIt()
+
+    def Register(self):
+        pFactories.apiUndo.append(self)
+
+
+class _MetaNodeTemplate(object):
+    '''
+    The dynamic attribute layout and initial values of a MetaData class, compiled once from a
+    prototype metaNode and then stamped onto new nodes by `MetaData.m_CreateMany`.
+
+    Message, string, enum and single numeric attributes are rebuilt on the API, any other
+    attribute is added with the addAttr command Maya gives for the prototype attribute.  The
+    decoded values, the attribute sets and the hidden values the prototype's __init__ registered
+    are kept too so instances can be filled in without reading the new nodes.
+    '''
+
+    NumericTypes = (om.MFnNumericData.kBoolean, om.MFnNumericData.kByte, om.MFnNumericData.kChar,
+                    om.MFnNumericData.kShort, om.MFnNumericData.kInt, om.MFnNumericData.kFloat,
+                    om.MFnNumericData.kDouble)
+
+    AttributeSetNames = ("_HiddenAttributes", "_LockedAttributes", "_PrivateAttributes",
+                         "_SerializeForExportAttributes")
+
+    def __init__(self, Prototype):
+        '''
+        :param Prototype: `MetaData` instance made by the class constructor
+        '''
+        MetaNode = Prototype.MetaNode
+        node = _GetDependNode(MetaNode)
+        fnNode = om.MFnDependencyNode(node)
+        self.NodeType = fnNode.typeName()
+        self.IsDag = node.hasFn(om.MFn.kDagNode)
+        # [(addAttr command, API creator or None),]
+        self.Attributes = []
+        # [(longName, value, valueType, Locked),]
+        self.Values = []
+        # [(longName, decoded value),] as `MetaData._MetaNodeGetAttr` returns them
+        self.Properties = []
+        # the attribute sets __init__ registered on the prototype, {set name: frozenset}
+        self.AttributeSets = dict((name, frozenset(Prototype.__dict__[name]))
+                                  for name in self.AttributeSetNames)
+        # the python only values of the prototype's hidden attributes, {name: value}
+        self.HiddenValues = dict((name, Prototype.__dict__[name])
+                                 for name in Prototype._HiddenAttributes - MetaData._BASE_HIDDEN_ATTRIBUTES
+                                 if name in Prototype.__dict__)
+        for i in range(fnNode.attributeCount()):
+            attr = fnNode.attribute(i)
+            if fnNode.attributeClass(attr) != om.MFnDependencyNode.kLocalDynamicAttr:
+                continue
+            fnAttr = om.MFnAttribute(attr)
+            isChild = not fnAttr.parent().isNull()
+            creator = None if isChild else self._Creator(MetaNode, attr, fnAttr)
+            self.Attributes.append((fnAttr.getAddAttrCmd(True), creator))
+            if not isChild:
+                plug = om.MPlug(node, attr)
+                value = self._ReadValue(attr, plug)
+                if value is not None:
+                    self.Values.append((fnAttr.name(), value[0], value[1], plug.isLocked()))
+                    self.Properties.append((fnAttr.name(), self._DecodeValue(attr, fnAttr, value[0])))
+
+    @classmethod
+    def _Creator(cls, MetaNode, attr, fnAttr):
+        longName = fnAttr.name()
+        shortName = fnAttr.shortName()
+        flags = (fnAttr.isArray(), fnAttr.indexMatters(), fnAttr.disconnectBehavior(), fnAttr.isKeyable(),
+                 fnAttr.isHidden(), fnAttr.isStorable(), fnAttr.isReadable(), fnAttr.isWritable())
+
+        if attr.hasFn(om.MFn.kMessageAttribute):
+            def create():
+                return om.MFnMessageAttribute().create(longName, shortName)
+        elif attr.hasFn(om.MFn.kTypedAttribute) and \
+                om.MFnTypedAttribute(attr).attrType() == om.MFnData.kString:
+            def create():
+                return om.MFnTypedAttribute().create(longName, shortName, om.MFnData.kString)
+        elif attr.hasFn(om.MFn.kEnumAttribute):
+            fields = []
+            index = 0
+            for field in cmds.attributeQuery(longName, node=str(MetaNode), listEnum=True)[0].split(":"):
+                if "=" in field:
+                    field, index = field.rsplit("=", 1)
+                    index = int(index)
+                fields.append((field, index))
+                index += 1
+
+            def create():
+                fnEnum = om.MFnEnumAttribute()
+                obj = fnEnum.create(longName, shortName)
+                for field, index in fields:
+                    fnEnum.addField(field, index)
+                return obj
+        elif attr.hasFn(om.MFn.kNumericAttribute) and \
+                om.MFnNumericAttribute(attr).unitType() in cls.NumericTypes:
+            unitType = om.MFnNumericAttribute(attr).unitType()
+
+            def create():
+                return om.MFnNumericAttribute().create(longName, shortName, unitType)
+        else:
+            return None
+
+        def creator():
+            obj = create()
+            fn = om.MFnAttribute(obj)
+            fn.setArray(flags[0])
+            fn.setIndexMatters(flags[1])
+            fn.setDisconnectBehavior(flags[2])
+            fn.setKeyable(flags[3])
+            fn.setHidden(flags[4])
+            fn.setStorable(flags[5])
+            fn.setReadable(flags[6])
+            fn.setWritable(flags[7])
+            return obj
+        return creator
+
+    @classmethod
+    def _ReadValue(cls, attr, plug):
+        '''
+        :return: (value, valueType) for `_DGBatch.SetAttr` or None for attributes that aren't copied
+        '''
+        if plug.isArray():
+            return None
+        if attr.hasFn(om.MFn.kTypedAttribute) and \
+                om.MFnTypedAttribute(attr).attrType() == om.MFnData.kString:
+            return plug.asString(), str
+        elif attr.hasFn(om.MFn.kEnumAttribute):
+            return plug.asInt(), int
+        elif attr.hasFn(om.MFn.kNumericAttribute):
+            unitType = om.MFnNumericAttribute(attr).unitType()
+            if unitType == om.MFnNumericData.kBoolean:
+                return plug.asBool(), bool
+            elif unitType in (om.MFnNumericData.kFloat, om.MFnNumericData.kDouble):
+                return plug.asDouble(), float
+            elif unitType in cls.NumericTypes:
+                return plug.asInt(), int
+        return None
+
+    @staticmethod
+    def _DecodeValue(attr, fnAttr, value):
+        if fnAttr.shortName().startswith("json_"):
+            return _DecodeJsonString(value)
+        if attr.hasFn(om.MFn.kEnumAttribute):
+            return MetaEnumValue(fnAttr.name(), value, om.MFnEnumAttribute(attr).fieldName(value))
+        return value
+
+    def Create(self, Names, Undoable=True):
+        '''
+        Creates, renames and fills in all the nodes through one modifier, a `MDagModifier` for
+        dag node types.  The modifier is run once to create the nodes, as the addAttr commands
+        of attributes with no API creator need the final names, then for the attributes and
+        again for the values.
+
+        :param Names: [str,] names of the new metaNodes
+        :param Undoable: `bool` puts the modifier on the undo queue, see `_ModifierUndoItem`.
+                         Run it inside an `_UndoChunk` to make the create a single undo step
+        :return: [MObject,] the new nodes, Maya may have had to make their names unique
+        '''
+        modifier = om.MDagModifier() if self.IsDag else om.MDGModifier()
+        objs = []
+        for Name in Names:
+            obj = modifier.createNode(self.NodeType)
+            modifier.renameNode(obj, Name)
+            objs.append(obj)
+        modifier.doIt()
+
+        for obj in objs:
+            for cmd, creator in self.Attributes:
+                if creator:
+                    modifier.addAttribute(obj, creator())
+                else:
+                    modifier.commandToExecute('%s "%s";' % (cmd.rstrip().rstrip(";"),
+                                                            om.MFnDependencyNode(obj).name()))
+        modifier.doIt()
+
+        lockedPlugs = []
+        for obj in objs:
+            fnNode = om.MFnDependencyNode(obj)
+            for longName, value, valueType, Locked in self.Values:
+                plug = fnNode.findPlug(longName)
+                if valueType == str:
+                    modifier.newPlugValueString(plug, value)
+                elif valueType == bool:
+                    modifier.newPlugValueBool(plug, value)
+                elif valueType == int:
+                    modifier.newPlugValueInt(plug, value)
+                else:
+                    modifier.newPlugValueDouble(plug, value)
+                if Locked:
+                    lockedPlugs.append(plug)
+        modifier.doIt()
+        for plug in lockedPlugs:
+            plug.setLocked(True)
+
+        if Undoable:
+            _ModifierUndoItem(modifier, lockedPlugs).Register()
+        return objs
+
+
+# Templates compiled by `MetaData.m_CreateMany`, {MetaData class: _MetaNodeTemplate}
+_CREATE_TEMPLATES = {}
+
+
+class MetaEnumValue(pCore.util.EnumValue):
+    '''
+    SubClass of pCore.util.EnumValue returned by Enum attributes on a MetaNode
+    Useful because it has no had coded link to the pCore.util.EnumValue as __enumtype
+    Also added a more generic __eq__ override so only key and index gets compared
+    '''
+
+    def __init__(self, enumtype, index, key, doc=None):
+        """ Create an enumeration instance """
+        self.__enumtype = enumtype
+        self.__index = index
+        self.__key = key
+        self.__doc = doc
+        super(MetaEnumValue, self).__init__(enumtype, index, key, doc=None)
+
+    def __repr__(self):
+        if self.__doc:
+            return "MetaEnumValue({0!r:s}, {1!r:s}, {2!r:s}, {3!r:s}, {4!r:s})".format(
+                self.__enumtype,
+                self.__index,
+                self.__key,
+                self.__doc)
+        else:
+            return "MetaEnumValue({0!r:s}, {1!r:s}, {2!r:s})".format(self.__enumtype,
+                                                                     self.__index,
+                                                                     self.__key)
+
+    def __eq__(self, Obj):
+        if issubclass(type(Obj), pCore.util.EnumValue):
+            if self.index == Obj.index and str(self.key) == str(self.key):
+                return True
+        return False
+
+
+class PartTable(object):
+    '''
+    Columnar view of the parts of a metaNode, see `MetaData.m_GetPartTable`.  Holds the part
+    nodes and one column per part data key, parts that don't have the key hold `PartTable.Missing`.
+    When numpy is installed the columns are object arrays and filters are evaluated as masks.
+
+    >>> table = asset.m_GetPartTable()
+    >>> table.Where(Root=True)
+    [u'pCube1']
+    '''
+
+    Missing = type("PartTableMissing", (object,), {"__repr__": lambda self: "Missing"})()
+
+    def __init__(self, Nodes, Data):
+        self.Nodes = list(Nodes)
+        count = len(self.Nodes)
+        self.Columns = {}
+        for i, data in enumerate(Data):
+            if isinstance(data, dict):
+                for key, value in data.iteritems():
+                    self.Columns.setdefault(key, [self.Missing] * count)[i] = value
+        if numpy is not None:
+            self.Nodes = self._ObjectArray(self.Nodes)
+            for key in self.Columns:
+                self.Columns[key] = self._ObjectArray(self.Columns[key])
+
+    @staticmethod
+    def _ObjectArray(values):
+        # numpy.array would nest lists stored as part data so fill an empty array instead
+        array = numpy.empty(len(values), dtype=object)
+        array[:] = values
+        return array
+
+    def __len__(self):
+        return len(self.Nodes)
+
+    def Keys(self):
+        return self.Columns.keys()
+
+    def Column(self, key):
+        '''
+        :return: values of the part data key aligned with `Nodes`
+        '''
+        return self.Columns[key]
+
+    def Mask(self, **kw):
+        '''
+        :return: `bool` per part, True where all the kw key/values match the part data
+        '''
+        if numpy is not None:
+            mask = numpy.ones(len(self.Nodes), dtype=bool)
+            for key, value in kw.iteritems():
+                column = self.Columns.get(key)
+                if column is None:
+                    return numpy.zeros(len(self.Nodes), dtype=bool)
+                if isinstance(value, (list, tuple, dict)):
+                    mask &= numpy.fromiter((v == value for v in column), dtype=bool, count=len(column))
+                else:
+                    mask &= (column == value)
+            return mask
+        mask = [True] * len(self.Nodes)
+        for key, value in kw.iteritems():
+            column = self.Columns.get(key)
+            if column is None:
+                return [False] * len(self.Nodes)
+            mask = [m and v == value for m, v in itertools.izip(mask, column)]
+        return mask
+
+    def Where(self, **kw):
+        '''
+        :return: [part nodes,] whose part data matches all the kw key/values
+        '''
+        mask = self.Mask(**kw)
+        if numpy is not None:
+            return self.Nodes[mask].tolist()
+        return [n for n, m in itertools.izip(self.Nodes, mask) if m]
+
+
+def _ConnectedNodeName(node):
+    '''
+    :param node: `MObject`
+    :return: `str` the shortest unique name, the same as listConnections returns
+    '''
+    if node.hasFn(om.MFn.kDagNode):
+        return om.MFnDagNode(node).partialPathName()
+    return om.MFnDependencyNode(node).name()
+
+
+class MetaGraphSnapshot(object):
+    '''
+    Read only snapshot of the whole meta network, every metaNode, it's metaClass and
+    inheritance, the metaLinks parent/child edges and the metaTagged edges, read in one pass
+    through the API.  The edges are stored as integer indexed adjacency arrays (CSR) so
+    traversal queries run in python without going back to the DG.
+
+    The snapshot isn't updated when the scene changes, capture a new one after editing the network.
+
+    >>> graph = MetaGraphSnapshot.Capture()
+    >>> graph.Descendants("MetaData_Rig", MetaClass="MRigPart")
+    '''
+
+    def __init__(self):
+        self.Names = []
+        self.Classes = []
+        self.Inheritance = []
+        self.TaggedNames = []
+        self._indices = {}
+        self._taggedIndices = {}
+        self._taggedBy = []
+        self._childOffsets = array.array("i", [0])
+        self._children = array.array("i")
+        self._parentOffsets = array.array("i", [0])
+        self._parents = array.array("i")
+        self._taggedOffsets = array.array("i", [0])
+        self._tagged = array.array("i")
+
+    @classmethod
+    def Capture(cls):
+        '''
+        :return: `MetaGraphSnapshot` of the current scene
+        '''
+        graph = cls()
+        selection = om.MSelectionList()
+        for n in IterAllMetaNodes(asMetaData=False):
+            selection.add(n)
+        nodes = []
+        hashes = {}
+        for i in range(selection.length()):
+            node = om.MObject()
+            selection.getDependNode(i, node)
+            metaClass, inheritance = _ReadMetaClassData(node)
+            if metaClass is None:
+                continue
+            name = om.MFnDependencyNode(node).name()
+            hashes[MetaNodeIndex._HashNode(node)] = len(nodes)
+            graph._indices[name] = len(nodes)
+            nodes.append(node)
+            graph.Names.append(name)
+            graph.Classes.append(metaClass)
+            graph.Inheritance.append(inheritance)
+
+        parents = [[] for n in nodes]
+        children = [[] for n in nodes]
+        connected = om.MPlugArray()
+        for i, node in enumerate(nodes):
+            fnNode = om.MFnDependencyNode(node)
+            tagged = []
+            for attr, asDst, asSrc in (("metaLinks", True, False), ("metaTagged", False, True)):
+                if not fnNode.hasAttribute(attr):
+                    continue
+                plug = fnNode.findPlug(attr)
+                for e in range(plug.numConnectedElements()):
+                    plug.connectionByPhysicalIndex(e).connectedTo(connected, asDst, asSrc)
+                    for c in range(connected.length()):
+                        other = connected[c].node()
+                        if asDst:
+                            parent = hashes.get(MetaNodeIndex._HashNode(other))
+                            if parent is not None:
+                                parents[i].append(parent)
+                                children[parent].append(i)
+                        else:
+                            name = _ConnectedNodeName(other)
+                            if name not in graph._taggedIndices:
+                                graph._taggedIndices[name] = len(graph.TaggedNames)
+                                graph.TaggedNames.append(name)
+                                graph._taggedBy.append([])
+                            tagged.append(graph._taggedIndices[name])
+                            graph._taggedBy[graph._taggedIndices[name]].append(i)
+            graph._tagged.extend(tagged)
+            graph._taggedOffsets.append(len(graph._tagged))
+        for i in range(len(nodes)):
+            graph._parents.extend(parents[i])
+            graph._parentOffsets.append(len(graph._parents))
+            graph._children.extend(children[i])
+            graph._childOffsets.append(len(graph._children))
+        return graph
+
+    def __len__(self):
+        return len(self.Names)
+
+    def __contains__(self, Node):
+        return str(Node) in self._indices
+
+    def _Index(self, Node):
+        if isinstance(Node, MetaData):
+            Node = Node.MetaNode
+        try:
+            return self._indices[str(Node)]
+        except KeyError:
+            raise ValueError("%s isn't a metaNode in the snapshot" % Node)
+
+    def _Filter(self, indices, MetaClass):
+        if MetaClass:
+            toFind = _ClassNamesToFind(MetaClass)
+            indices = [i for i in indices if toFind.intersection(self.Inheritance[i])]
+        return [self.Names[i] for i in indices]
+
+    def _Walk(self, start, offsets, edges):
+        visited = set([start])
+        queue = [start]
+        res = []
+        for i in queue:
+            for n in edges[offsets[i]:offsets[i + 1]]:
+                if n not in visited:
+                    visited.add(n)
+                    queue.append(n)
+                    res.append(n)
+        return res
+
+    def GetMetaClass(self, Node):
+        return self.Classes[self._Index(Node)]
+
+    def Children(self, Node, MetaClass=None):
+        '''
+        :param MetaClass: `str`, MetaData class or a list of either, matched against the inheritance
+        :return: [str,] child metaNode names
+        '''
+        i = self._Index(Node)
+        return self._Filter(self._children[self._childOffsets[i]:self._childOffsets[i + 1]], MetaClass)
 
-    def __init__(self, enumtype, index, key, doc=None):
-        """ Create an enumeration instance """
-        self.__enumtype = enumtype
-        self.__index = index
-        self.__key = key
-        self.__doc = doc
-        super(MetaEnumValue, self).__init__(enumtype, index, key, doc=None)
+    def Parents(self, Node, MetaClass=None):
+        i = self._Index(Node)
+        return self._Filter(self._parents[self._parentOffsets[i]:self._parentOffsets[i + 1]], MetaClass)
 
-    def __repr__(self):
-        if self.__doc:
-            return "MetaEnumValue({0!r:s}, {1!r:s}, {2!r:s}, {3!r:s}, {4!r:s})".format(
-                self.__enumtype,
-                self.__index,
-                self.__key,
-                self.__doc)
-        else:
-            return "MetaEnumValue({0!r:s}, {1!r:s}, {2!r:s})".format(self.__enumtype,
-                                                                     self.__index,
-                                                                     self.__key)
+    def Siblings(self, Node, MetaClass=None):
+        '''
+        :return: [str,] the other children of this metaNode's parents
+        '''
+        i = self._Index(Node)
+        res = []
+        seen = set([i])
+        for p in self._parents[self._parentOffsets[i]:self._parentOffsets[i + 1]]:
+            for c in self._children[self._childOffsets[p]:self._childOffsets[p + 1]]:
+                if c not in seen:
+                    seen.add(c)
+                    res.append(c)
+        return self._Filter(res, MetaClass)
+
+    def Ancestors(self, Node, MetaClass=None):
+        '''
+        :return: [str,] every metaNode upstream, breadth first
+        '''
+        return self._Filter(self._Walk(self._Index(Node), self._parentOffsets, self._parents), MetaClass)
 
-    def __eq__(self, Obj):
-        if issubclass(type(Obj), pCore.util.EnumValue):
-            if self.index == Obj.index and str(self.key) == str(self.key):
-                return True
-        return False
+    def Descendants(self, Node, MetaClass=None):
+        '''
+        :return: [str,] every metaNode downstream, breadth first
+        '''
+        return self._Filter(self._Walk(self._Index(Node), self._childOffsets, self._children), MetaClass)
+
+    def Tagged(self, Node):
+        '''
+        :return: [str,] the nodes tagged by the metaNode
+        '''
+        i = self._Index(Node)
+        return [self.TaggedNames[t] for t in self._tagged[self._taggedOffsets[i]:self._taggedOffsets[i + 1]]]
+
+    def TaggedBy(self, Node, MetaClass=None):
+        '''
+        :return: [str,] the metaNodes that tag the Node
+        '''
+        t = self._taggedIndices.get(str(Node))
+        if t is None:
+            return []
+        return self._Filter(self._taggedBy[t], MetaClass)
+
+    def ForClass(self, MetaClass):
+        '''
+        :return: [str,] the metaNodes whose inheritance includes the MetaClass
+        '''
+        return self._Filter(range(len(self.Names)), MetaClass)
 
 
 class MetaDataDecorators:
@@ -328,59 +2232,42 @@ class MetaDataDecorators:
         Search for data in dict stored on a MetaNode as PartData
         :param *args: Pass (Key, Value) pairs as tuples or a single `dict`
         :keyword Absolute: `bool` returns joints with *all* of the args passed
+        :keyword Top: `int` when not Absolute only rank the Top best matching joints
         '''
 
         def SeachFunc(self, *args, **kw):
             kw.setdefault("Absolute", True)
+            kw.setdefault("Top", None)
             if args:
                 if isinstance(args[0], dict):
                     args = tuple(args[0].items())
 
-            def Compare(Key, Value, Data):
-                if not Data.has_key(Key): return False
-                if issubclass(type(Value), str) and issubclass(type(Data[Key]), str):
-                    if Value != None:
-                        return Data[Key].upper() == Value.upper()
-                    return Key.upper() == Data[Key].upper()
-                else:
-                    if Value != None:
-                        return Data[Key] == Value
-                    else:
-                        return Data[Key] == Key
+            parts, labels = _PART_INDEX.Get(self)
 
-            def CompareWrap(Data):
-                for Key, Value in args:
-                    if not Compare(Key, Value, Data):
-                        return False
-                return True
+            def Lookup(Key, Value):
+                if Value is None:
+                    Value = Key
+                return labels.get((Key, _PART_INDEX.LabelKey(Value)), set())
 
-            res = []
             if kw["Absolute"]:
-                for Joint, Data in self.m_GetParts():
-                    dataKey = CompareWrap(Data)
-                    if dataKey:
-                        res.append(Joint)
-                return list(set(res))
+                res = set(parts)
+                for Key, Value in args:
+                    res &= Lookup(Key, Value)
+                    if not res:
+                        break
+                return list(res)
             else:
-                for Joint, Data in self.m_GetParts():
-                    for Key, Value in args:
-                        dataKey = Compare(Key, Value, Data)
-                        if dataKey:
-                            res.append(Joint)
+                heat = Counter()
+                for Key, Value in args:
+                    heat.update(Lookup(Key, Value))
 
+                order = {}
+                for i, part in enumerate(parts):
+                    order.setdefault(part, i)
                 heatDict = {}
-                cache = []
-                for each in res:
-                    if each not in cache:
-                        cache.append(each)
-                        if heatDict.has_key(res.count(each)):
-                            heatDict[res.count(each)].append(each)
-                        else:
-                            heatDict[res.count(each)] = [each]
-                res = []
-                for keys in reversed(sorted(heatDict)):
-                    res.append(heatDict[keys])
-                return res
+                for each, count in heat.most_common(kw["Top"]):
+                    heatDict.setdefault(count, []).append(each)
+                return [sorted(heatDict[count], key=order.get) for count in sorted(heatDict, reverse=True)]
 
         return SeachFunc
 
@@ -399,9 +2286,39 @@ class MetaData(object):
     :keyword: METAVERSION, default = 1
     '''
 
+    __metaclass__ = MetaDataRegistry
+
     # This is the attribute that gets added to tagged/connected nodes
     MetaNodeMessageAttr = "MetaNode"
 
+    # When True instances made from an existing metaNode only record the metaNode.  Each
+    # attribute is then read and decoded the first time it's accessed, see __getattr__
+    LazyHydration = False
+
+    # Instance attributes that are never written to the MetaNode
+    _BASE_HIDDEN_ATTRIBUTES = frozenset(["__dict__",
+                                         "__doc__",
+                                         "__weakref__",
+                                         "__module__",
+                                         "nodeState",
+                                         "caching",
+                                         "_HiddenAttributes",
+                                         "_LockedAttributes",
+                                         "_PrivateAttributes",
+                                         "_SerializeForExportAttributes",
+                                         "_MetaNodeName",
+                                         "_eHealthObject",
+                                         "MetaNode",
+                                         "PartAttributeName",
+                                         "LazyHydration",
+                                         "_BatchBuffer",
+                                         "_STOPSET"])
+
+    _BASE_LOCKED_ATTRIBUTES = frozenset(["metaClass",
+                                         "metaVersion",
+                                         "SerializeForExport",
+                                         "metaInheritance"])
+
     def __new__(cls, *args, **kw):
         Node = None
         if args:
@@ -417,15 +2334,15 @@ class MetaData(object):
                         metaClass = GetMetaNodeClass(Node)
                         if metaClass:
                             _logger.debug("Found MetaNode Class >> %r" % metaClass)
-                            return super(cls.__class__, cls).__new__(metaClass)
+                            return super(MetaData, cls).__new__(metaClass)
                         else:
                             pass
                     except StandardError, Err:
                         _logger.exception(Err)
                         raise Err
             else:
-                return super(cls.__class__, cls).__new__(cls)
-        return super(cls.__class__, cls).__new__(cls)
+                return super(MetaData, cls).__new__(cls)
+        return super(MetaData, cls).__new__(cls)
 
     @MetaDataDecorators.DebugInheritance(_logger)
     def __init__(self, Node=None, **kw):
@@ -440,28 +2357,12 @@ class MetaData(object):
         # Capture the default if they haven't been over-ridden
         kw.setdefault('METAVERSION', 1.0)
         kw.setdefault('NAME', "")
-        self._HiddenAttributes = set(["__dict__",
-                                      "__doc__",
-                                      "__weakref__",
-                                      "__module__",
-                                      "nodeState",
-                                      "caching",
-                                      "_HiddenAttributes",
-                                      "_LockedAttributes",
-                                      "_PrivateAttributes",
-                                      "_SerializeForExportAttributes",
-                                      "_MetaNodeName",
-                                      "_eHealthObject",
-                                      "MetaNode",
-                                      "PartAttributeName",
-                                      "_STOPSET"])
-
-        self._LockedAttributes = set(["metaClass",
-                                      "metaVersion",
-                                      "SerializeForExport",
-                                      "metaInheritance"])
-        self._PrivateAttributes = set([])
-        self._SerializeForExportAttributes = set([])
+        # shared with the class until an instance registers it's own attributes
+        cls = type(self)
+        self._HiddenAttributes = cls._ClassHiddenAttributes
+        self._LockedAttributes = cls._ClassLockedAttributes
+        self._PrivateAttributes = cls._ClassPrivateAttributes
+        self._SerializeForExportAttributes = cls._ClassExportAttributes
         self._eHealthObject = None
         self._STOPSET = False
 
@@ -471,10 +2372,14 @@ class MetaData(object):
         self.MetaNode = None
         self._MetaNodeName = kw['NAME']
         self.PartAttributeName = self.__class__.__name__ + "_Part"
+        for prop in cls.MetaProperties.itervalues():
+            if prop.Hidden:
+                setattr(self, prop.Name, copy.deepcopy(prop.Default))
 
         # If a Node has been given.  This node may be a MetaNode of a Node that we
         # want to tag with metaData.  Determine they type of node and the either
         # read the data back or create a new MetaNode
+        created = False
         if Node:
             if isinstance(Node, MetaData):
                 Node = pCore.PyNode(Node.MetaNode)
@@ -493,22 +2398,23 @@ class MetaData(object):
                 _logger.debug("dagNode %s has the MetaNode message attribute" % Node.name())
                 metaNodeInputs = self.m_HasMetaData(Node)
                 if metaNodeInputs:
-                    self.__create__(Node, Name=kw["NAME"])
+                    created = self.__create__(Node, Name=kw["NAME"])
                     # raise StandardError("%s already has MetaNode" % Node.name())
                 else:
-                    self.__create__(Node, Name=kw["NAME"])
+                    created = self.__create__(Node, Name=kw["NAME"])
             else:
-                self.__create__(Node, Name=kw["NAME"])
+                created = self.__create__(Node, Name=kw["NAME"])
                 # else:
                 # raise StandardError("Expected MetaNode or a dagNode")
         else:
-            self.__create__(Name=kw["NAME"])
+            created = self.__create__(Name=kw["NAME"])
 
         self._STOPSET = False
 
         if self.__MetaNodeExists():
             if not any([self.MetaNode.isReferenced(), self.MetaNode.isLocked()]):
                 self.__fillInheritanceAttr()
+                self.__WriteMetaPropertyDefaults(created)
 
                 # sync the object data
                 # self.__MetaNodeUpdate()
@@ -559,11 +2465,20 @@ class MetaData(object):
         """
         Override the default implementation to include adding attributes to the MetaNode
         """
+        prop = type(self).MetaProperties.get(item)
+        if prop is not None:
+            value = prop.Validate(value)
         super(MetaData, self).__setattr__(item, value)
         if not callable(value):
             if self.__MetaNodeExists():
                 if self.__IsSerializable(item, value):
-                    self.__MetaNodeSetAttr(item, value)
+                    batch = self.__dict__.get("_BatchBuffer")
+                    if batch is not None:
+                        # collapse repeated writes, only the last value is written by m_Batch
+                        batch.pop(item, None)
+                        batch[item] = value
+                    else:
+                        self.__MetaNodeSetAttr(item, value)
             else:
                 _logger.debug("MetaNode not set on instance yet to add %s :: %s" % (item, value))
 
@@ -579,6 +2494,9 @@ class MetaData(object):
         ## return attributes which are not serialised to the MetaNode or static attrs
         elif attrName in object.__getattribute__(self, "_HiddenAttributes"):
             return attr_
+        elif attrName in (object.__getattribute__(self, "__dict__").get("_BatchBuffer") or ()):
+            ## properties waiting to be written by m_Batch
+            return attr_
         else:
             try:
                 object.__getattribute__(self, "MetaNode")
@@ -605,6 +2523,23 @@ class MetaData(object):
                 # _logger.exception(Err)
                 return attr_
 
+    def __getattr__(self, attrName):
+        '''
+        Only called when the attribute isn't found on the instance.  With `LazyHydration` the
+        metaNode attributes aren't read when the instance is made, so read and decode the
+        attribute from the MetaNode the first time it's asked for
+        '''
+        if not attrName.startswith("_") and type(self).LazyHydration:
+            MetaNode = object.__getattribute__(self, "__dict__").get("MetaNode")
+            if MetaNode and cmds.attributeQuery(attrName, node=str(MetaNode), exists=True):
+                _logger.debug("Lazy hydrating from MetaNode :: %s" % attrName)
+                value = self._MetaNodeGetAttr(attrName)
+                object.__setattr__(self, attrName, value)
+                if type(value) == unicode:
+                    return str(value)
+                return value
+        raise AttributeError("'%s' object has no attribute '%s'" % (type(self).__name__, attrName))
+
     def __delattr__(self, name):
         """
         Override the default implementation to include deleting attributes from the MetaNode
@@ -646,18 +2581,55 @@ class MetaData(object):
 
     def __fillInheritanceAttr(self):
         '''
-        fills the metaInheritance attribute on the metaNode
+        fills the metaInheritance attribute on the metaNode.  The inheritance is compiled once per
+        class by `MetaDataRegistry` and only written when the stored value is different, so
+        instancing an existing metaNode doesn't write to it
         :return:
         '''
         try:
-            i = []
-            for c in reversed(self.__class__.__mro__):
-                if c != object:
-                    i.append(c.__name__)
-            self.metaInheritance = i
+            inheritance = type(self)._MetaInheritance
+            if self.__StoredInheritance() != inheritance:
+                self.metaInheritance = list(inheritance)
         except:
             pass
 
+    def __StoredInheritance(self):
+        '''
+        :return: [str,] the metaInheritance on the MetaNode or None if it hasn't been written
+        '''
+        stored = self.__dict__.get("metaInheritance")
+        if stored is None:
+            plug = "%s.metaInheritance" % self.MetaNode
+            if not cmds.objExists(plug):
+                return None
+            stored = _DecodeJsonString(mBackend.GetBackend().GetAttr(plug, str), Frozen=True)
+        if not isinstance(stored, list):
+            return None
+        return list(stored)
+
+    def __WriteMetaPropertyDefaults(self, Created):
+        '''
+        Writes the Default of each declared `MetaProperty` the MetaNode doesn't have yet.  A new
+        MetaNode has none of them so it isn't queried
+        '''
+        properties = [p for p in type(self).MetaProperties.itervalues()
+                      if not p.Hidden and p.Default is not None]
+        if not properties:
+            return
+        existing = ()
+        if not Created:
+            existing = _SCHEMA_CACHE.Get(self.MetaNode)
+            if existing is None:
+                existing = cmds.listAttr(str(self.MetaNode), ud=True) or ()
+        with self.m_Batch():
+            for prop in properties:
+                if prop.Name not in existing:
+                    setattr(self, prop.Name, copy.deepcopy(prop.Default))
+
+    def __AddToAttrSet(self, setName, attr):
+        # the sets are shared with the class so are copied rather than edited in place
+        object.__setattr__(self, setName, frozenset(getattr(self, setName)) | frozenset([attr]))
+
     def __AddMetaNodeMessageAttr(self, Node, **kw):
         '''
         Adds the message attribute responsible for hooking MetaData to nodes
@@ -696,11 +2668,11 @@ class MetaData(object):
         IE MetaData("MyMetaNode")
         '''
         self.MetaNode = Node
-        MetaNodeAttrs = self.m_GetMetaNodeAttributes()
-        for attr in MetaNodeAttrs:
-            name = str(attr.plugAttr(longName=True))
-            value = self._MetaNodeGetAttr(attr.plugAttr(longName=True))
-            super(MetaData, self).__setattr__(name, value)
+        if type(self).LazyHydration:
+            return
+        for name in self.m_GetMetaNodeAttributeNames():
+            value = self._MetaNodeGetAttr(name)
+            super(MetaData, self).__setattr__(str(name), value)
 
     def __MetaNodeExists(self):
         '''
@@ -771,16 +2743,9 @@ class MetaData(object):
 
         if AttributeData["Locked"]:
             try:
-                # If it's the 1st time the attribute is created then this doesn't exists in the
-                # dict
-                AttributeData["PyNodeAttribute"].setLocked(True)
+                mBackend.GetBackend().SetLocked(AttributeData["PlugName"], True)
             except:
-                try:
-                    # Manually try to lock the 1st time created attrs
-                    attr = pCore.Attribute("%s.%s" % (self.MetaNode, attributeName))
-                    attr.setLocked(True)
-                except:
-                    pass
+                pass
 
     def _MetaNodeGetAttr(self, PropertyName):
         '''
@@ -792,16 +2757,24 @@ class MetaData(object):
 
         :returns: decoded attribute value
         '''
-        pnAttr = pCore.PyNode("%s.%s" % (object.__getattribute__(self, "MetaNode"), PropertyName))
+        MetaNode = object.__getattribute__(self, "MetaNode")
+        schema = _SCHEMA_CACHE.Get(MetaNode)
+        if schema is not None:
+            if PropertyName not in schema:
+                raise AttributeError("MetaNode %s has no attribute %s" % (MetaNode, PropertyName))
+            entry = schema[PropertyName]
+            if entry:
+                return self.__MetaNodeGetTypedAttr(MetaNode, *entry)
+        else:
+            prop = type(self).MetaProperties.get(PropertyName)
+            if prop is not None and prop.Type in (str, int, float, bool, list, dict):
+                return self.__MetaNodeGetTypedAttr(MetaNode, prop.Type, prop.Type in (list, dict), PropertyName)
+
+        pnAttr = pCore.PyNode("%s.%s" % (MetaNode, PropertyName))
         pnAttrType = self.m_AttributeTypeToPythonType(pnAttr)
         if str(pnAttr.shortName()).startswith("json_"):
             _logger.debug("Getting data from MetaNode %s as JSON)" % pnAttr.longName())
-            # strip unicode
-            try:
-                data = pnAttr.get().replace("u'", "'")
-                return json.loads(str(data))
-            except:
-                return ""
+            return _DecodeJsonString(pnAttr.get())
         if pnAttrType == bool:
             _logger.debug("Getting data from MetaNode %s as bool(int)" % pnAttr.longName())
             return bool(pnAttr.get())
@@ -815,6 +2788,82 @@ class MetaData(object):
             _logger.debug("Getting data from MetaNode %s" % pnAttr.longName())
             return pnAttr.get()
 
+    @contextlib.contextmanager
+    def m_Batch(self, Undoable=True):
+        '''
+        Buffers the property assignments made in the with block and writes them to the MetaNode
+        on exit.  Repeated writes to the same property are collapsed to the last value and all
+        the writes are applied as a single undo step.  Properties that already exist with a
+        matching type are written directly from the `MetaNodeSchemaCache` without the attribute
+        queries done by a standard assignment.  Nothing is written if the block raises.
+
+        .. example:
+
+            with meta.m_Batch():
+                meta.Foo = 1
+                meta.Bar = "Bar"
+
+        :param Undoable: `bool` False pushes the direct writes through a single MDGModifier
+                         which is faster but not undoable, see `_DGBatch`
+        '''
+        if self.__dict__.get("_BatchBuffer") is not None:
+            # nested batch, the outer batch does the writing
+            yield self
+            return
+
+        object.__setattr__(self, "_BatchBuffer", OrderedDict())
+        try:
+            yield self
+        except:
+            object.__setattr__(self, "_BatchBuffer", None)
+            raise
+        buffer = self.__dict__["_BatchBuffer"]
+        object.__setattr__(self, "_BatchBuffer", None)
+        self.__FlushBatch(buffer, Undoable)
+
+    def __FlushBatch(self, buffer, Undoable):
+        if not buffer or not self.__MetaNodeExists():
+            return
+
+        schema = _SCHEMA_CACHE.Get(self.MetaNode) or {}
+        batch = _DGBatch(Undoable)
+        remaining = []
+        for item, value in buffer.iteritems():
+            entry = schema.get(item)
+            if entry and item not in self._PrivateAttributes:
+                pyType, isJson, longName = entry
+                valueType = self.m_GetPyObjectType(value)
+                plugName = "%s.%s" % (self.MetaNode, longName)
+                Locked = item in self._LockedAttributes
+                if isJson and valueType is None:
+                    batch.SetAttr(plugName, mCodec.Encode(value), str, Locked)
+                    continue
+                elif not isJson and valueType == pyType and pyType in (str, int, float, bool):
+                    batch.SetAttr(plugName, value, pyType, Locked)
+                    continue
+            remaining.append((item, value))
+
+        with _UndoChunk("MetaData.m_Batch"):
+            batch.Commit()
+            for item, value in remaining:
+                self.__MetaNodeSetAttr(item, value)
+
+    def __MetaNodeGetTypedAttr(self, MetaNode, pyType, isJson, longName):
+        '''
+        Reads an attribute whose type is already known from the `MetaNodeSchemaCache`
+        '''
+        plug = "%s.%s" % (MetaNode, longName)
+        backend = mBackend.GetBackend()
+        if isJson:
+            return _DecodeJsonString(backend.GetAttr(plug, str))
+        if pyType == bool:
+            return bool(backend.GetAttr(plug, bool))
+        elif pyType == pCore.util.Enum:
+            return MetaEnumValue(longName,
+                                 backend.GetAttr(plug, int),
+                                 str(backend.GetEnumString(plug)))
+        return backend.GetAttr(plug, pyType)
+
     def __MetaNodeUpdate(self):
         '''
         Loop through all the attributes on the object updating the MetaData
@@ -841,7 +2890,8 @@ class MetaData(object):
         setLocked = attributeName in self._LockedAttributes
         setPrivate = attributeName in self._PrivateAttributes
 
-        DataDict = dict(PyNodeAttribute=None, PyNodeAttributeType=None,
+        DataDict = dict(PlugName="%s.%s" % (self.MetaNode, attributeName),
+                        PyNodeAttribute=None, PyNodeAttributeType=None,
                         Delete=False, Locked=setLocked, Private=setPrivate, AddMethod=None, Value=value,
                         StandardTypes=StandardMayaTypes,
                         ValueType=self.m_GetPyObjectType(value))
@@ -885,12 +2935,8 @@ class MetaData(object):
 
     def __AddEnumAttr(self, attributeName, **DataDict):
         valuesList = ":".join(["%s=%s" % (v.key, v.index) for v in DataDict["Value"].values()])
-        if DataDict["Private"]:
-            _logger.debug("setting property as as Private")
-            self.MetaNode.addAttr(attributeName, at="enum", en=valuesList, h=True)
-        else:
-            self.MetaNode.addAttr(attributeName, at="enum", en=valuesList)
-        DataDict["PyNodeAttribute"] = self.__GetMetaNodeAttribute(attributeName)
+        mBackend.GetBackend().AddAttr(str(self.MetaNode), attributeName, "enum",
+                                      hidden=DataDict["Private"], enumNames=valuesList)
 
     def __SetEnumAttr(self, **DataDict):
         '''
@@ -899,53 +2945,40 @@ class MetaData(object):
         if DataDict["ValueType"] in [pCore.util.EnumValue, MetaEnumValue]:
             if DataDict["Value"].key in DataDict["PyNodeAttribute"].getEnums().keys() and \
                             DataDict["Value"].index == DataDict["PyNodeAttribute"].getEnums()[DataDict["Value"].key]:
-                if DataDict["PyNodeAttribute"].isLocked():
-                    DataDict["PyNodeAttribute"].setLocked(False)
+                self.__UnlockPlug(DataDict["PlugName"])
             else:
                 raise TypeError("Attemped to set and Invalid Enum, please make sure EnumValues match attr.getEnums")
 
-            DataDict["PyNodeAttribute"].set(DataDict["Value"].index)
+            mBackend.GetBackend().SetAttr(DataDict["PlugName"], DataDict["Value"].index, int)
 
     def __AddJsonAttr(self, attributeName, **DataDict):
-        if DataDict["Private"]:
-            _logger.debug("setting property as as Private")
-            self.MetaNode.addAttr(attributeName, sn="json_" + attributeName, dt="string", h=True)
-        else:
-            self.MetaNode.addAttr(attributeName, sn="json_" + attributeName, dt="string")
-        DataDict["PyNodeAttribute"] = self.__GetMetaNodeAttribute(attributeName)
+        mBackend.GetBackend().AddAttr(str(self.MetaNode), attributeName, "string", shortName="json_" + attributeName,
+                                      hidden=DataDict["Private"])
         _logger.debug("Adding %s as json data" % attributeName)
         self.__SetJsonData(**DataDict)
-        # DataDict["PyNodeAttribute"].set(json.dumps(DataDict["Value"]))
         return DataDict
 
     def __SetJsonData(self, **DataDict):
-        if DataDict["PyNodeAttribute"].isLocked():
-            DataDict["PyNodeAttribute"].setLocked(False)
-        DataDict["PyNodeAttribute"].set(json.dumps(DataDict["Value"]))
+        self.__UnlockPlug(DataDict["PlugName"])
+        mBackend.GetBackend().SetAttr(DataDict["PlugName"], mCodec.Encode(DataDict["Value"]), str)
 
     def __AddStandardAttr(self, attributeName, **DataDict):
-        if DataDict["ValueType"] == str:
-            if DataDict["Private"]:
-                _logger.debug("setting property as as Private")
-                self.MetaNode.addAttr(attributeName, dt="string", h=True)
-            else:
-                self.MetaNode.addAttr(attributeName, dt="string", )
-        else:
-            if DataDict["Private"]:
-                _logger.debug("setting property as as Private")
-                self.MetaNode.addAttr(attributeName, at=DataDict["ValueType"], h=True)
-            else:
-                self.MetaNode.addAttr(attributeName, at=DataDict["ValueType"])
-
-        DataDict["PyNodeAttribute"] = self.__GetMetaNodeAttribute(attributeName)
+        mBackend.GetBackend().AddAttr(str(self.MetaNode), attributeName, PY_TYPE_MAYA_ATTRS[DataDict["ValueType"]],
+                                      hidden=DataDict["Private"])
         self.__SetStandardAttr(**DataDict)
         return DataDict
 
     def __SetStandardAttr(self, **DataDict):
         _logger.debug("__SetStandardAttr :: %s" % DataDict["Value"])
-        if DataDict["PyNodeAttribute"].isLocked():
-            DataDict["PyNodeAttribute"].setLocked(False)
-        DataDict["PyNodeAttribute"].set(DataDict["Value"])
+        self.__UnlockPlug(DataDict["PlugName"])
+        mBackend.GetBackend().SetAttr(DataDict["PlugName"], DataDict["Value"],
+                                      str if isinstance(DataDict["Value"], basestring) else DataDict["ValueType"])
+
+    @staticmethod
+    def __UnlockPlug(plugName):
+        backend = mBackend.GetBackend()
+        if backend.IsLocked(plugName):
+            backend.SetLocked(plugName, False)
 
     def __CapKwargs(self, **kw):
         '''
@@ -1067,7 +3100,8 @@ class MetaData(object):
                     self.m_RegisterLockedAttr(Name)
                 else:
                     if Name in self._LockedAttributes:
-                        self._LockedAttributes.remove(Name)
+                        object.__setattr__(self, "_LockedAttributes",
+                                           frozenset(self._LockedAttributes) - frozenset([Name]))
                     self.__GetMetaNodeAttribute(Name).setLocked(Bool)
 
     def m_SerializePropertyForExport(self, Name, ExportName, Animated):
@@ -1094,7 +3128,7 @@ class MetaData(object):
                     raise TypeError("Attribute : %s is not a supported export animated type" % Name)
 
         data = (Name, ExportName, Animated)
-        self._SerializeForExportAttributes.add(data)
+        self.__AddToAttrSet("_SerializeForExportAttributes", data)
 
     def m_GetSerializeForExportData(self):
         '''
@@ -1136,23 +3170,13 @@ class MetaData(object):
         :returns: `int`, `str`, `bool` etc or "string" of the Attribute.type() if it isn't compatible
                    python basetype
         '''
-        if pnAttr.type() == "string":
-            return str
-        elif pnAttr.type() == "enum":
-            return pCore.util.Enum
-        elif pnAttr.type() == "bool":
-            return bool
-        elif pnAttr.type() == "double":
-            return float
-        elif pnAttr.type() == "long":
-            return int
-        else:
-            return pnAttr.type()
+        attrType = pnAttr.type()
+        return MAYA_ATTR_PYTHON_TYPES.get(attrType, attrType)
 
     def m_RegisterPrivateAttr(self, attr):
         if isinstance(attr, basestring):
-            self._LockedAttributes.add(attr)
-            self._PrivateAttributes.add(attr)
+            self.__AddToAttrSet("_LockedAttributes", attr)
+            self.__AddToAttrSet("_PrivateAttributes", attr)
             _logger.debug("Added %s as Private" % attr)
         else:
             raise TypeError()
@@ -1165,13 +3189,13 @@ class MetaData(object):
         :param attr: string, name
         """
         if isinstance(attr, basestring):
-            self._HiddenAttributes.add(attr)
+            self.__AddToAttrSet("_HiddenAttributes", attr)
         else:
             raise TypeError()
 
     def m_RegisterLockedAttr(self, attr):
         if isinstance(attr, basestring):
-            self._LockedAttributes.add(attr)
+            self.__AddToAttrSet("_LockedAttributes", attr)
             if self.MetaNode:
                 if self.MetaNode.hasAttr(attr):
                     pCore.Attribute("%s.%s" % (self.MetaNode, attr)).setLocked(True)
@@ -1256,9 +3280,8 @@ class MetaData(object):
             if asPyNode:
                 return self.MetaNode.metaTagged.outputs(sh=True)
             else:
-                res = cmds.listConnections("%s.metaTagged" % self.MetaNode, s=0, d=1, sh=1)
-                if res is None: return []
-                return res
+                return mBackend.GetBackend().ListConnections("%s.metaTagged" % self.MetaNode,
+                                                             source=False, destination=True)
         return []
 
     def m_RemoveTag(self, Node):
@@ -1269,16 +3292,20 @@ class MetaData(object):
         '''
         Is this node connected to this MetaData
         '''
-        pnAttr = self.GetMetaNodeMessageAttr(Node, asString=True)
-        if self.MetaNode and pnAttr:
-            attr = "%s.metaTagged" % self.MetaNode
-            connected = pCore.cmds.listConnections(attr, p=1)
-            return pnAttr in connected
-            # return bool(self.MetaNode.metaTagged.isConnectedTo(pnAttr,
-            #                                                    checkLocalArray=True,
-            #                                                    checkOtherArray=True))
-        else:
+        if not self.MetaNode:
             return False
+        return _TAG_CACHE.AreTagged(self.MetaNode, [Node])[0]
+
+    def m_AreTagged(self, Nodes):
+        '''
+        Batch `m_IsTagged`
+
+        :param Nodes: [`str` or `PyNode`,]
+        :return: [bool,] for each of the Nodes
+        '''
+        if not self.MetaNode:
+            return [False] * len(Nodes)
+        return _TAG_CACHE.AreTagged(self.MetaNode, Nodes)
 
     def m_GetTaggedWith(self, Node, MetaNodeClass, AsMetaData=False):
         '''
@@ -1342,16 +3369,7 @@ class MetaData(object):
         :param PrefixName: `bool` default is True and will prefix the metaNode with the class name ONLY if they are not
         the same
         '''
-        shortName = Name.split(":")[-1]
-        namespace = ":".join(Name.split(":")[:-1])
-        if PrefixName:
-            if self.__class__.__name__ == shortName:
-                preFixedName = shortName
-            else:
-                preFixedName = self.__class__.__name__ + "_" + shortName
-            Name = namespace + ":" + preFixedName
-        else:
-            Name = namespace + ":" + shortName
+        Name = self.__PrefixedName(Name, PrefixName)
 
         if self.__MetaNodeExists():
             if not self.MetaNode.isReferenced():
@@ -1360,6 +3378,107 @@ class MetaData(object):
         else:
             self._MetaNodeName = str(Name)
 
+    @classmethod
+    def __PrefixedName(cls, Name, PrefixName=True):
+        shortName = Name.split(":")[-1]
+        namespace = ":".join(Name.split(":")[:-1])
+        if PrefixName:
+            if cls.__name__ == shortName:
+                preFixedName = shortName
+            else:
+                preFixedName = cls.__name__ + "_" + shortName
+            return namespace + ":" + preFixedName
+        return namespace + ":" + shortName
+
+    @classmethod
+    def m_CreateMany(cls, Specs, Undoable=True):
+        '''
+        Creates many metaNodes of this class in one pass.  The dynamic attributes and initial
+        values the class gives a new metaNode are compiled once per class from a prototype, see
+        `_MetaNodeTemplate`, then every node is created and filled in bulk.  The instances are
+        made with __new__ and given the attribute sets and hidden values the prototype's __init__
+        registered, __init__ isn't run for them.  Values that have to be unique per node, ids
+        for example, should be set in `_InitInstanceState`.  The class must be constructible
+        without any arguments, every node the prototype makes is deleted again.
+
+        .. example:
+
+            joints = MRigJoint.m_CreateMany(["Hip", {"Name": "Knee", "Side": "L"}])
+
+        :param Specs: [`str` or `dict`,] the Name of each metaNode, or a dict with an optional
+                      "Name" and the properties to set on it
+        :param Undoable: `bool` the nodes are always created through one modifier, False
+                         leaves it off the undo queue and sets the properties through
+                         MDGModifiers, see `_DGBatch`
+        :return: [`MetaData`,]
+        '''
+        specs = [dict(Name=s) if isinstance(s, basestring) else dict(s) for s in Specs]
+        if not specs:
+            return []
+
+        with _UndoChunk("%s.m_CreateMany" % cls.__name__):
+            template = _CREATE_TEMPLATES.get(cls)
+            if template is None:
+                with _NewNodes() as created:
+                    prototype = cls()
+                try:
+                    template = _CREATE_TEMPLATES[cls] = _MetaNodeTemplate(prototype)
+                finally:
+                    _DeleteNodes(created)
+
+            names = [cls.__PrefixedName(spec.pop("Name", None) or cls.__name__).lstrip(":") for spec in specs]
+            objs = template.Create(names, Undoable)
+            instances = [cls.__FromTemplate(template, obj) for obj in objs]
+            for instance, properties in itertools.izip(instances, specs):
+                with instance.m_Batch(Undoable):
+                    instance._InitInstanceState()
+                    for name, value in properties.iteritems():
+                        setattr(instance, name, value)
+
+        if _IDENTITY_MAP.Enabled:
+            index = GetMetaNodeIndex()
+            for instance, obj in itertools.izip(instances, objs):
+                if index and index.IsTracked(obj):
+                    _IDENTITY_MAP.Add(MetaDataIdentityMap._UUID(obj), instance)
+        return instances
+
+    @classmethod
+    def __FromTemplate(cls, template, obj):
+        '''
+        The instance __init__ would give for a metaNode made by the template, without reading
+        the metaNode back
+
+        :param template: `_MetaNodeTemplate` the node was made by
+        :param obj: `MObject` of the metaNode
+        '''
+        def copyValue(value):
+            return copy.deepcopy(value) if isinstance(value, (list, dict, set)) else value
+
+        instance = cls.__new__(cls)
+        state = instance.__dict__
+        # the sets are frozen and copied on write so each instance can share the template's
+        state.update(template.AttributeSets)
+        state.update(_eHealthObject=None,
+                     _STOPSET=False,
+                     metaClass=cls.__name__,
+                     MetaNode=pCore.PyNode(obj),
+                     _MetaNodeName="",
+                     PartAttributeName=cls.__name__ + "_Part")
+        for name, value in template.HiddenValues.iteritems():
+            state[name] = copyValue(value)
+        if not cls.LazyHydration:
+            for name, value in template.Properties:
+                state[str(name)] = copyValue(value)
+        return instance
+
+    def _InitInstanceState(self):
+        '''
+        Called by `m_CreateMany` on each new instance in place of __init__, after it's been
+        filled in from the class template.  Override to set the values that mustn't be copied
+        from the prototype to every node, the property writes are batched.
+        '''
+        pass
+
     @classmethod
     def m_HasMetaData(cls, Node, **kw):
         '''
@@ -1418,21 +3537,26 @@ class MetaData(object):
 
         :rtype: `list`
         '''
-        if Node:
-            if isinstance(Node, MetaData):
-                Node = pCore.PyNode(Node.MetaNode)
-            else:
-                Node = pCore.PyNode(Node)
-            ignorePlugs = META_NODE_IGNORE_PLUGS[Node.type()]
-            return [a for a in Node.listAttr(ud=True) \
-                    if a.plugAttr(longName=True) not in ignorePlugs]
+        if not Node:
+            if not self.__MetaNodeExists():
+                return []
+            Node = self.MetaNode
+        elif isinstance(Node, MetaData):
+            Node = Node.MetaNode
+        return [pCore.Attribute("%s.%s" % (Node, name)) for name in self.m_GetMetaNodeAttributeNames(Node)]
 
-        else:
-            if self.__MetaNodeExists():
-                ignorePlugs = META_NODE_IGNORE_PLUGS[self.MetaNode.type()]
-                return [a for a in self.MetaNode.listAttr(ud=True) \
-                        if a.plugAttr(longName=True) not in ignorePlugs]
-        return []
+    def m_GetMetaNodeAttributeNames(self, Node=None):
+        '''
+        Same as `m_GetMetaNodeAttributes` but returns the attribute long names, cached per
+        metaNode so no PyMEL attributes are built.  See `BulkGetMetaNodeAttributeNames` for many nodes
+
+        :rtype: [str,]
+        '''
+        if not Node:
+            if not self.__MetaNodeExists():
+                return []
+            Node = self.MetaNode
+        return BulkGetMetaNodeAttributeNames([Node])[0]
 
     def __NextAvailableArrayIndex(self, attr):
         """
@@ -1441,48 +3565,42 @@ class MetaData(object):
         :param Attr: `pCore.Attribute`
         :return: `int`
         """
-        try:
-            indices = set(int(x) for x in cmds.getAttr(str(attr), multiIndices=True))
-        except TypeError:
-            return 0
-
-        diff = set(range(0, max(indices) + 2)) - indices
-        return min(diff)
-        # for i in Attr.getArrayIndices():
-        #     SubAttr = pCore.Attribute("%s.%s" % (Attr, Attr.name(False)))
-        #     if not SubAttr[i].isConnected():
-        #         return i
-        # else:
-        #     index = Attr.getArrayIndices()
-        #     if index:
-        #         index = index[-1] + 1
-        #     else:
-        #         index = 0
-        #     return index
+        return _ARRAY_INDICES.Allocate(attr)[0]
 
-    def m_IsMyParent(self, Node):
-        if isinstance(Node, MetaData):
-            Node = pCore.PyNode(Node.MetaNode)
-        else:
-            Node = pCore.PyNode(Node)
+    def __AreLinked(self, Nodes, DownStream):
+        if not self.MetaNode:
+            return [False] * len(Nodes)
+        linked = _MetaLinkHashes(self.MetaNode.__apimobject__(), DownStream=DownStream)
+        res = []
+        for n in Nodes:
+            node = _GetDependNode(n.MetaNode if isinstance(n, MetaData) else n)
+            res.append(node is not None and MetaNodeIndex._HashNode(node) in linked)
+        return res
 
-        if Node.type() in META_NODES:
-            for n in self.m_Parents():
-                if n.MetaNode == Node:
-                    return True
-        return False
+    def m_IsMyParent(self, Node):
+        return self.__AreLinked([Node], DownStream=False)[0]
 
     def m_IsMyChild(self, Node):
-        if isinstance(Node, MetaData):
-            Node = pCore.PyNode(Node.MetaNode)
-        else:
-            Node = pCore.PyNode(Node)
+        return self.__AreLinked([Node], DownStream=True)[0]
 
-        if Node.type() in META_NODES:
-            for n in self.m_Children():
-                if n.MetaNode == Node:
-                    return True
-        return False
+    def m_AreMyParents(self, Nodes):
+        '''
+        Batch `m_IsMyParent`, the metaLinks are read once for all the Nodes.  MGroups aren't
+        stepped through, IE only direct parents are matched.
+
+        :param Nodes: [`MetaData`, `PyNode` or `str`,]
+        :return: [bool,] for each of the Nodes
+        '''
+        return self.__AreLinked(Nodes, DownStream=False)
+
+    def m_AreMyChildren(self, Nodes):
+        '''
+        Batch `m_IsMyChild`, see `m_AreMyParents`
+
+        :param Nodes: [`MetaData`, `PyNode` or `str`,]
+        :return: [bool,] for each of the Nodes
+        '''
+        return self.__AreLinked(Nodes, DownStream=True)
 
     def m_SetParent(self, Node, allowCyclicTree=False, autoDisconnect=True):
         '''
@@ -1511,19 +3629,120 @@ class MetaData(object):
                         # autoDisconnect only allows 1 parent
                         # so get any parents of this node and remove this
                         # node from the parents children
-                        currentParents = self.m_Parents()
+                        currentParents = self.m_Parents(ExcludeGroups=False)
                         for p in currentParents:
                             p.m_RemoveChild(self)
                     except:
                         pass
                 if not self.m_IsMyParent(Node):
                     Index = self.__NextAvailableArrayIndex(self.MetaNode.metaLinks)
-                    Node.metaLinks.connect(self.MetaNode.metaLinks[Index], f=True)
+                    try:
+                        mBackend.GetBackend().Connect("%s.metaLinks" % Node,
+                                                      "%s.metaLinks[%i]" % (self.MetaNode, Index))
+                    except StandardError:
+                        _ARRAY_INDICES.Release(self.MetaNode.metaLinks, [Index])
+                        raise
                 else:
                     _logger.warning("%s is already a parent of %s" % (Node, self))
         else:
             raise TypeError("Expected MetaNode")
 
+    def __MetaNodeNames(self, Nodes):
+        '''
+        :param Nodes: [`str`, `PyNode` or `MetaData`,]
+        :return: [str,] the metaNode names, raises if any of the Nodes aren't metaNodes
+        '''
+        names = [str(n.MetaNode) if isinstance(n, MetaData) else str(n) for n in Nodes]
+        metaNodes = set(cmds.ls(names, type=META_NODES) or [])
+        for n in names:
+            if n not in metaNodes:
+                raise StandardError("Expected MetaNode, got %s" % n)
+        return names
+
+    def m_SetChildren(self, Nodes, allowCyclicTree=False, autoDisconnect=True, Undoable=True):
+        '''
+        Bulk `m_SetChild`.  The links of this metaNode and the parents of all the Nodes are read
+        once and all the connections are made in one `_DGBatch`.
+
+        :param Nodes: [`MetaData` or `PyNode` of MetaNode,]
+        :param Undoable: `bool` False makes the connections through a single MDGModifier
+        '''
+        Nodes = self.__MetaNodeNames(Nodes)
+        MetaNode = str(self.MetaNode)
+        backend = mBackend.GetBackend()
+        parents = set(backend.ListConnections("%s.metaLinks" % MetaNode, source=True, destination=False,
+                                              nodeTypes=META_NODES))
+        children = set(backend.ListConnections("%s.metaLinks" % MetaNode, source=False, destination=True,
+                                               nodeTypes=META_NODES))
+        childLinks = backend.ListConnectionPairs(["%s.metaLinks" % n for n in Nodes],
+                                                 source=True, destination=False, nodeTypes=META_NODES)
+        batch = _DGBatch(Undoable)
+        allocated = []
+        for Node, links in itertools.izip(Nodes, childLinks):
+            if Node == MetaNode:
+                continue
+            if Node in parents and not allowCyclicTree:
+                continue
+            isChild = Node in children
+            if isChild and not autoDisconnect:
+                _logger.warning("%s is already a child of %s" % (Node, self))
+                continue
+            if autoDisconnect:
+                # autoDisconnect only allows 1 parent, like m_SetChild the other parents of
+                # existing children are removed too
+                for plug, parent in links:
+                    if parent != MetaNode:
+                        batch.Disconnect("%s.metaLinks" % parent, plug)
+            if isChild:
+                continue
+            children.add(Node)
+            index = _ARRAY_INDICES.Allocate("%s.metaLinks" % Node)[0]
+            allocated.append((Node, index))
+            batch.Connect("%s.metaLinks" % MetaNode, "%s.metaLinks[%i]" % (Node, index))
+        try:
+            with _UndoChunk("MetaData.m_SetChildren"):
+                batch.Commit()
+        except StandardError:
+            for Node, index in allocated:
+                _ARRAY_INDICES.Release("%s.metaLinks" % Node, [index])
+            raise
+
+    def m_SetParents(self, Nodes, allowCyclicTree=False, Undoable=True):
+        '''
+        Bulk `m_SetParent` that keeps the current parents.  The links of this metaNode are read
+        once, the metaLinks indices are allocated together and all the connections are made in
+        one `_DGBatch`.
+
+        :param Nodes: [`MetaData` or `PyNode` of MetaNode,]
+        :param Undoable: `bool` False makes the connections through a single MDGModifier
+        '''
+        Nodes = self.__MetaNodeNames(Nodes)
+        MetaNode = str(self.MetaNode)
+        backend = mBackend.GetBackend()
+        parents = set(backend.ListConnections("%s.metaLinks" % MetaNode, source=True, destination=False,
+                                              nodeTypes=META_NODES))
+        children = set(backend.ListConnections("%s.metaLinks" % MetaNode, source=False, destination=True,
+                                               nodeTypes=META_NODES))
+        toConnect = []
+        for Node in Nodes:
+            if Node in parents or Node == MetaNode:
+                continue
+            if Node in children and not allowCyclicTree:
+                continue
+            parents.add(Node)
+            toConnect.append(Node)
+
+        batch = _DGBatch(Undoable)
+        indices = _ARRAY_INDICES.Allocate("%s.metaLinks" % MetaNode, len(toConnect))
+        for Node, index in itertools.izip(toConnect, indices):
+            batch.Connect("%s.metaLinks" % Node, "%s.metaLinks[%i]" % (MetaNode, index))
+        try:
+            with _UndoChunk("MetaData.m_SetParents"):
+                batch.Commit()
+        except StandardError:
+            _ARRAY_INDICES.Release("%s.metaLinks" % MetaNode, indices)
+            raise
+
     def m_SetChild(self, Node, allowCyclicTree=False, autoDisconnect=True):
         '''
         Set a MetaNode as Child via the meteLinks message array.
@@ -1534,7 +3753,7 @@ class MetaData(object):
         if isinstance(Node, MetaData):
             Node = pCore.PyNode(Node.MetaNode)
         elif Node is None:
-            for n in self.m_Children():
+            for n in self.m_Children(ExcludeGroups=False):
                 self.m_RemoveChild(n)
             return
         else:
@@ -1553,14 +3772,19 @@ class MetaData(object):
                         # so get any parents of this node and remove this
                         # node from the parents children
                         mNode = MetaData(Node)
-                        parents = mNode.m_Parents()
+                        parents = mNode.m_Parents(ExcludeGroups=False)
                         for p in parents:
                             p.m_RemoveChild(mNode)
                     except:
                         pass
                 if not self.m_IsMyChild(Node):
                     Index = self.__NextAvailableArrayIndex(Node.metaLinks)
-                    self.MetaNode.metaLinks.connect(Node.metaLinks[Index], f=True)
+                    try:
+                        mBackend.GetBackend().Connect("%s.metaLinks" % self.MetaNode,
+                                                      "%s.metaLinks[%i]" % (Node, Index))
+                    except StandardError:
+                        _ARRAY_INDICES.Release(Node.metaLinks, [Index])
+                        raise
                 else:
                     _logger.warning("%s is already a child of %s" % (Node, self))
         else:
@@ -1595,125 +3819,94 @@ class MetaData(object):
         to decide if you want to create the class to access the functions.
         This way walk can maintain it's speed.
         '''
-        Visited = set([self.MetaNode])
-
-        def _GetChildren(Node):
-            for c in Node.metaLinks.outputs(type=META_NODES):
-                if c not in Visited:
-                    return c
-
-        def _GetParents(Node):
-            cache = set([])
-            for c in Node.metaLinks.inputs(type=META_NODES):
-                if c not in Visited:
-                    return c
-                cache.add(c)
-            if cache:
-                return list(cache)[0]
-            else:
-                return []
-
-        def _GetSiblings(Node):
-            res = set([])
-            Parents = Node.metaLinks.inputs(type=META_NODES)
-            for _ in Parents:
-                res = res.union(set(Node.metaLinks.outputs(type=META_NODES)))
-            return [n for n in res if n not in Visited]
-
-        def _GetNodesInDirection(Node):
-            if DownStream:
-                return _GetChildren(Node)
-            else:
-                return _GetParents(Node)
-
-        def _StepBack(Node):
-            if not DownStream:
-                return _GetChildren(Node)
-            else:
-                return _GetParents(Node)
+        for n in self.m_Traverse(Order="dfs", DownStream=DownStream):
+            yield pCore.PyNode(n)
 
-        if self.MetaNode:
-            NodesInDirection = _GetNodesInDirection(self.MetaNode)
-            if NodesInDirection:
-                Root = NodesInDirection
-            else:
-                Root = None
-            i = 0
-            while Root:
-                i += 1
-                if i > 4000:
-                    Root = False
-                    pCore.mel.warning("Walk maximum recursion reached... break")
-                    break
-
-                if Root not in Visited:
-                    Visited.add(Root)
-                    yield Root
-                NodesInDirection = _GetNodesInDirection(Root)
-                if NodesInDirection:
-                    Root = NodesInDirection
-                else:
-                    if DownStream:
-                        Siblings = _GetSiblings(Root)
-                        if Siblings:
-                            Root = Siblings[0]
-                        else:
-                            NodesInDirection = _GetNodesInDirection(Root)
-                            if NodesInDirection:
-                                Root = NodesInDirection
-                            else:
-                                BackNode = _StepBack(Root)
-                                if BackNode:
-                                    if BackNode == self.MetaNode:
-                                        if not _GetNodesInDirection(BackNode):
-                                            Root = False
-                                        else:
-                                            Root = BackNode
-                                    else:
-                                        Root = BackNode
-                                else:
-                                    Root = False
-                    else:
-                        Root = None
+    def m_Traverse(self, Order="bfs", DownStream=True, MaxDepth=None, MetaClass=None, Prune=None):
+        '''
+        Generator.  Iterative traversal of the meta network from this metaNode, every metaNode
+        is visited once so cycles are safe and there's no cap on the size of the network.  The
+        breadth first walk fetches the neighbours of a whole level in one listConnections query.
+
+        :param Order: "bfs" or "dfs"
+        :param DownStream: `bool` walk the children, else the parents
+        :param MaxDepth: `int` don't go further than this many links from this metaNode
+        :param MetaClass: `str`, MetaData class or a list of either, only yield metaNodes with
+            it in their inheritance.  Other metaNodes are still walked through
+        :param Prune: callable(str) if it returns True the walk doesn't go past that metaNode
+        :return: `str` metaNode names
+        '''
+        if not self.MetaNode:
+            return
+        if Order not in ("bfs", "dfs"):
+            raise ValueError("Order must be 'bfs' or 'dfs' not %s" % Order)
+        backend = mBackend.GetBackend()
+        toFind = _ClassNamesToFind(MetaClass) if MetaClass else None
+        start = str(self.MetaNode)
+        visited = set([start])
+
+        def Neighbours(nodes):
+            return backend.ListConnectionsBulk(["%s.metaLinks" % n for n in nodes],
+                                               source=not DownStream, destination=DownStream,
+                                               nodeTypes=META_NODES)
+
+        def Keep(nodes):
+            if not toFind:
+                return [True] * len(nodes)
+            return [bool(i and toFind.intersection(i)) for i in BulkGetMetaInheritance(nodes)]
+
+        if Order == "bfs":
+            level = [start]
+            depth = 0
+            while level and (MaxDepth is None or depth < MaxDepth):
+                nextLevel = []
+                for neighbours in Neighbours(level):
+                    for n in neighbours:
+                        if n not in visited:
+                            visited.add(n)
+                            nextLevel.append(n)
+                depth += 1
+                for n, keep in zip(nextLevel, Keep(nextLevel)):
+                    if keep:
+                        yield n
+                level = [n for n in nextLevel if not (Prune and Prune(n))]
+        else:
+            stack = [(start, 0)]
+            while stack:
+                node, depth = stack.pop()
+                if node != start:
+                    if Keep([node])[0]:
+                        yield node
+                    if Prune and Prune(node):
+                        continue
+                if MaxDepth is not None and depth >= MaxDepth:
+                    continue
+                neighbours = [n for n in Neighbours([node])[0] if n not in visited]
+                visited.update(neighbours)
+                stack.extend((n, depth + 1) for n in reversed(neighbours))
 
     @staticmethod
     def m_FastIterChildren(StartNode, ExcludeGroups=True):
         """
         Works like m_IterChildren but is a static method and uses cmds.
+        With ExcludeGroups any MGroups are stepped through, yielding their flattened
+        children from the `MGroupMembershipCache` rather than the group itself.
         :param StartNode: MetaNode to start from.
         :return: str
         """
+        cons = mBackend.GetBackend().ListConnections('%s.metaLinks' % StartNode, source=False, destination=True,
+                                                     nodeTypes=META_NODES)
+        if not ExcludeGroups:
+            for c in cons:
+                yield c
+            return
 
-        def __IncludeGroups():
-            cons = pCore.cmds.listConnections('%s.metaLinks' % StartNode, d=1, s=0)
-            if cons:
-                for c in cons:
-                    if pCore.cmds.objectType(c) not in META_NODES:
-                        continue
-                    yield c
-            else:
-                raise StopIteration
-
-        def __ExcludeGroups():
-            cons = pCore.cmds.listConnections('%s.metaLinks' % StartNode, d=1, s=0)
-            if cons:
-                for c in cons:
-                    if pCore.cmds.objectType(c) not in META_NODES:
-                        continue
-                    if pCore.cmds.getAttr('%s.metaClass' % StartNode) == MGroup.__name__:
-                        g = MetaData.m_FastIterChildren(c)
-                        for o in g:
-                            yield o
-                    yield c
+        for c, inheritance in itertools.izip(cons, BulkGetMetaInheritance(cons)):
+            if MGroupMembershipCache.IsGroup(inheritance):
+                for m in _GROUP_MEMBERS.Get(c, DownStream=True):
+                    yield m
             else:
-                raise StopIteration
-
-        if ExcludeGroups:
-            for i in __ExcludeGroups():
-                yield i
-        else:
-            for i in __IncludeGroups():
-                yield i
+                yield c
 
     def m_IterChildren(self, ExcludeGroups=True, AsMetaData=True):
         '''
@@ -1733,41 +3926,25 @@ class MetaData(object):
     @staticmethod
     def m_FastIterParents(StartNode, ExcludeGroups=True):
         """
-        Works like m_IterChildren but is a static method and uses cmds.
+        Works like m_IterParents but is a static method and uses cmds.
+        With ExcludeGroups any MGroups are stepped through, yielding their flattened
+        parents from the `MGroupMembershipCache` rather than the group itself.
         :param StartNode: MetaNode to start from.
         :return: str
         """
+        cons = mBackend.GetBackend().ListConnections('%s.metaLinks' % StartNode, source=True, destination=False,
+                                                     nodeTypes=META_NODES)
+        if not ExcludeGroups:
+            for c in cons:
+                yield c
+            return
 
-        def __IncludeGroups():
-            cons = pCore.cmds.listConnections('%s.metaLinks' % StartNode, d=0, s=1)
-            if cons:
-                for c in cons:
-                    if pCore.cmds.objectType(c) not in META_NODES:
-                        continue
-                    yield c
-            else:
-                raise StopIteration
-
-        def __ExcludeGroups():
-            cons = pCore.cmds.listConnections('%s.metaLinks' % StartNode, d=0, s=1)
-            if cons:
-                for c in cons:
-                    if pCore.cmds.objectType(c) not in META_NODES:
-                        continue
-                    if pCore.cmds.getAttr('%s.metaClass' % StartNode) == MGroup.__name__:
-                        g = MetaData.m_FastIterChildren(c)
-                        for o in g:
-                            yield o
-                    yield c
+        for c, inheritance in itertools.izip(cons, BulkGetMetaInheritance(cons)):
+            if MGroupMembershipCache.IsGroup(inheritance):
+                for m in _GROUP_MEMBERS.Get(c, DownStream=False):
+                    yield m
             else:
-                raise StopIteration
-
-        if ExcludeGroups:
-            for i in __ExcludeGroups():
-                yield i
-        else:
-            for i in __IncludeGroups():
-                yield i
+                yield c
 
     def m_IterParents(self, ExcludeGroups=True, AsMetaData=True):
         '''
@@ -1785,6 +3962,36 @@ class MetaData(object):
             else:
                 yield n
 
+    def m_IterParts(self, asPyNode=True):
+        '''
+        Generator version of `m_GetParts`.  The tagged nodes are fetched in one query and their
+        part attributes read in one pass through the backend, PyNodes are only built as the
+        parts are yielded.
+
+        :rtype: (PyNode,PartData)
+        '''
+        if not self.MetaNode:
+            return
+        tagged = self.m_GetTagged(asPyNode=False)
+        values = mBackend.GetBackend().GetStringAttrs(tagged, self.PartAttributeName)
+        for t, value in itertools.izip(tagged, values):
+            if value is None:
+                continue
+            if asPyNode:
+                yield pCore.PyNode(t), mCodec.DecodeCached(value)
+            else:
+                yield t, mCodec.DecodeCached(value)
+
+    def m_GetPartTable(self, asPyNode=False):
+        '''
+        The parts of this MetaData as a `PartTable` so they can be filtered by column rather than
+        looping over the (Node, PartData) tuples.
+
+        :rtype: `PartTable`
+        '''
+        parts = list(self.m_IterParts(asPyNode=asPyNode))
+        return PartTable([p[0] for p in parts], [p[1] for p in parts])
+
     def m_GetParts(self, asPyNode=True):
         '''
         Parts are attributes on tagged objects in a MetaData system.  The Attribute
@@ -1793,23 +4000,14 @@ class MetaData(object):
 
         :rtype: [(PyNode,PartData),]
         '''
-        if asPyNode:
-            return [(pCore.PyNode(t), json.loads(str(cmds.getAttr("%s.%s" % (t, self.PartAttributeName))))) \
-                    for t in self.m_GetTagged(asPyNode=False) if cmds.objExists("%s.%s" % (t, self.PartAttributeName))]
-        else:
-            return [(t, json.loads(str(cmds.getAttr("%s.%s" % (t, self.PartAttributeName))))) \
-                    for t in self.m_GetTagged(asPyNode=False) if cmds.objExists("%s.%s" % (t, self.PartAttributeName))]
+        return list(self.m_IterParts(asPyNode=asPyNode))
 
     def m_GetPartsWithData(self, Value):
         return [t for t in self.m_GetParts() if t[1] == Value]
 
     def m_IsPart(self, Node):
         if not self.m_IsTagged(Node): return False
-        _attr = str(Node) + "." + self.PartAttributeName
-        if cmds.objExists(_attr):
-            return True
-        else:
-            return False
+        return om.MFnDependencyNode(_GetDependNode(Node)).hasAttribute(self.PartAttributeName)
 
     def m_SearchSystem(self):
         raise NotImplementedError, "Subclasses must implement this functionality"
@@ -1830,7 +4028,7 @@ class MetaData(object):
         attrIter = (at for at in getAttrs(Node) if at.name().find("_Part") != -1)
         res = []
         for attr in attrIter:
-            res.append(json.loads(str(attr.get())))
+            res.append(mCodec.DecodeCached(attr.get()))
         return res
 
     def m_GetPartData(self, Node, BypassIsPart=False):
@@ -1842,9 +4040,9 @@ class MetaData(object):
         # Node = pCore.PyNode(Node)
         if not BypassIsPart:
             if not self.m_IsPart(Node): return None
-            return json.loads(str(cmds.getAttr("%s.%s" % (Node, self.PartAttributeName))))
+            return mCodec.DecodeCached(cmds.getAttr("%s.%s" % (Node, self.PartAttributeName)))
         else:
-            return json.loads(str(cmds.getAttr("%s.%s" % (Node, self.PartAttributeName))))
+            return mCodec.DecodeCached(cmds.getAttr("%s.%s" % (Node, self.PartAttributeName)))
 
     @classmethod
     def m_GetPartDataFromPartAttribute(cls, Node, Attr=None):
@@ -1855,10 +4053,11 @@ class MetaData(object):
         if not Attr:
             Attr = cls.__name__ + "_Part"
 
-        return json.loads(str(pCore.Attribute("%s.%s" % (Node, Attr)).get()))
+        return mCodec.DecodeCached(pCore.Attribute("%s.%s" % (Node, Attr)).get())
 
     def m_SetAsPart(self, Node, Label):
         Node = str(Node)
+        _PART_INDEX.Discard(self.MetaNode)
         _attr = Node + "." + self.PartAttributeName
         if not self.m_IsTagged(Node):
             # _logger.debug("SetAsPart :: %s is Tagged" % Node)
@@ -1866,19 +4065,20 @@ class MetaData(object):
         if cmds.objExists(_attr):
             # _logger.debug("SetAsPart :: Attribute PartAttributeName exists:: %s on :: %s" % (self.PartAttributeName, Node))
             cmds.setAttr(_attr, l=False)
-            cmds.setAttr(_attr, json.dumps(Label), type="string")
+            cmds.setAttr(_attr, mCodec.Encode(Label), type="string")
             cmds.setAttr(_attr, l=True)
         else:
             # _logger.debug("SetAsPart :: No PartAttributeName :: %s on :: %s" % (self.PartAttributeName, Node))
             cmds.addAttr(Node, longName=self.PartAttributeName, dt="string")
             cmds.setAttr(_attr, l=False)
-            cmds.setAttr(_attr, json.dumps(Label), type="string")
+            cmds.setAttr(_attr, mCodec.Encode(Label), type="string")
             cmds.setAttr(_attr, l=True)
 
     def m_RemovePart(self, Node, deleteConnection=False):
         Node = pCore.PyNode(Node)
         if not self.m_IsTagged(Node):
             raise StandardError("Node is not attached to this MetaData")
+        _PART_INDEX.Discard(self.MetaNode)
         if Node.hasAttr(self.PartAttributeName):
             Attr = pCore.Attribute("%s.%s" % (Node, self.PartAttributeName))
             Attr.setLocked(False)
@@ -2026,14 +4226,68 @@ class MetaData(object):
             if not pnAttr:
                 pnAttr = self.__AddMetaNodeMessageAttr(Node)
             # _logger.debug("Connecting MetaNode %s to %s, attr: %s" % (self.MetaNode.name(), Node, pnAttr))
+            index = self.__NextAvailableArrayIndex(self.MetaNode.metaTagged)
             try:
-                index = self.__NextAvailableArrayIndex(self.MetaNode.metaTagged)
-                self.MetaNode.metaTagged[index].connect(pnAttr, **kw)
-            except StandardError as e:
-                raise e
+                mBackend.GetBackend().Connect("%s.metaTagged[%i]" % (self.MetaNode, index),
+                                              pnAttr, force=kw["f"], nextAvailable=kw["na"])
+            except StandardError:
+                _ARRAY_INDICES.Release(self.MetaNode.metaTagged, [index])
+                raise
         else:
             raise StandardError("MetaNode not set on instance")
 
+    def m_ConnectMetaDataToMany(self, Nodes, Undoable=True):
+        '''
+        Bulk `m_ConnectMetaDataTo`.  The current tags are read once, the metaTagged indices are
+        allocated together and the connections are made in one `_DGBatch`.  Nodes that are
+        already tagged are skipped, MetaData instances are set as children.
+
+        :param Nodes: [`str`, `PyNode` or `MetaData`,]
+        :param Undoable: `bool` False makes the connections through a single MDGModifier
+        '''
+        if not self.MetaNode:
+            raise StandardError("MetaNode not set on instance")
+        children = [n for n in Nodes if isinstance(n, MetaData)]
+        if children:
+            self.m_SetChildren(children, Undoable=Undoable)
+        Nodes = [str(n) for n in Nodes if not isinstance(n, MetaData)]
+        if not Nodes:
+            return
+
+        MetaNode = str(self.MetaNode)
+        tagged = set()
+        for node in mBackend.GetBackend().ListConnections("%s.metaTagged" % MetaNode,
+                                                          source=False, destination=True):
+            obj = _GetDependNode(node)
+            if obj is not None:
+                tagged.add(MetaNodeIndex._HashNode(obj))
+
+        toTag = []
+        for Node in Nodes:
+            obj = _GetDependNode(Node)
+            if obj is None:
+                raise StandardError("%s doesn't exist" % Node)
+            key = MetaNodeIndex._HashNode(obj)
+            if key not in tagged:
+                tagged.add(key)
+                toTag.append((Node, om.MFnDependencyNode(obj).hasAttribute(self.MetaNodeMessageAttr)))
+        if not toTag:
+            return
+
+        batch = _DGBatch(Undoable)
+        indices = _ARRAY_INDICES.Allocate("%s.metaTagged" % MetaNode, len(toTag))
+        try:
+            with _UndoChunk("MetaData.m_ConnectMetaDataToMany"):
+                for (Node, hasAttr), index in itertools.izip(toTag, indices):
+                    if not hasAttr:
+                        self.__AddMetaNodeMessageAttr(Node)
+                    batch.Connect("%s.metaTagged[%i]" % (MetaNode, index),
+                                  "%s.%s" % (Node, self.MetaNodeMessageAttr), nextAvailable=True)
+                batch.Commit()
+        except StandardError:
+            _ARRAY_INDICES.Release("%s.metaTagged" % MetaNode, indices)
+            raise
+
     def m_DisConnectMetaDataFrom(self, Node, **kw):
         '''
         DisConnect the MetaData to a Maya dagNode
@@ -2056,6 +4310,9 @@ class MetaData(object):
             raise StandardError("MetaNode not set on instance")
 
 
+RIGISTERED_METACLASS['MetaClass'] = MetaData
+
+
 class MGroup(MetaData):
     '''
     MGroup is a empty MetaData Node that's primary use is to tidy the hypershade and
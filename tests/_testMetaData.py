@@ -32,12 +32,9 @@ class _tCircle(metaData.MetaData):
 
 
     def GetMember(self, relationship):
-        for n, data in self.m_GetParts():
-            try:
-                if data["relationship"] == relationship:
-                    return n
-            except:
-                pass
+        members = self.m_GetPartTable(asPyNode=True).Where(relationship=relationship)
+        if members:
+            return members[0]
 
 
 class _tFamily(_tCircle):
@@ -176,7 +173,7 @@ class _tFriends(_tCircle):
             except metaData.HasMetaDataError as e:
                 pCore.mel.warning(e.msg)
                 return
-        return super(cls.__class__, cls).__new__(cls)
+        return super(_tFriends, cls).__new__(cls)
 
 
     def __init__(self, node=None, **kw):
@@ -230,3 +227,26 @@ class _tFriends(_tCircle):
             return circle
 
 
+
+
+class _tDeclared(metaData.MetaData):
+    '''
+    The same properties as _tMetaSubClass declared on the class rather than in __init__
+    '''
+    DefaultKeyWord = metaData.MetaProperty("I'm the deafult", Locked=True)
+    MyHidden = metaData.MetaProperty(10.999, Hidden=True)
+    MyPrivates = metaData.MetaProperty("Willy", Private=True)
+    Count = metaData.MetaProperty(Type=int)
+    Tags = metaData.MetaProperty(["A", "B"])
+    FOV = metaData.MetaProperty(45.0, Export="FocalDistance", Animated=True)
+
+
+class _tWithLocator(metaData.MetaData):
+    '''
+    Creates and tags a locator when a new metaNode is made
+    '''
+
+    def __init__(self, node=None, **kw):
+        super(_tWithLocator, self).__init__(node, **kw)
+        if not node:
+            self.m_ConnectMetaDataTo(pCore.spaceLocator(n="tLocator"))
@@ -390,6 +390,21 @@ class TestMAsset:
         assert isinstance(m_asset, eMAsset.MAsset)
 
 
+class TestMAssetCreateMany:
+    def setup(self):
+        pCore.newFile(f=True)
+
+    def tearDown(self):
+        pCore.newFile(f=True)
+
+    def test_UniqueUUIDs(self):
+        assets = eMAsset.MAsset.m_CreateMany(["Chair", "Table", "Lamp"])
+        uuids = [a.MetaNode.UUID.get() for a in assets]
+        assert len(set(uuids)) == 3
+        assert [a.UUID for a in assets] == uuids
+        assert all(a.MetaNode.UUID.isLocked() for a in assets)
+
+
 class TestRegisterMAssetFunctions:
     def test_register_m_asset_functions(self):
         # assert_equal(expected, RegisterMAssetFunctions(force))
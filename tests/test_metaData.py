@@ -1,6 +1,12 @@
+import json
+
 import pymel.core as pCore
+import maya.cmds as cmds
 
 import tdtools.meta
+import tdtools.meta.mBackend as mBackend
+import tdtools.meta.mCodec as mCodec
+import tdtools.meta.mCore as mCore
 
 tdtools.meta_Reload()
 from nose.tools import eq_
@@ -122,7 +128,7 @@ class TestFamilyTree(BaseTestClass):
         self.Family.Address = "1 Tile House"
         assert self.Family.MetaNode.Address.get() == u"1 Tile House"
         self.Family.Address = {"Foo":"Bar"}
-        assert self.Family.MetaNode.Address.get() == u'{"Foo": "Bar"}'
+        assert self.Family.MetaNode.Address.get() == u'{"Foo":"Bar"}'
 
     def Test_GetRichFriendsNode(self):
         self.CreateFamily()
@@ -516,4 +522,961 @@ class TestSubClassing:
         self.MetaNode = _testMetaData._tMetaSubClass(DefaultKeyWord="Altered Default")
         Data = eMetaData.MetaData("_tMetaSubClass")
         key = Data.DefaultKeyWord
-        assert Data.DefaultKeyWord == "Altered Default"
\ No newline at end of file
+        assert Data.DefaultKeyWord == "Altered Default"
+
+class TestMetaNodeIndex(BaseTestClass):
+    def setup(self):
+        pCore.newFile(f=True)
+
+    def tearDown(self):
+        pCore.newFile(f=True)
+
+    def test_BuiltInNewScene(self):
+        index = eMetaData._META_NODE_INDEX
+        assert index.IsBuilt()
+        Data = eMetaData.MetaData()
+        assert index.IsTracked(Data.MetaNode.__apimobject__())
+
+    def test_BuiltOnFirstUse(self):
+        index = eMetaData._META_NODE_INDEX
+        index.Clear()
+        Data = eMetaData.MetaData()
+        assert eMetaData.GetMetaNodeIndex().IsTracked(Data.MetaNode.__apimobject__())
+
+    def test_IndexTracksNewMetaNodes(self):
+        Data = _testMetaData._tMetaSubClass()
+        assert str(Data.MetaNode) in list(eMetaData.IterMetaNodesForClass("_tMetaSubClass", asMetaData=False))
+        assert str(Data.MetaNode) in list(eMetaData.IterMetaNodesForBaseClass("MetaData", asMetaData=False))
+
+    def test_IndexDropsDeletedMetaNodes(self):
+        Data = _testMetaData._tMetaSubClass()
+        name = str(Data.MetaNode)
+        Data.m_Delete()
+        assert name not in list(eMetaData.IterAllMetaNodes(asMetaData=False))
+
+    def test_IndexMatchesSceneScan(self):
+        eMetaData.MetaData()
+        _testMetaData._tMetaSubClass()
+        eMetaData.USE_META_NODE_INDEX = False
+        try:
+            scanned = sorted(eMetaData.IterAllMetaNodes(asMetaData=False))
+        finally:
+            eMetaData.USE_META_NODE_INDEX = True
+        assert sorted(eMetaData.IterAllMetaNodes(asMetaData=False)) == scanned
+
+    def test_BulkGetMetaClass(self):
+        Data = _testMetaData._tMetaSubClass()
+        cube = pCore.polyCube()[0]
+        nodes = [str(Data.MetaNode), str(cube), "DoesNotExist"]
+        assert eMetaData.BulkGetMetaClass(nodes) == ["_tMetaSubClass", None, None]
+        inheritance = eMetaData.BulkGetMetaInheritance(nodes)
+        assert "MetaData" in inheritance[0]
+        assert inheritance[1:] == [None, None]
+
+
+class TestMetaClassRegistry:
+    def test_SubClassRegisteredOnDefinition(self):
+        try:
+            class _tRegistered(eMetaData.MetaData):
+                pass
+            assert eMetaData.RIGISTERED_METACLASS["_tRegistered"] is _tRegistered
+            assert eMetaData.RIGISTERED_METACLASS["MetaClass"] is eMetaData.MetaData
+        finally:
+            eMetaData.RIGISTERED_METACLASS.pop("_tRegistered", None)
+
+    def test_SuperClassNewIdiom(self):
+        try:
+            class _tNewOverride(eMetaData.MetaData):
+                def __new__(cls, *args, **kw):
+                    return super(cls.__class__, cls).__new__(cls)
+
+            Data = _tNewOverride()
+            assert type(Data) is _tNewOverride
+            assert Data.metaClass == "_tNewOverride"
+            Data.m_Delete()
+        finally:
+            eMetaData.RIGISTERED_METACLASS.pop("_tNewOverride", None)
+
+    def test_GetMetaNodeClass(self):
+        Data = _testMetaData._tMetaSubClass()
+        assert eMetaData.GetMetaNodeClass(Data.MetaNode) is _testMetaData._tMetaSubClass
+
+
+class TestIdentityMap(BaseTestClass):
+    def setup(self):
+        pCore.newFile(f=True)
+        eMetaData.SetIdentityMapEnabled(True)
+
+    def tearDown(self):
+        eMetaData.SetIdentityMapEnabled(False)
+        pCore.newFile(f=True)
+
+    def test_SameInstanceForSameNode(self):
+        Data = _testMetaData._tMetaSubClass()
+        A = eMetaData.MetaData(str(Data.MetaNode))
+        B = eMetaData.MetaData(Data.MetaNode)
+        assert A is B
+        assert isinstance(A, _testMetaData._tMetaSubClass)
+
+    def test_AttributeAddedInvalidates(self):
+        Data = _testMetaData._tMetaSubClass()
+        A = eMetaData.MetaData(str(Data.MetaNode))
+        Data.MetaNode.addAttr("NewAttr", at="long")
+        assert eMetaData.MetaData(str(Data.MetaNode)) is not A
+
+
+class TestLazyHydration(BaseTestClass):
+    def setup(self):
+        pCore.newFile(f=True)
+        eMetaData.MetaData.LazyHydration = True
+
+    def tearDown(self):
+        eMetaData.MetaData.LazyHydration = False
+        pCore.newFile(f=True)
+
+    def test_AttributesReadOnAccess(self):
+        Data = eMetaData.MetaData()
+        Data.MyString = "Foo"
+        Data.MyJson = {"Foo": "Bar"}
+        Lazy = eMetaData.MetaData(str(Data.MetaNode))
+        assert "MyString" not in Lazy.__dict__
+        assert Lazy.MyString == "Foo"
+        assert "MyString" in Lazy.__dict__
+        assert Lazy.MyJson == {"Foo": "Bar"}
+        assert getattr(Lazy, "DoesNotExist", None) is None
+
+
+class TestSchemaCache(BaseTestClass):
+    def setup(self):
+        pCore.newFile(f=True)
+
+    def tearDown(self):
+        pCore.newFile(f=True)
+
+    def test_SchemaTypes(self):
+        Data = eMetaData.MetaData()
+        Data.MyString = "Foo"
+        Data.MyInt = 5
+        Data.MyJson = [1, 2]
+        schema = eMetaData._SCHEMA_CACHE.Get(Data.MetaNode)
+        assert schema["MyString"][:2] == (str, False)
+        assert schema["MyInt"][:2] == (int, False)
+        assert schema["MyJson"][:2] == (str, True)
+        assert Data.MyJson == [1, 2]
+
+    def test_SchemaRefreshedOnAttributeSwap(self):
+        Data = eMetaData.MetaData()
+        Data.MyAttr = 5
+        assert Data.MyAttr == 5
+        Data.MyAttr = {"Foo": "Bar"}
+        assert Data.MyAttr == {"Foo": "Bar"}
+
+
+class TestBatch(BaseTestClass):
+    def setup(self):
+        pCore.newFile(f=True)
+        self.MetaNode = eMetaData.MetaData()
+        self.MetaNode.MyInt = 1
+        self.MetaNode.MyString = "Foo"
+
+    def tearDown(self):
+        pCore.newFile(f=True)
+
+    def test_BatchWritesOnExit(self):
+        with self.MetaNode.m_Batch():
+            self.MetaNode.MyInt = 2
+            self.MetaNode.MyInt = 3
+            self.MetaNode.MyString = "Bar"
+            self.MetaNode.MyNew = [1, 2]
+            assert self.MetaNode.MetaNode.MyInt.get() == 1
+            assert self.MetaNode.MyInt == 3
+        assert self.MetaNode.MetaNode.MyInt.get() == 3
+        assert self.MetaNode.MyString == "Bar"
+        assert self.MetaNode.MyNew == [1, 2]
+
+    def test_BatchIsOneUndo(self):
+        with self.MetaNode.m_Batch():
+            self.MetaNode.MyInt = 10
+            self.MetaNode.MyString = "Bar"
+        pCore.undo()
+        assert self.MetaNode.MyInt == 1
+        assert self.MetaNode.MyString == "Foo"
+
+    def test_BatchDiscardedOnError(self):
+        try:
+            with self.MetaNode.m_Batch():
+                self.MetaNode.MyInt = 10
+                raise ValueError()
+        except ValueError:
+            pass
+        assert self.MetaNode.MetaNode.MyInt.get() == 1
+
+
+class TestBackend(BaseTestClass):
+    def setup(self):
+        pCore.newFile(f=True)
+        self.Parent = eMetaData.MetaData()
+        self.Child = eMetaData.MetaData()
+        self.Parent.m_SetChild(self.Child)
+        self.Cube = pCore.polyCube()[0]
+        self.Parent.m_ConnectMetaDataTo(self.Cube)
+        self.Parent.MyEnum = pCore.util.Enum("MyEnum", ("Red", "Green", "Blue"))
+
+    def tearDown(self):
+        mBackend.SetBackend("om2")
+        pCore.newFile(f=True)
+
+    def __Check(self):
+        assert eMetaData.IsValidMetaNode(self.Parent.MetaNode)
+        assert [c.MetaNode for c in self.Parent.m_Children()] == [self.Child.MetaNode]
+        assert [p.MetaNode for p in self.Child.m_Parents()] == [self.Parent.MetaNode]
+        assert self.Parent.m_GetTagged(asPyNode=False) == [self.Cube.getShape().name()]
+        assert self.Parent.MyEnum.key == "Red"
+
+    def test_OpenMaya2(self):
+        mBackend.SetBackend("om2")
+        self.__Check()
+
+    def test_OpenMaya2NotUndoable(self):
+        mBackend.SetBackend("om2", Undoable=False)
+        Other = eMetaData.MetaData()
+        self.Parent.m_SetChild(Other)
+        assert [p.MetaNode for p in Other.m_Parents()] == [self.Parent.MetaNode]
+
+    def test_PyMel(self):
+        mBackend.SetBackend("pymel")
+        self.__Check()
+
+    def __CheckWrites(self):
+        self.Parent.Name = "Foo"
+        self.Parent.Count = 2
+        self.Parent.Scale = 1.5
+        self.Parent.Visible = True
+        self.Parent.Data = {"A": [1, 2]}
+        self.Parent.m_RegisterLockedAttr("Count")
+        self.Parent.Count = 3
+        meta = eMetaData.MetaData(self.Parent.MetaNode)
+        assert (meta.Name, meta.Count, meta.Scale, meta.Visible, meta.Data) == ("Foo", 3, 1.5, True, {"A": [1, 2]})
+        assert self.Parent.MetaNode.Count.isLocked()
+        assert self.Parent.MetaNode.Data.shortName() == "json_Data"
+
+    def test_WritesPyMel(self):
+        mBackend.SetBackend("pymel")
+        self.__CheckWrites()
+
+    def test_WritesOpenMaya2NotUndoable(self):
+        mBackend.SetBackend("om2", Undoable=False)
+        self.__CheckWrites()
+
+    def test_UnknownBackend(self):
+        try:
+            mBackend.SetBackend("Foo")
+        except ValueError:
+            return
+        assert False
+
+
+class TestCodec(BaseTestClass):
+    def setup(self):
+        pCore.newFile(f=True)
+        self.MetaNode = eMetaData.MetaData()
+
+    def tearDown(self):
+        mCodec.SetDefaultCodec("json")
+        pCore.newFile(f=True)
+
+    def test_LegacyJson(self):
+        self.MetaNode.MyJson = [1, 2]
+        self.MetaNode.MetaNode.MyJson.set('{"Foo": [1, 2.5, "Bar"]}')
+        assert self.MetaNode.MyJson == {"Foo": [1, 2.5, "Bar"]}
+
+    def test_TaggedCodecs(self):
+        for name in mCodec.CODECS:
+            mCodec.SetDefaultCodec(name)
+            self.MetaNode.MyJson = {"Foo": [1, 2.5, "Bar"]}
+            assert self.MetaNode.MetaNode.MyJson.get().startswith(mCodec.CODECS[name].Header)
+            assert self.MetaNode.MyJson == {"Foo": [1, 2.5, "Bar"]}
+
+    def test_UnknownHeader(self):
+        try:
+            mCodec.Decode("@xx:Foo")
+        except ValueError:
+            return
+        assert False
+
+
+class TestDecodeCache(BaseTestClass):
+    def setup(self):
+        pCore.newFile(f=True)
+        mCodec.GetDecodeCache().Clear()
+        self.MetaNode = eMetaData.MetaData()
+        self.Cube = pCore.polyCube()[0]
+        self.MetaNode.m_SetAsPart(self.Cube, {"Root": True})
+
+    def tearDown(self):
+        pCore.newFile(f=True)
+
+    def test_HitsAndMisses(self):
+        first = self.MetaNode.m_GetPartData(self.Cube)
+        second = self.MetaNode.m_GetPartData(self.Cube)
+        assert first is second
+        stats = mCodec.GetDecodeCache().Stats()
+        assert stats["Misses"] == 1
+        assert stats["Hits"] == 1
+
+    def test_ChangedValueIsDecoded(self):
+        self.MetaNode.m_GetPartData(self.Cube)
+        self.MetaNode.m_SetAsPart(self.Cube, {"Root": False})
+        assert self.MetaNode.m_GetPartData(self.Cube) == {"Root": False}
+
+    def test_ResultsAreFrozen(self):
+        data = self.MetaNode.m_GetPartData(self.Cube)
+        try:
+            data["Root"] = False
+        except TypeError:
+            assert mCodec.Thaw(data) == {"Root": True}
+            return
+        assert False
+
+    def test_PropertyReadModifyWrite(self):
+        self.MetaNode.MyList = [1, [2]]
+        self.MetaNode.MyDict = {"Foo": {"Bar": 1}}
+        value = self.MetaNode.MyList
+        value.append(3)
+        value[1].append(4)
+        self.MetaNode.MyList = value
+        assert self.MetaNode.MyList == [1, [2, 4], 3]
+        value = self.MetaNode.MyDict
+        value["Foo"]["Baz"] = 2
+        self.MetaNode.MyDict = value
+        assert self.MetaNode.MyDict == {"Foo": {"Bar": 1, "Baz": 2}}
+
+    def test_CopyIsDeep(self):
+        data = mCodec.Freeze({"Foo": {"Bar": [1]}})
+        thawed = data.copy()
+        thawed["Foo"]["Bar"].append(2)
+        assert thawed == {"Foo": {"Bar": [1, 2]}}
+        assert data == {"Foo": {"Bar": [1]}}
+
+    def test_Bounded(self):
+        cache = mCodec.DecodeCache(MaxSize=2)
+        for i in range(4):
+            cache.Decode("[%i]" % i)
+        assert len(cache) == 2
+        assert cache.Decode("[3]") == [3]
+        assert cache.Hits == 1
+
+
+class TestIterParts(BaseTestClass):
+    def setup(self):
+        pCore.newFile(f=True)
+        self.MetaNode = eMetaData.MetaData()
+        self.Cubes = [pCore.polyCube()[0] for i in range(3)]
+        for i, cube in enumerate(self.Cubes):
+            self.MetaNode.m_SetAsPart(cube, {"Index": i})
+        self.Tagged = pCore.polyCube()[0]
+        self.MetaNode.m_ConnectMetaDataTo(self.Tagged)
+
+    def tearDown(self):
+        pCore.newFile(f=True)
+
+    def test_IterParts(self):
+        parts = self.MetaNode.m_IterParts(asPyNode=False)
+        assert not isinstance(parts, list)
+        parts = sorted(parts, key=lambda p: p[1]["Index"])
+        assert [p[0] for p in parts] == [c.name() for c in self.Cubes]
+
+    def test_GetPartsSkipsTaggedNodes(self):
+        parts = self.MetaNode.m_GetParts()
+        assert len(parts) == 3
+        assert self.Tagged not in [p[0] for p in parts]
+
+
+class TestPartIndex(BaseTestClass):
+    def setup(self):
+        pCore.newFile(f=True)
+        self.MetaNode = eMetaData.MetaData()
+        self.Search = eMetaData.MetaDataDecorators.SearchPartDataDict(lambda self: None)
+        self.Left = pCore.polyCube()[0]
+        self.Right = pCore.polyCube()[0]
+        self.MetaNode.m_SetAsPart(self.Left, {"Side": "L", "Type": "Arm"})
+        self.MetaNode.m_SetAsPart(self.Right, {"Side": "R", "Type": "Arm"})
+
+    def tearDown(self):
+        pCore.newFile(f=True)
+
+    def test_Absolute(self):
+        assert self.Search(self.MetaNode, ("Side", "L"), ("Type", "Arm")) == [self.Left]
+        assert sorted(self.Search(self.MetaNode, {"Type": "Arm"})) == sorted([self.Left, self.Right])
+        assert self.Search(self.MetaNode, ("Side", "C")) == []
+
+    def test_CaseInsensitive(self):
+        assert self.Search(self.MetaNode, ("Side", "l"), (u"Type", u"aRM")) == [self.Left]
+        self.MetaNode.m_SetAsPart(self.Left, {"Side": u"L", "Name": u"Caf\xe9"})
+        assert self.Search(self.MetaNode, ("Name", "CAF\xc3\xa9")) == [self.Left]
+        assert self.Search(self.MetaNode, ("Name", u"caf\xc9")) == [self.Left]
+
+    def test_Ranked(self):
+        res = self.Search(self.MetaNode, ("Side", "L"), ("Type", "Arm"), Absolute=False)
+        assert res == [[self.Left], [self.Right]]
+        assert self.Search(self.MetaNode, ("Side", "L"), ("Type", "Arm"), Absolute=False, Top=1) == [[self.Left]]
+
+    def test_InvalidatedBySetAsPart(self):
+        assert self.Search(self.MetaNode, ("Side", "L")) == [self.Left]
+        self.MetaNode.m_SetAsPart(self.Right, {"Side": "L", "Type": "Arm"})
+        assert sorted(self.Search(self.MetaNode, ("Side", "L"))) == sorted([self.Left, self.Right])
+        self.MetaNode.m_RemovePart(self.Left)
+        assert self.Search(self.MetaNode, ("Side", "L")) == [self.Right]
+
+
+class TestPartTable(BaseTestClass):
+    def setup(self):
+        pCore.newFile(f=True)
+        self.MetaNode = eMetaData.MetaData()
+        self.Root = pCore.polyCube()[0]
+        self.Other = pCore.polyCube()[0]
+        self.MetaNode.m_SetAsPart(self.Root, {"Root": True, "Name": "Body"})
+        self.MetaNode.m_SetAsPart(self.Other, {"Root": False})
+
+    def tearDown(self):
+        pCore.newFile(f=True)
+
+    def test_Where(self):
+        table = self.MetaNode.m_GetPartTable()
+        assert len(table) == 2
+        assert table.Where(Root=True) == [self.Root.name()]
+        assert table.Where(Root=False, Name="Body") == []
+        assert table.Where(Missing=1) == []
+
+    def test_MissingColumnValues(self):
+        table = self.MetaNode.m_GetPartTable(asPyNode=True)
+        names = list(table.Column("Name"))
+        assert names[list(table.Nodes).index(self.Other)] is eMetaData.PartTable.Missing
+
+
+class TestMetaGraphSnapshot(BaseTestClass):
+    def setup(self):
+        pCore.newFile(f=True)
+        self.Root = eMetaData.MetaData()
+        self.Circle = _testMetaData._tCircle()
+        self.Child = eMetaData.MetaData()
+        self.Sibling = eMetaData.MetaData()
+        self.Root.m_SetChild(self.Circle)
+        self.Root.m_SetChild(self.Sibling)
+        self.Circle.m_SetChild(self.Child)
+        self.Cube = pCore.polyCube()[0]
+        self.Child.m_ConnectMetaDataTo(self.Cube)
+        self.Graph = eMetaData.MetaGraphSnapshot.Capture()
+
+    def tearDown(self):
+        pCore.newFile(f=True)
+
+    def test_Neighbours(self):
+        assert sorted(self.Graph.Children(self.Root)) == sorted([str(self.Circle.MetaNode), str(self.Sibling.MetaNode)])
+        assert self.Graph.Parents(self.Child) == [str(self.Circle.MetaNode)]
+        assert self.Graph.Siblings(self.Circle) == [str(self.Sibling.MetaNode)]
+
+    def test_Walks(self):
+        assert len(self.Graph.Descendants(self.Root)) == 3
+        assert self.Graph.Descendants(self.Root, MetaClass="_tCircle") == [str(self.Circle.MetaNode)]
+        assert self.Graph.Ancestors(self.Child) == [str(self.Circle.MetaNode), str(self.Root.MetaNode)]
+
+    def test_Tagged(self):
+        assert self.Graph.Tagged(self.Child) == [self.Cube.name()]
+        assert self.Graph.TaggedBy(self.Cube) == [str(self.Child.MetaNode)]
+        assert self.Graph.GetMetaClass(self.Circle) == "_tCircle"
+
+
+class TestTraverse(BaseTestClass):
+    def setup(self):
+        pCore.newFile(f=True)
+        self.Root = eMetaData.MetaData()
+        self.A = _testMetaData._tCircle()
+        self.B = eMetaData.MetaData()
+        self.C = eMetaData.MetaData()
+        self.Root.m_SetChild(self.A)
+        self.Root.m_SetChild(self.B)
+        self.A.m_SetChild(self.C)
+
+    def tearDown(self):
+        pCore.newFile(f=True)
+
+    def __Names(self, *metaData):
+        return [str(m.MetaNode) for m in metaData]
+
+    def test_BreadthFirst(self):
+        res = list(self.Root.m_Traverse())
+        assert sorted(res[:2]) == sorted(self.__Names(self.A, self.B))
+        assert res[2:] == self.__Names(self.C)
+
+    def test_DepthFirst(self):
+        res = list(self.Root.m_Traverse(Order="dfs"))
+        assert len(res) == 3
+        assert res.index(str(self.C.MetaNode)) == res.index(str(self.A.MetaNode)) + 1
+
+    def test_UpStream(self):
+        assert list(self.C.m_Traverse(DownStream=False)) == self.__Names(self.A, self.Root)
+
+    def test_Filters(self):
+        assert sorted(self.Root.m_Traverse(MaxDepth=1)) == sorted(self.__Names(self.A, self.B))
+        assert list(self.Root.m_Traverse(MetaClass="_tCircle")) == self.__Names(self.A)
+        pruned = list(self.Root.m_Traverse(Prune=lambda n: n == str(self.A.MetaNode)))
+        assert str(self.C.MetaNode) not in pruned
+
+    def test_Cycles(self):
+        self.C.m_SetChild(self.Root, allowCyclicTree=True, autoDisconnect=False)
+        assert len(list(self.Root.m_Traverse())) == 3
+        assert len(list(self.Root.m_Walk())) == 3
+
+
+class TestGroupMembership(BaseTestClass):
+    def setup(self):
+        pCore.newFile(f=True)
+        self.Root = eMetaData.MetaData()
+        self.Group = eMetaData.MGroup(GroupName="Outer", GroupType="Test")
+        self.Nested = self.Group.AddChildGroup("Inner")
+        self.A = eMetaData.MetaData()
+        self.B = eMetaData.MetaData()
+        self.Root.m_SetChild(self.Group)
+        self.Group.m_SetChild(self.A)
+        self.Nested.m_SetChild(self.B)
+
+    def tearDown(self):
+        pCore.newFile(f=True)
+
+    def __Children(self, Node, **kw):
+        return sorted(str(c) for c in Node.m_FastIterChildren(Node.MetaNode, **kw))
+
+    def test_GroupsAreFlattened(self):
+        assert self.__Children(self.Root) == sorted([str(self.A.MetaNode), str(self.B.MetaNode)])
+        assert self.__Children(self.Root, ExcludeGroups=False) == [str(self.Group.MetaNode)]
+        parents = list(self.B.m_FastIterParents(self.B.MetaNode))
+        assert parents == [str(self.Root.MetaNode)]
+
+    def test_InvalidatedByLinkChanges(self):
+        self.__Children(self.Root)
+        C = eMetaData.MetaData()
+        self.Nested.m_SetChild(C)
+        assert str(C.MetaNode) in self.__Children(self.Root)
+        self.Nested.m_RemoveChild(self.B)
+        assert str(self.B.MetaNode) not in self.__Children(self.Root)
+
+
+class TestBulkRelationships(BaseTestClass):
+    def setup(self):
+        pCore.newFile(f=True)
+        self.MetaNode = eMetaData.MetaData()
+        self.Nodes = [eMetaData.MetaData() for i in range(3)]
+
+    def tearDown(self):
+        pCore.newFile(f=True)
+
+    def __Names(self, metaData):
+        return sorted(str(m.MetaNode) for m in metaData)
+
+    def test_SetChildren(self):
+        for Undoable in (True, False):
+            self.MetaNode.m_SetChildren(self.Nodes, Undoable=Undoable)
+            assert self.__Names(self.MetaNode.m_Children()) == self.__Names(self.Nodes)
+
+    def test_SetChildrenAutoDisconnect(self):
+        Other = eMetaData.MetaData()
+        Other.m_SetChild(self.Nodes[0])
+        self.MetaNode.m_SetChildren(self.Nodes)
+        assert Other.m_Children() == []
+        assert self.__Names(self.Nodes[0].m_Parents()) == self.__Names([self.MetaNode])
+
+    def test_SetChildrenExistingChild(self):
+        Other = eMetaData.MetaData()
+        self.MetaNode.m_SetChild(self.Nodes[0])
+        self.MetaNode.m_SetParent(Other, allowCyclicTree=True)
+        self.Nodes[0].m_SetParent(Other)
+        self.MetaNode.m_SetChildren(self.Nodes)
+        assert self.__Names(self.Nodes[0].m_Parents()) == self.__Names([self.MetaNode])
+        assert self.__Names(self.MetaNode.m_Children()) == self.__Names(self.Nodes)
+
+    def test_SetChildrenAllocatesIndex(self):
+        Other = eMetaData.MetaData()
+        self.Nodes[0].m_SetParent(Other)
+        self.Nodes[0].m_SetParent(eMetaData.MetaData())
+        self.MetaNode.m_SetChildren(self.Nodes[:1])
+        indices = pCore.cmds.getAttr("%s.metaLinks" % self.Nodes[0].MetaNode, multiIndices=True)
+        links = pCore.cmds.listConnections("%s.metaLinks[%i]" % (self.Nodes[0].MetaNode, indices[-1]))
+        assert links == [self.MetaNode.MetaNode.name()]
+        assert indices[-1] not in eMetaData._ARRAY_INDICES.Allocate("%s.metaLinks" % self.Nodes[0].MetaNode, 2)
+
+    def test_SetChildrenIsOneUndo(self):
+        self.MetaNode.m_SetChildren(self.Nodes)
+        pCore.undo()
+        assert self.MetaNode.m_Children() == []
+
+    def test_SetParents(self):
+        self.MetaNode.m_SetParents(self.Nodes, Undoable=False)
+        assert self.__Names(self.MetaNode.m_Parents()) == self.__Names(self.Nodes)
+
+    def test_ConnectMetaDataToMany(self):
+        cubes = [pCore.polyCube()[0] for i in range(3)]
+        self.MetaNode.m_ConnectMetaDataTo(cubes[0])
+        self.MetaNode.m_ConnectMetaDataToMany(cubes + [self.Nodes[0]])
+        assert sorted(self.MetaNode.m_GetTagged(asPyNode=False)) == sorted(c.name() for c in cubes)
+        assert self.__Names(self.MetaNode.m_Children()) == self.__Names(self.Nodes[:1])
+        assert pCore.cmds.getAttr("%s.metaTagged" % self.MetaNode.MetaNode, multiIndices=True) == [0, 1, 2]
+
+
+class TestArrayIndexAllocator(BaseTestClass):
+    def setup(self):
+        pCore.newFile(f=True)
+        self.MetaNode = eMetaData.MetaData()
+        self.Cubes = [pCore.polyCube()[0] for i in range(4)]
+
+    def tearDown(self):
+        pCore.newFile(f=True)
+
+    def __Indices(self):
+        return pCore.cmds.getAttr("%s.metaTagged" % self.MetaNode.MetaNode, multiIndices=True)
+
+    def test_SequentialIndices(self):
+        for cube in self.Cubes:
+            self.MetaNode.m_ConnectMetaDataTo(cube)
+        assert self.__Indices() == [0, 1, 2, 3]
+
+    def test_ReusesDisconnectedIndex(self):
+        for cube in self.Cubes[:3]:
+            self.MetaNode.m_ConnectMetaDataTo(cube)
+        self.MetaNode.m_DisConnectMetaDataFrom(self.Cubes[1])
+        self.MetaNode.m_ConnectMetaDataTo(self.Cubes[3])
+        assert pCore.cmds.listConnections("%s.metaTagged[1]" % self.MetaNode.MetaNode) == [self.Cubes[3].name()]
+
+    def test_FreeIndices(self):
+        indices = eMetaData._FreeIndices([0, 2, 5])
+        assert [indices.Allocate() for i in range(4)] == [1, 3, 4, 6]
+        indices.Release(2)
+        assert indices.Allocate() == 2
+
+    def test_FreeIndicesSparse(self):
+        indices = eMetaData._FreeIndices([0, 10 ** 9])
+        assert indices.Allocate() == 1
+        assert indices._free == []
+        indices.Release(0)
+        indices.Release(10 ** 9)
+        assert [indices.Allocate() for i in range(3)] == [0, 2, 3]
+
+    def test_ReleaseOnFailedConnect(self):
+        self.MetaNode.m_ConnectMetaDataTo(self.Cubes[0])
+        backend = mBackend.GetBackend()
+
+        def Connect(*args, **kw):
+            raise StandardError("connect failed")
+
+        backend.Connect = Connect
+        failed = False
+        try:
+            self.MetaNode.m_ConnectMetaDataTo(self.Cubes[1])
+        except StandardError:
+            failed = True
+        finally:
+            del backend.Connect
+        assert failed
+        self.MetaNode.m_ConnectMetaDataTo(self.Cubes[2])
+        assert self.__Indices() == [0, 1]
+
+
+class TestTagCache(BaseTestClass):
+    def setup(self):
+        pCore.newFile(f=True)
+        self.MetaNode = eMetaData.MetaData()
+        self.Cubes = [pCore.polyCube()[0] for i in range(3)]
+        self.MetaNode.m_ConnectMetaDataTo(self.Cubes[0])
+        self.MetaNode.m_ConnectMetaDataTo(self.Cubes[1])
+
+    def tearDown(self):
+        pCore.newFile(f=True)
+
+    def test_IsTagged(self):
+        assert self.MetaNode.m_IsTagged(self.Cubes[0])
+        assert self.MetaNode.m_IsTagged(self.Cubes[1].name())
+        assert not self.MetaNode.m_IsTagged(self.Cubes[2])
+
+    def test_AreTagged(self):
+        assert self.MetaNode.m_AreTagged(self.Cubes + ["missingNode"]) == [True, True, False, False]
+
+    def test_FollowsConnections(self):
+        self.MetaNode.m_AreTagged(self.Cubes)
+        self.MetaNode.m_DisConnectMetaDataFrom(self.Cubes[0])
+        self.MetaNode.m_ConnectMetaDataTo(self.Cubes[2])
+        assert self.MetaNode.m_AreTagged(self.Cubes) == [False, True, True]
+        pCore.undo()
+        assert self.MetaNode.m_AreTagged(self.Cubes) == [False, True, False]
+
+    def test_SetAsPartOnce(self):
+        self.MetaNode.m_SetAsPart(self.Cubes[2], {"Foo": 1})
+        self.MetaNode.m_SetAsPart(self.Cubes[2], {"Foo": 2})
+        assert self.MetaNode.m_IsPart(self.Cubes[2])
+        assert self.MetaNode.m_GetTagged(asPyNode=False).count(self.Cubes[2].name()) == 1
+
+
+class TestRelationshipPredicates(BaseTestClass):
+    def setup(self):
+        pCore.newFile(f=True)
+        self.MetaNode = eMetaData.MetaData()
+        self.Nodes = [eMetaData.MetaData() for i in range(3)]
+        self.MetaNode.m_SetChild(self.Nodes[0])
+        self.MetaNode.m_SetChild(self.Nodes[1])
+        self.MetaNode.m_SetParent(self.Nodes[2])
+
+    def tearDown(self):
+        pCore.newFile(f=True)
+
+    def test_IsMyChild(self):
+        assert self.MetaNode.m_IsMyChild(self.Nodes[0])
+        assert self.MetaNode.m_IsMyChild(self.Nodes[1].MetaNode.name())
+        assert not self.MetaNode.m_IsMyChild(self.Nodes[2])
+
+    def test_IsMyParent(self):
+        assert self.MetaNode.m_IsMyParent(self.Nodes[2].MetaNode)
+        assert not self.MetaNode.m_IsMyParent(self.Nodes[0])
+
+    def test_Bulk(self):
+        cube = pCore.polyCube()[0]
+        assert self.MetaNode.m_AreMyChildren(self.Nodes + [cube]) == [True, True, False, False]
+        assert self.MetaNode.m_AreMyParents(self.Nodes + [cube]) == [False, False, True, False]
+
+
+class TestCreateMany(BaseTestClass):
+    def setup(self):
+        pCore.newFile(f=True)
+
+    def tearDown(self):
+        pCore.newFile(f=True)
+
+    def __Check(self, Undoable):
+        nodes = _testMetaData._tFamily.m_CreateMany(["Smith", {"Name": "Jones", "Surname": "Jones"}],
+                                                    Undoable=Undoable)
+        assert [type(n) for n in nodes] == [_testMetaData._tFamily] * 2
+        assert nodes[0].MetaNode.name() == "_tFamily_Smith"
+        assert nodes[0].Origin == "British"
+        assert nodes[0].MetaNode.Origin.isLocked()
+        assert nodes[1].Surname == "Jones"
+        assert nodes[1].metaInheritance == _testMetaData._tFamily().metaInheritance
+        nodes[0].m_SetChild(nodes[1])
+        assert nodes[0].m_IsMyChild(nodes[1])
+
+    def test_Undoable(self):
+        self.__Check(True)
+
+    def test_UndoIsOneStep(self):
+        _testMetaData._tFamily.m_CreateMany(["Smith", "Jones"])
+        pCore.undo()
+        assert not pCore.ls("_tFamily_Smith", "_tFamily_Jones")
+
+    def test_UndoRedo(self):
+        _testMetaData._tFamily.m_CreateMany(["Smith"])
+        pCore.undo()
+        pCore.redo()
+        node = pCore.PyNode("_tFamily_Smith")
+        assert node.Origin.get() == "British"
+        assert node.Origin.isLocked()
+
+    def test_DagNodeType(self):
+        nodes = eMetaData.MetaTransform.m_CreateMany(["Root"])
+        assert nodes[0].MetaNode.type() == "EMetaTransform"
+        pCore.undo()
+        assert not pCore.ls("MetaTransform_Root")
+
+    def test_Modifier(self):
+        self.__Check(False)
+
+    def test_MayaCallsPerNode(self):
+        # compile the template first so only the creation is profiled
+        _testMetaData._tFamily.m_CreateMany(["Warmup"])
+        calls = []
+        for count in (2, 8):
+            with mCore.MetaProfiler() as profiler:
+                nodes = _testMetaData._tFamily.m_CreateMany(["Node"] * count)
+            assert "MetaData.__init__" not in profiler.Stats
+            stats = profiler.Stats["MetaData.m_CreateMany"]
+            calls.append((stats["cmds"], stats["pymel"]))
+            assert len(set(n.MetaNode.name() for n in nodes)) == count
+        assert calls[0] == calls[1]
+
+    def test_InstanceState(self):
+        node = _testMetaData._tFamily.m_CreateMany(["Smith"])[0]
+        other = _testMetaData._tFamily(node.MetaNode)
+        assert node.__dict__["Origin"] == other.__dict__["Origin"] == "British"
+        assert node.__dict__["metaInheritance"] == other.__dict__["metaInheritance"]
+        for name in ("_HiddenAttributes", "_LockedAttributes", "_PrivateAttributes"):
+            assert getattr(node, name) == getattr(other, name)
+        assert "Secretes" in node._HiddenAttributes
+        assert "Surname" in node._LockedAttributes
+        assert "PhoneNumber" in node._PrivateAttributes
+        assert node.PartAttributeName == "_tFamily_Part"
+
+    def test_HiddenAndLocked(self):
+        nodes = _testMetaData._tFamily.m_CreateMany([{"Name": "Smith", "Surname": "Smith",
+                                                      "Secretes": "Moving house"}, "Jones"])
+        assert nodes[0].Secretes == "Moving house"
+        assert nodes[1].Secretes == "Dad's got a promotion"
+        assert not nodes[0].MetaNode.hasAttr("Secretes")
+        assert nodes[0].MetaNode.Surname.isLocked()
+        nodes[1].m_RegisterLockedAttr("Address")
+        assert nodes[1]._LockedAttributes is not nodes[0]._LockedAttributes
+
+    def test_PrototypeNodesDeleted(self):
+        nodes = _testMetaData._tWithLocator.m_CreateMany(["A", "B"])
+        assert not pCore.ls("tLocator*", type="transform")
+        assert sorted(eMetaData.IterAllMetaNodes(asMetaData=False)) == sorted(n.MetaNode.name() for n in nodes)
+
+    def test_Empty(self):
+        assert eMetaData.MetaData.m_CreateMany([]) == []
+
+
+class TestMetaProperty(BaseTestClass):
+    def setup(self):
+        pCore.newFile(f=True)
+        self.MetaNode = _testMetaData._tDeclared()
+
+    def tearDown(self):
+        pCore.newFile(f=True)
+
+    def test_Compiled(self):
+        properties = _testMetaData._tDeclared.MetaProperties
+        assert properties.keys() == ["DefaultKeyWord", "MyHidden", "MyPrivates", "Count", "Tags", "FOV"]
+        assert properties["Count"].Type == int
+        assert not isinstance(getattr(_testMetaData._tDeclared, "Count", None), eMetaData.MetaProperty)
+
+    def test_Defaults(self):
+        node = self.MetaNode.MetaNode
+        assert self.MetaNode.DefaultKeyWord == "I'm the deafult"
+        assert node.DefaultKeyWord.isLocked()
+        assert node.MyPrivates.isHidden()
+        assert not node.hasAttr("MyHidden")
+        assert not node.hasAttr("Count")
+        assert self.MetaNode.MyHidden == 10.999
+        assert self.MetaNode.Tags == ["A", "B"]
+        assert self.MetaNode.m_GetSerializeForExportData() == [("FOV", "FocalDistance", True)]
+
+    def test_SharedSets(self):
+        other = _testMetaData._tDeclared()
+        assert self.MetaNode._LockedAttributes is other._LockedAttributes
+        other.m_RegisterLockedAttr("Foo")
+        assert "Foo" not in self.MetaNode._LockedAttributes
+
+    def test_ExistingNodeKeepsValues(self):
+        self.MetaNode.Tags = ["C"]
+        assert _testMetaData._tDeclared(self.MetaNode.MetaNode).Tags == ["C"]
+
+    def test_Validate(self):
+        self.MetaNode.FOV = 10
+        assert self.MetaNode.FOV == 10.0
+        try:
+            self.MetaNode.Count = "Ten"
+        except TypeError:
+            pass
+        else:
+            raise AssertionError("MetaProperty Type wasn't validated")
+
+    def test_ValidateUnicode(self):
+        prop = _testMetaData._tDeclared.MetaProperties["MyPrivates"]
+        assert prop.Validate(u"Zo\xeb") == u"Zo\xeb"
+        self.MetaNode.MyPrivates = u"Zo\xeb"
+        assert cmds.getAttr("%s.MyPrivates" % self.MetaNode.MetaNode) == u"Zo\xeb"
+
+
+class TestInheritanceWrite(BaseTestClass):
+    def setup(self):
+        pCore.newFile(f=True)
+        self.MetaNode = _testMetaData._tFamily()
+        self.Writes = []
+        self._SetAttr = eMetaData.MetaData._MetaData__MetaNodeSetAttr
+
+        def record(instance, attributeName, value):
+            self.Writes.append(attributeName)
+            return self._SetAttr(instance, attributeName, value)
+        eMetaData.MetaData._MetaData__MetaNodeSetAttr = record
+
+    def tearDown(self):
+        eMetaData.MetaData._MetaData__MetaNodeSetAttr = self._SetAttr
+        pCore.newFile(f=True)
+
+    def test_Compiled(self):
+        assert _testMetaData._tFamily._MetaInheritance == ["MetaData", "_tCircle", "_tFamily"]
+
+    def test_ExistingNodeIsReadOnly(self):
+        _testMetaData._tFamily(self.MetaNode.MetaNode)
+        assert "metaInheritance" not in self.Writes
+
+    def test_StaleInheritanceIsFixed(self):
+        attr = self.MetaNode.MetaNode.metaInheritance
+        attr.setLocked(False)
+        attr.set(mCodec.Encode(["MetaData"]))
+        meta = _testMetaData._tFamily(self.MetaNode.MetaNode)
+        assert "metaInheritance" in self.Writes
+        assert meta.metaInheritance == ["MetaData", "_tCircle", "_tFamily"]
+
+
+class TestAttributeNames(BaseTestClass):
+    def setup(self):
+        pCore.newFile(f=True)
+        self.MetaNode = eMetaData.MetaData()
+        self.MetaNode.Foo = "Bar"
+
+    def tearDown(self):
+        pCore.newFile(f=True)
+
+    def test_MatchesListAttr(self):
+        expected = [a.plugAttr(longName=True) for a in self.MetaNode.MetaNode.listAttr(ud=True)
+                    if a.plugAttr(longName=True) not in eMetaData.META_NODE_IGNORE_PLUGS["network"]]
+        assert self.MetaNode.m_GetMetaNodeAttributeNames() == expected
+        assert [a.longName() for a in self.MetaNode.m_GetMetaNodeAttributes()] == expected
+
+    def test_FollowsAttributeChanges(self):
+        assert "Foo" in self.MetaNode.m_GetMetaNodeAttributeNames()
+        self.MetaNode.Count = 1
+        assert "Count" in self.MetaNode.m_GetMetaNodeAttributeNames()
+        del self.MetaNode.Foo
+        assert "Foo" not in self.MetaNode.m_GetMetaNodeAttributeNames()
+
+    def test_Bulk(self):
+        other = eMetaData.MetaData()
+        names = eMetaData.BulkGetMetaNodeAttributeNames([self.MetaNode, other.MetaNode, "missingNode"])
+        assert "Foo" in names[0]
+        assert "Foo" not in names[1]
+        assert names[2] == []
+
+
+class TestMetaProfiler(BaseTestClass):
+    def setup(self):
+        pCore.newFile(f=True)
+
+    def tearDown(self):
+        pCore.newFile(f=True)
+
+    def test_Profile(self):
+        with mCore.MetaProfiler() as profiler:
+            parent = eMetaData.MetaData()
+            parent.m_SetChild(eMetaData.MetaData())
+            parent.m_Children()
+        assert profiler.Stats["MetaData.m_SetChild"]["Calls"] == 1
+        assert profiler.Stats["MetaData.m_SetChild"]["cmds"] > 0
+        assert profiler.Stats["MetaData.__init__"]["Calls"] >= 3
+        assert json.loads(profiler.ToJson())["MayaCalls"]["cmds"] == profiler.MayaCalls["cmds"]
+        assert "MetaData.m_Children" in profiler.Report()
+
+    def test_StopRestores(self):
+        setChild = eMetaData.MetaData.__dict__["m_SetChild"]
+        listConnections = cmds.listConnections
+        profiler = mCore.MetaProfiler()
+        profiler.Start()
+        assert eMetaData.MetaData.__dict__["m_SetChild"] is not setChild
+        profiler.Stop()
+        assert eMetaData.MetaData.__dict__["m_SetChild"] is setChild
+        assert cmds.listConnections is listConnections
+
+    def test_CountsApiCalls(self):
+        Data = eMetaData.MetaData()
+        name = eMetaData.om.MFnDependencyNode.__dict__["name"]
+        with mCore.MetaProfiler(Targets=[("metaData", "MetaData.m_GetMetaNodeAttributeNames")]) as profiler:
+            eMetaData.GetMetaNodeIndex().Clear()
+            Data.m_GetMetaNodeAttributeNames()
+        assert profiler.Stats["MetaData.m_GetMetaNodeAttributeNames"]["OpenMaya"] > 0
+        assert eMetaData.om.MFnDependencyNode.__dict__["name"] is name